@@ -1,6 +1,11 @@
 import typing
 
-from app.admin.views import AdminCurrentView, AdminLogoutView
+from app.admin.views import (
+    AdminCurrentView,
+    AdminLogoutView,
+    DbPoolStatsView,
+    QuestionBankStatsView,
+)
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
@@ -12,3 +17,5 @@ def setup_routes(app: "Application"):
     app.router.add_view("/api/v1/admin.login", AdminLoginView)
     app.router.add_view("/api/v1/admin.current", AdminCurrentView)
     app.router.add_view("/api/v1/admin.logout", AdminLogoutView)
+    app.router.add_view("/api/v1/admin.question_bank_stats", QuestionBankStatsView)
+    app.router.add_view("/api/v1/admin.db_pool_stats", DbPoolStatsView)
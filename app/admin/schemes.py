@@ -5,3 +5,21 @@ class AdminSchema(Schema):
     id = fields.Int(required=False)
     email = fields.Str(required=True)
     password = fields.Str(required=True, load_only=True)
+
+
+class QuestionBankStatsSchema(Schema):
+    blitz = fields.Dict(required=False, allow_none=True)
+    quiz_ids = fields.Dict(required=False, allow_none=True)
+    sampler = fields.Dict(required=False, allow_none=True)
+
+
+class DbPoolStatsSchema(Schema):
+    pool_size = fields.Int(required=False)
+    max_overflow = fields.Int(required=False)
+    checked_in = fields.Int(required=False)
+    checked_out = fields.Int(required=False)
+    overflow = fields.Int(required=False)
+    checkouts = fields.Int(required=False)
+    timeouts = fields.Int(required=False)
+    avg_wait = fields.Float(required=False)
+    max_wait = fields.Float(required=False)
@@ -3,7 +3,11 @@ from aiohttp_apispec import docs, request_schema, response_schema
 from aiohttp_session import get_session, new_session
 
 from app.admin.models import AdminModel
-from app.admin.schemes import AdminSchema
+from app.admin.schemes import (
+    AdminSchema,
+    DbPoolStatsSchema,
+    QuestionBankStatsSchema,
+)
 from app.web.app import View
 from app.web.mixins import AuthRequiredMixin
 from app.web.utils import json_response
@@ -48,3 +52,58 @@ class AdminLogoutView(AuthRequiredMixin, View):
         session = await get_session(self.request)
         session.invalidate()
         return json_response(data={"message": "Вы успешно вышли из системы"})
+
+
+class QuestionBankStatsView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Auth"],
+        summary="Статистика кэша вопросов",
+        description="""
+        blitz - кэш вопросов по темам для игры блитц:
+        "themes": int - тем в кэше,
+        "questions": int - вопросов в кэше,
+        "hits": int - выдано из кэша,
+        "misses": int - загрузок из БД,
+        "coalesced": int - запросов, дождавшихся уже идущей загрузки,
+        "invalidations": int - сбросов тем после изменения вопросов
+        ----
+        quiz_ids - кэш id вопросов по темам, из них выбирается вопрос новой игры
+        100 к 1, показатели те же
+        ----
+        sampler - выбор вопроса для новой игры 100 к 1:
+        "conversations": int - бесед, для которых помнятся недавние вопросы,
+        "choices": int - выбрано вопросов,
+        "retries": int - повторных выборов из-за недавнего вопроса,
+        "fallbacks": int - выборов перебором
+        """,
+    )
+    @response_schema(QuestionBankStatsSchema, 200)
+    async def get(self):
+        data = QuestionBankStatsSchema().dump(
+            {
+                "blitz": self.store.blitzes.question_bank.get_stats(),
+                "quiz_ids": self.store.quizzes.question_ids.get_stats(),
+                "sampler": self.store.game_accessor.question_sampler.get_stats(),
+            }
+        )
+        return json_response(data=data)
+
+
+class DbPoolStatsView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Auth"],
+        summary="Статистика пула соединений БД",
+        description="""
+        "pool_size"/"max_overflow": int - размер пула и сколько можно открыть сверх,
+        "checked_out": int - соединений занято сессиями,
+        "checked_in": int - свободных соединений в пуле,
+        "overflow": int - открыто сверх pool_size,
+        "checkouts": int - выдано соединений,
+        "timeouts": int - сессий, не дождавшихся соединения за pool_timeout,
+        "avg_wait"/"max_wait": float - ожидание свободного соединения, сек
+        """,
+    )
+    @response_schema(DbPoolStatsSchema, 200)
+    async def get(self):
+        data = DbPoolStatsSchema().dump(self.database.get_pool_stats())
+        return json_response(data=data)
@@ -5,6 +5,7 @@ from app.blitz.views import (
     QuestionDeleteByIdView,
     QuestionGetByIdView,
     QuestionGetCountByThemeId,
+    QuestionImportView,
     QuestionListView,
     QuestionPatchById,
     ThemeAddView,
@@ -30,3 +31,4 @@ def setup_routes(app: "Application"):
         "/api/v1/game/blitz.questions_delete_by_id", QuestionDeleteByIdView
     )
     app.router.add_view("/api/v1/game/blitz.questions_patch_by_id", QuestionPatchById)
+    app.router.add_view("/api/v1/game/blitz.questions_import", QuestionImportView)
@@ -1,6 +1,7 @@
 from marshmallow import Schema, fields, validate
 
 from app.games.blitz.constants import BlitzGameStage
+from app.web.schemes import CursorPageSchema, CursorQuerySchema
 
 
 class BlitzThemeSchema(Schema):
@@ -16,12 +17,11 @@ class BlitzQuestionSchema(Schema):
     answer = fields.Str(required=True, validate=validate.Length(min=1, max=100))
 
 
-class BlitzThemeListQuerySchema(Schema):
-    limit = fields.Int(required=False, validate=validate.Range(min=0))
-    offset = fields.Int(required=False, validate=validate.Range(min=0))
+class BlitzThemeListQuerySchema(CursorQuerySchema):
+    pass
 
 
-class BlitzThemeListSchema(Schema):
+class BlitzThemeListSchema(CursorPageSchema):
     themes = fields.Nested(BlitzThemeSchema, many=True)
 
 
@@ -37,16 +37,15 @@ class QuestionCountByThemeIdSchemaResponse(Schema):
     questions_count = fields.Int(required=True, validate=validate.Range(min=0))
 
 
-class BlitzThemeQueryIdSchema(BlitzThemeIdSchema):
-    offset = fields.Int(required=False, validate=validate.Range(min=0))
-    limit = fields.Int(required=False, validate=validate.Range(min=0))
+class BlitzThemeQueryIdSchema(BlitzThemeIdSchema, CursorQuerySchema):
+    pass
 
 
 class BlitzQuestionIdSchema(Schema):
     question_id = fields.Int(validate=validate.Range(min=1))
 
 
-class BlitzQuestionListSchema(Schema):
+class BlitzQuestionListSchema(CursorPageSchema):
     questions = fields.Nested(BlitzQuestionSchema, many=True)
 
 
@@ -99,12 +98,7 @@ class BlitzGameSchemaResponse(Schema):
     theme_id = fields.Int(required=False)
 
 
-class QueryLimitOffsetSchema(Schema):
-    limit = fields.Int(required=False, validate=validate.Range(min=0))
-    offset = fields.Int(required=False, validate=validate.Range(min=0))
-
-
-class BlitzGameListQueryFilteredSchema(QueryLimitOffsetSchema):
+class BlitzGameListQueryFilteredSchema(CursorQuerySchema):
     state = fields.Str(
         required=True,
         validate=validate.OneOf(
@@ -114,5 +108,5 @@ class BlitzGameListQueryFilteredSchema(QueryLimitOffsetSchema):
     )
 
 
-class BlitzGameListSchema(Schema):
+class BlitzGameListSchema(CursorPageSchema):
     games = fields.Nested(BlitzGameSchemaResponse, many=True)
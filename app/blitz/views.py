@@ -19,9 +19,15 @@ from app.blitz.schemes import (
     BlitzThemeSchema as ThemeSchema,
     QuestionCountByThemeIdSchemaResponse,
 )
+from app.store.question_bank.bulk_import import (
+    IMPORT_MAX_SIZE,
+    ImportFileError,
+    parse_blitz_questions,
+)
 from app.web.app import View
 from app.web.mixins import AuthRequiredMixin
-from app.web.utils import json_response
+from app.web.schemes import ImportQuerySchema, ImportResultSchema
+from app.web.utils import error_json_response, json_response, read_text
 
 
 class ThemeAddView(AuthRequiredMixin, View):
@@ -51,17 +57,21 @@ class ThemeListView(AuthRequiredMixin, View):
         description="""
         Возвращает все существующие темы.
         limit - количество возвращаемых тем
-        offset - смещение
+        cursor - next_cursor из ответа на предыдущую страницу
         """,
     )
     @querystring_schema(ThemeListQuerySchema)
     @response_schema(ThemeListSchema)
     async def get(self):
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
-        themes = await self.store.blitzes.get_themes_list(limit, offset)
+        cursor = self.request.query.get("cursor")
+        page = await self.store.blitzes.get_themes_list(cursor, limit)
 
-        return json_response(data=ThemeListSchema().dump({"themes": themes}))
+        return json_response(
+            data=ThemeListSchema().dump(
+                {"themes": page.items, "next_cursor": page.next_cursor}
+            )
+        )
 
 
 class ThemeDeleteByIdView(
@@ -160,7 +170,8 @@ class QuestionListView(AuthRequiredMixin, View):
         description="""
         Отобразить список вопросов, если не указана тема -
         то отображаются все вопросы так же есть query поля
-        limit и offset - для ограничения выборки
+        limit - кол-во вопросов на странице
+        cursor - next_cursor из ответа на предыдущую страницу
         """,
     )
     @querystring_schema(ThemeQueryIdSchema)
@@ -170,10 +181,14 @@ class QuestionListView(AuthRequiredMixin, View):
         # надо сделать чтобы слало просто все вопросы
         theme_id = self.request.query.get("theme_id")
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
-        questions = await self.store.blitzes.get_questions_list(theme_id, offset, limit)
+        cursor = self.request.query.get("cursor")
+        page = await self.store.blitzes.get_questions_list(theme_id, cursor, limit)
 
-        return json_response(data=QuestionListSchema().dump({"questions": questions}))
+        return json_response(
+            data=QuestionListSchema().dump(
+                {"questions": page.items, "next_cursor": page.next_cursor}
+            )
+        )
 
 
 class QuestionGetCountByThemeId(AuthRequiredMixin, View):
@@ -220,3 +235,36 @@ class QuestionPatchById(AuthRequiredMixin, View):
         )
 
         return json_response(data=QuestionSchema().dump(question))
+
+
+class QuestionImportView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Blitz"],
+        summary="Массовый импорт вопросов",
+        description="""
+        Импорт вопросов из файла в теле запроса, format - json или csv.
+        json: [{"title": ..., "theme_id": ..., "answer": ...}],
+        csv: title,theme_id,answer - строка на вопрос.
+        Файл проверяется целиком, и при любой ошибке не добавляется ни один
+        вопрос: в ответе 400 со списком ошибок по строкам файла.
+        """,
+    )
+    @querystring_schema(ImportQuerySchema)
+    @response_schema(ImportResultSchema)
+    async def post(self):
+        import_format = self.request.query.get("format", "json")
+        text = await read_text(self.request, IMPORT_MAX_SIZE)
+        try:
+            rows, errors = parse_blitz_questions(text, import_format)
+        except ImportFileError as exc:
+            return error_json_response(400, "bad_request", message=str(exc))
+
+        result = await self.store.blitzes.import_questions(rows, errors)
+        if result.errors:
+            return error_json_response(
+                400,
+                "bad_request",
+                message="Вопросы не импортированы, в файле есть ошибки",
+                data=ImportResultSchema().dump(result),
+            )
+        return json_response(data=ImportResultSchema().dump(result))
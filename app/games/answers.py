@@ -0,0 +1,107 @@
+import re
+import unicodedata
+from collections.abc import Iterable
+from typing import Generic, TypeVar
+
+from rapidfuzz import fuzz, process
+
+T = TypeVar("T")
+
+# Все, что не буква и не цифра: пунктуация, пробелы, подчеркивания
+_NOT_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+
+def normalize_answer(text: str) -> str:
+    """Приводит ответ к виду для сравнения: NFKC, casefold, ё -> е,
+    без пунктуации и пробелов - "Нью-Йорк!" и "нью йорк" совпадают
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return _NOT_ALPHANUMERIC.sub("", text)
+
+
+class AnswerIndex(Generic[T]):
+    """Индекс правильных ответов одного вопроса.
+    Строится один раз при загрузке игры: варианты ответа (в том числе
+    несколько вариантов одного ответа) нормализуются заранее.
+    Сначала ищется точное совпадение, затем ближайший вариант одним вызовом
+    rapidfuzz.process.extractOne по всем вариантам.
+    Разные ответы с одинаковым вариантом после нормализации хранятся под ним
+    все: засчитывается первый еще не названный, так что назвать можно каждый.
+    """
+
+    def __init__(
+        self,
+        aliases: Iterable[tuple[str, T]],
+        score_cutoff: float = 85,
+        min_fuzzy_length: int = 4,
+    ):
+        """Индекс ответов
+        :param aliases: пары (вариант ответа, ответ)
+        :param score_cutoff: минимальная похожесть варианта (0-100), чтобы ответ
+        с опечаткой засчитался
+        :param min_fuzzy_length: ответы короче стольких символов засчитываются
+        только при точном совпадении
+        """
+        self.score_cutoff = score_cutoff
+        self.min_fuzzy_length = min_fuzzy_length
+        self._answers: dict[str, list[T]] = {}
+        self._unique: list[T] = []
+        for text, answer in aliases:
+            if answer not in self._unique:
+                self._unique.append(answer)
+            key = self._key(text)
+            if key:
+                matched = self._answers.setdefault(key, [])
+                if answer not in matched:
+                    matched.append(answer)
+        self._keys = list(self._answers)
+
+    @staticmethod
+    def _key(text: str) -> str:
+        """Нормализованный вариант, а если от него ничего не осталось
+        (ответ из одних знаков, например "?!") - вариант как есть в нижнем регистре
+        """
+        return normalize_answer(text) or text.strip().casefold()
+
+    def __contains__(self, text: str) -> bool:
+        return self._key(text) in self._answers
+
+    def __len__(self) -> int:
+        """Кол-во ответов, а не их вариантов"""
+        return len(self._unique)
+
+    def get(self, text: str) -> T | None:
+        """Ответ только при точном (после нормализации) совпадении"""
+        matched = self._answers.get(self._key(text))
+        return matched[0] if matched else None
+
+    def match(self, text: str) -> T | None:
+        """Ответ, которому соответствует текст игрока, или None"""
+        query = self._key(text)
+        if not query:
+            return None
+
+        answer = self.get(text)
+        if answer is not None or len(query) < self.min_fuzzy_length:
+            return answer
+
+        result = process.extractOne(
+            query,
+            self._keys,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=self.score_cutoff,
+        )
+        if result is None:
+            return None
+        return self._answers[result[0]][0]
+
+    def remove(self, answer: T) -> None:
+        """Убирает ответ со всеми его вариантами, например когда его уже назвали"""
+        self._unique = [value for value in self._unique if value != answer]
+        answers = {
+            key: [value for value in matched if value != answer]
+            for key, matched in self._answers.items()
+        }
+        self._answers = {key: matched for key, matched in answers.items() if matched}
+        self._keys = list(self._answers)
@@ -1,11 +1,15 @@
 import typing
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from dataclasses import dataclass
 from logging import getLogger
 
 from app.blitz.models import GameBlitzQuestion
+from app.games.answers import AnswerIndex
 from app.games.blitz.constants import BlitzGameStage
 from app.games.blitz.models import BlitzGame
+from app.metrics.tracing import traced
+from app.store.question_bank.cache import BlitzQuestionEntry
 from app.store.vk_api.dataclasses import VkUser
 
 if typing.TYPE_CHECKING:
@@ -27,6 +31,9 @@ class AbstractGame(ABC):
     Если игра есть  - то проверяем
     """
 
+    # Тип игры в метриках
+    game_type: str = "unknown"
+
     @abstractmethod
     async def start_game(self):
         "Функция начала игры"
@@ -59,6 +66,8 @@ class BlitzGameUser:
 
 
 class GameBlitz(AbstractGame):
+    game_type = "blitz"
+
     def __init__(
         self,
         app: "Application",
@@ -66,7 +75,7 @@ class GameBlitz(AbstractGame):
         admin_id: int,
         game_id: int | None = None,
         game_stage: BlitzGameStage = BlitzGameStage.WAITING_ANSWER,
-        questions: list[GameBlitzQuestion] | None = None,
+        questions: Sequence[BlitzQuestionEntry | GameBlitzQuestion] | None = None,
     ):
         super().__init__()
         self.game_model: BlitzGame | None = None
@@ -77,7 +86,7 @@ class GameBlitz(AbstractGame):
         self.logger.info("Инициализирован GameBlitz")
         self.conversation_id = conversation_id
         self.admin_id = admin_id
-        self.questions: list = questions
+        self.questions = questions
         self.id_current_question: int = 0
         self.list_gamers: list[BlitzGameUser] = []
 
@@ -119,8 +128,26 @@ class GameBlitz(AbstractGame):
             raise ValueError("admin_id должен быть > 0") from ValueError
         self._admin_id = v
 
+    @property
+    def questions(self) -> Sequence[BlitzQuestionEntry | GameBlitzQuestion] | None:
+        return self._questions
+
+    @questions.setter
+    def questions(self, value: Sequence[BlitzQuestionEntry | GameBlitzQuestion] | None):
+        """Вместе с вопросами один раз строятся индексы их ответов"""
+        self._questions = value
+        config = self.app.config.answers
+        self.answer_indexes: list[AnswerIndex[BlitzQuestionEntry | GameBlitzQuestion]] = [
+            AnswerIndex(
+                [(question.answer, question)],
+                score_cutoff=config.score_cutoff,
+                min_fuzzy_length=config.min_fuzzy_length,
+            )
+            for question in value or ()
+        ]
+
     def _is_true_answer(self, question_id: int, answer: str) -> bool:
-        return answer.lower() == self.questions[question_id].answer.lower()
+        return self.answer_indexes[question_id].match(answer) is not None
 
     async def _add_point_score_to_user(self, user_id: int) -> BlitzGameUser:
         """Добавляет пользователю 1 побденое очко"""
@@ -135,6 +162,7 @@ class GameBlitz(AbstractGame):
         self.list_gamers.append(blitz_game_user)
         return blitz_game_user
 
+    @traced()
     async def next_question(self):
         self.logger.info("Следующий вопрос")
         self.id_current_question += 1
@@ -148,6 +176,7 @@ class GameBlitz(AbstractGame):
         await self.finish_game()
         return False
 
+    @traced()
     async def handle_message(
         self, message: str | None, user_id: int, conversation_id: int
     ):
@@ -178,6 +207,7 @@ class GameBlitz(AbstractGame):
 
         return False
 
+    @traced()
     async def start_game(self):
         self.logger.info("Начало игры")
         self.game_stage = BlitzGameStage.WAITING_ANSWER
@@ -187,9 +217,9 @@ class GameBlitz(AbstractGame):
         await self.app.store.vk_api.send_message(
             self.conversation_id, "Будут заданы вопросы"
         )
-        self.questions = await self.app.store.blitzes.get_questions_list(
-            self.game_model.theme_id
-        )
+        # Вопросы темы общие для всех игр и берутся из кэша
+        bank = await self.app.store.blitzes.get_question_bank(self.game_model.theme_id)
+        self.questions = bank.questions
         try:
             msg = f"Первый вопрос:\n {self.questions[0].title}"
         except TypeError:
@@ -200,6 +230,7 @@ class GameBlitz(AbstractGame):
         await self.app.store.vk_api.send_message(self.conversation_id, msg)
         return True
 
+    @traced()
     async def finish_game(self):
         self.logger.info("Завершение игры")
         msg = (
@@ -219,6 +250,7 @@ class GameBlitz(AbstractGame):
         self.logger.info("Игра [%s] завершена", self)
         return True
 
+    @traced()
     async def cancel_game(self):
         self.logger.info("Отмена игры")
         self.game_stage = BlitzGameStage.CANCELED
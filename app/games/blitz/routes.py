@@ -3,6 +3,7 @@ import typing
 from app.games.blitz.views import (
     BlitzGameActiveListView,
     BlitzGameChangeStatusView,
+    BlitzGameExportView,
     BlitzGameListView,
     BlitzGameStartView,
 )
@@ -16,3 +17,4 @@ def setup_routes(app: "Application"):
     app.router.add_view("/api/v1/game/blitz.change_game_stage", BlitzGameChangeStatusView)
     app.router.add_view("/api/v1/game/blitz.get_game", BlitzGameListView)
     app.router.add_view("/api/v1/game/blitz.get_active_games", BlitzGameActiveListView)
+    app.router.add_view("/api/v1/game/blitz.export_results", BlitzGameExportView)
@@ -9,12 +9,13 @@ from app.blitz.schemes import (
     BlitzGameListQueryFilteredSchema,
     BlitzGameListSchema,
     GameBlitzPatchSchema,
-    QueryLimitOffsetSchema,
 )
 from app.games.blitz.constants import BlitzGameStage
 from app.games.blitz.schemes import BlitzGameStartQuerySchema
 from app.web.app import View
+from app.web.export import stream_export
 from app.web.mixins import AuthRequiredMixin
+from app.web.schemes import CursorQuerySchema, ExportQuerySchema
 from app.web.utils import json_response
 
 
@@ -109,7 +110,7 @@ class BlitzGameListView(AuthRequiredMixin, View):
         Возвращает все игры по выбранному 
         ----
         limit - количество игр на странице
-        offset - смещение
+        cursor - next_cursor из ответа на предыдущую страницу
         state_filter - фильтр по состоянию игры
         ---- state ----
         WAITING_ANSWER - Игра идет, и ожидаем ответа на вопрос
@@ -124,13 +125,17 @@ class BlitzGameListView(AuthRequiredMixin, View):
     @response_schema(BlitzGameListSchema)
     async def get(self):
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
+        cursor = self.request.query.get("cursor")
         state = self.request.query.get("state")
-        games = await self.store.blitzes.get_games_by_state(
-            limit=limit, offset=offset, state=state
+        page = await self.store.blitzes.get_games_by_state(
+            cursor=cursor, limit=limit, state=state
         )
 
-        return json_response(data=BlitzGameListSchema().dump({"games": games}))
+        return json_response(
+            data=BlitzGameListSchema().dump(
+                {"games": page.items, "next_cursor": page.next_cursor}
+            )
+        )
 
 
 class BlitzGameActiveListView(AuthRequiredMixin, View):
@@ -142,17 +147,48 @@ class BlitzGameActiveListView(AuthRequiredMixin, View):
         Возвращает все игры по выбранному 
         ----
         limit - количество игр на странице
-        offset - смещение
+        cursor - next_cursor из ответа на предыдущую страницу
         ---- state ----
         WAITING_ANSWER - Игра идет, и ожидаем ответа на вопрос
         PAUSE - Игра приостановлена
         """,
     )
-    @querystring_schema(QueryLimitOffsetSchema)
+    @querystring_schema(CursorQuerySchema)
     @response_schema(BlitzGameListSchema)
     async def get(self):
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
-        games = await self.store.blitzes.get_active_games(limit=limit, offset=offset)
+        cursor = self.request.query.get("cursor")
+        page = await self.store.blitzes.get_active_games(cursor=cursor, limit=limit)
+
+        return json_response(
+            data=BlitzGameListSchema().dump(
+                {"games": page.items, "next_cursor": page.next_cursor}
+            )
+        )
+
 
-        return json_response(data=BlitzGameListSchema().dump({"games": games}))
+class BlitzGameExportView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Game Blitz Management"],
+        summary="Выгрузить результаты игр блиц",
+        description="""
+        Выгрузка всех игр блиц одним потоковым ответом: строка на игрока в игре
+        с кол-вом угаданных вопросов, для игр без ответов - строка с пустыми
+        полями игрока
+        format - ndjson (объект на строку, по умолчанию) или csv
+        Поля: game_id, conversation_id, game_stage, theme_id, vk_user_id,
+        player_name, correct_answers
+        """,
+    )
+    @querystring_schema(ExportQuerySchema)
+    async def get(self):
+        export_format = self.request.query.get("format", "ndjson")
+        blitzes = self.store.blitzes
+
+        return await stream_export(
+            self.request,
+            blitzes.stream_games_results(),
+            blitzes.EXPORT_COLUMNS,
+            export_format,
+            filename="blitz_results",
+        )
@@ -8,3 +8,12 @@ class GameStage(Enum):
     WAITING_ANSWER = "WAITING_ANSWER"
     FINISHED = "FINISHED"
     CANCELED = "CANCELED"
+
+
+# Стадии идущей игры: из них игру можно завершить или отменить
+ACTIVE_STAGES = (
+    GameStage.WAIT_INIT,
+    GameStage.REGISTRATION_GAMERS,
+    GameStage.WAITING_READY_TO_ANSWER,
+    GameStage.WAITING_ANSWER,
+)
@@ -4,17 +4,27 @@ from logging import getLogger
 
 import sqlalchemy.orm.exc
 
+from app.games.answers import AnswerIndex
 from app.games.blitz.logic import AbstractGame
-from app.games.game_100.constants import GameStage
+from app.games.game_100.constants import ACTIVE_STAGES, GameStage
 from app.games.game_100.models import Game, Player
+from app.metrics.tracing import traced
+from app.quiz.models import Answer
 from app.store.vk_api.dataclasses import VkUser
-from app.store.vk_api.utils import VkButton, VkKeyboard
+from app.store.vk_api.keyboards import (
+    EMPTY_KEYBOARD,
+    EMPTY_ONE_TIME_KEYBOARD,
+    QUESTION_KEYBOARD,
+    REGISTRATION_KEYBOARD,
+)
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
 
 
 class Game100Logic(AbstractGame):
+    game_type = "game_100"
+
     def __init__(
         self,
         app: "Application",
@@ -35,14 +45,20 @@ class Game100Logic(AbstractGame):
         self.max_count_gamers: int = game_model.profile.max_count_gamers
         self.conversation_id: int = game_model.conversation_id
         self.game_state: GameStage = game_model.state
-        self.answers: dict = {}
-
-        for answer in game_model.question.answers:
-            self.answers[answer.title.lower()] = answer
+        # Еще не названные ответы, индекс строится один раз при загрузке игры
+        self.answers: AnswerIndex[Answer] = AnswerIndex(
+            [(answer.title, answer) for answer in game_model.question.answers],
+            score_cutoff=app.config.answers.score_cutoff,
+            min_fuzzy_length=app.config.answers.min_fuzzy_length,
+        )
 
         try:
-            for _ in game_model.player_answers_games:
-                self.answers.pop(_.answer.title.lower())
+            # По id, а не по тексту: у разных ответов текст может совпасть
+            # после нормализации
+            answered_ids = {_.answer_id for _ in game_model.player_answers_games}
+            for answer in game_model.question.answers:
+                if answer.id in answered_ids:
+                    self.answers.remove(answer)
         except sqlalchemy.orm.exc.DetachedInstanceError:
             pass
 
@@ -60,11 +76,17 @@ class Game100Logic(AbstractGame):
         try:
             await asyncio.sleep(self.time_to_answer)
 
-            self.game_state = GameStage.WAITING_READY_TO_ANSWER
-            await self.app.store.game_accessor.change_state(
+            # Если игрок успел ответить, переход уже сделан обработкой ответа
+            if not await self.app.store.game_accessor.transition(
                 game_id=self.game_id,
+                expected=GameStage.WAITING_ANSWER,
                 new_state=GameStage.WAITING_READY_TO_ANSWER,
-            )
+                responsed_player_id=None,
+            ):
+                return
+
+            self.game_state = GameStage.WAITING_READY_TO_ANSWER
+            self.answered_player_id = None
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text="Время вышло,игрок не успел ответить",
@@ -80,11 +102,14 @@ class Game100Logic(AbstractGame):
             raise asyncio.CancelledError
 
         if self.min_count_gamers <= len(self.players) <= self.max_count_gamers:
-            self.game_state = GameStage.WAITING_READY_TO_ANSWER
-            await self.app.store.game_accessor.change_state(
+            if not await self.app.store.game_accessor.transition(
                 game_id=self.game_id,
+                expected=GameStage.REGISTRATION_GAMERS,
                 new_state=GameStage.WAITING_READY_TO_ANSWER,
-            )
+            ):
+                return
+
+            self.game_state = GameStage.WAITING_READY_TO_ANSWER
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text=f"Время вышло, набралось достаточное количество игроков!\n"
@@ -112,20 +137,11 @@ class Game100Logic(AbstractGame):
             peer_id=self.conversation_id, text="Внимание вопрос!"
         )
         await asyncio.sleep(delay)
-        keyboard_start_game = VkKeyboard(one_time=False)
-        btn_ready_to_answer = VkButton(
-            label="Знаю ответ!",
-            type_btn="callback",
-            payload={"type": "show_snackbar", "text": "/give_answer"},
-            color="primary",
-        ).get()
-
         text = f"{self.question.title} \n"
-        await keyboard_start_game.add_line([btn_ready_to_answer])
         await self.app.store.vk_api.send_message(
             peer_id=self.conversation_id,
             text=text,
-            keyboard=await keyboard_start_game.get_keyboard(),
+            keyboard=QUESTION_KEYBOARD,
         )
         await self._send_answers_list()
 
@@ -134,7 +150,7 @@ class Game100Logic(AbstractGame):
 
         if is_close_answers:
             for answer in self.game_model.question.answers:
-                if answer.title.lower() not in self.answers:
+                if answer.title not in self.answers:
                     text += f"| {answer.title} | = {answer.score} очков\n"
                 else:
                     _ = "X" * len(answer.title)
@@ -150,33 +166,26 @@ class Game100Logic(AbstractGame):
             text=text,
         )
 
+    @traced()
     async def start_game(self, admin_id: int):
         self.logger.info("Началась игра: %s", self.game_id)
-        if self.game_state == GameStage.WAIT_INIT:
-            self.game_model.admin_game_id = admin_id
-            await self.app.store.game_accessor.change_admin_game_id(
-                game_id=self.game_id, vk_user_id=admin_id
+        # Админ и стадия меняются одним запросом: из двух одновременных
+        # нажатий "начать" игру начнет только одно
+        if self.game_state == GameStage.WAIT_INIT and (
+            await self.app.store.game_accessor.transition(
+                game_id=self.game_id,
+                expected=GameStage.WAIT_INIT,
+                new_state=GameStage.REGISTRATION_GAMERS,
+                admin_game_id=admin_id,
             )
-            keyboard_start_game = VkKeyboard(one_time=False, inline=False)
-            btn_reg_on = VkButton(
-                label="Буду играть",
-                type_btn="callback",
-                payload={"type": "show_snackbar", "text": "/reg_on"},
-                color="primary",
-            ).get()
-            btn_reg_off = VkButton(
-                label="Отменить регистрацию",
-                type_btn="callback",
-                payload={"type": "show_snackbar", "text": "/reg_off"},
-                color="secondary",
-            ).get()
-            await keyboard_start_game.add_line([btn_reg_on, btn_reg_off])
-
+        ):
+            self.game_model.admin_game_id = admin_id
+            self.game_state = GameStage.REGISTRATION_GAMERS
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text=f"Началась регистрация на игру!\n"
                 f" Режим игры :\n{self.game_model.profile}\n",
-                keyboard=await keyboard_start_game.get_keyboard(),
+                keyboard=REGISTRATION_KEYBOARD,
             )
 
             self.pinned_message_id = await self.app.store.vk_api.send_message(
@@ -189,10 +198,6 @@ class Game100Logic(AbstractGame):
             await self.app.store.vk_api.pin_message(
                 peer_id=self.conversation_id, message_id=self.pinned_message_id
             )
-            self.game_state = GameStage.REGISTRATION_GAMERS
-            await self.app.store.game_accessor.change_state(
-                game_id=self.game_id, new_state=GameStage.REGISTRATION_GAMERS
-            )
 
             task = asyncio.create_task(self._registration_timer())
             self.background_tasks.add(task)
@@ -204,6 +209,7 @@ class Game100Logic(AbstractGame):
                 text="Невозможно сейчас начать игру, т.к. она уже идет",
             )
 
+    @traced()
     async def register_player(self, event_id, user_id):
         if self.game_state == GameStage.REGISTRATION_GAMERS:
             self.logger.info("Регистрируем игрока")
@@ -230,12 +236,14 @@ class Game100Logic(AbstractGame):
                     )
                 self.players[user_id] = player
 
-                if len(self.players) >= self.max_count_gamers:
-                    self.game_state = GameStage.WAITING_READY_TO_ANSWER
-                    await self.app.store.game_accessor.change_state(
+                if len(self.players) >= self.max_count_gamers and (
+                    await self.app.store.game_accessor.transition(
                         game_id=self.game_id,
+                        expected=GameStage.REGISTRATION_GAMERS,
                         new_state=GameStage.WAITING_READY_TO_ANSWER,
                     )
+                ):
+                    self.game_state = GameStage.WAITING_READY_TO_ANSWER
                     await self.app.store.vk_api.send_message(
                         peer_id=self.conversation_id,
                         text="Набралось достаточное " "количество игроков",
@@ -253,7 +261,7 @@ class Game100Logic(AbstractGame):
                 for v in self.players.values():
                     pinned_text += f"-- {v.last_name} {v.first_name} \n"
 
-                await self.app.store.vk_api.edit_message(
+                self.app.store.vk_api.edits.edit(
                     peer_id=self.conversation_id,
                     conversation_message_id=self.pinned_message_id,
                     text=pinned_text,
@@ -267,6 +275,7 @@ class Game100Logic(AbstractGame):
                     response_text="Вы уже зарегестрированы!",
                 )
 
+    @traced()
     async def unregister_player(self, event_id, user_id):
         if self.game_state == GameStage.REGISTRATION_GAMERS:
             if user_id in self.players:
@@ -286,7 +295,7 @@ class Game100Logic(AbstractGame):
                 for v in self.players.values():
                     pinned_text += f"-- {v.last_name} {v.first_name} \n"
 
-                await self.app.store.vk_api.edit_message(
+                self.app.store.vk_api.edits.edit(
                     peer_id=self.conversation_id,
                     conversation_message_id=self.pinned_message_id,
                     text=pinned_text,
@@ -308,6 +317,7 @@ class Game100Logic(AbstractGame):
                 response_text="Играть могут только зарегестрированные игрроки",
             )
 
+    @traced()
     async def waiting_ready_to_answer(self, event_id: int, user_id: int):
         """Функция состояния нажатия на кнопку "Готов ответить"
         1) Меняет состояние игры
@@ -318,20 +328,22 @@ class Game100Logic(AbstractGame):
         :param user_id: user_id на который будет послан ответ
         :return:
         """
+        # Право ответа получает тот, чей переход прошел первым,
+        # остальные нажавшие увидят, что не успели
         if (
             self.game_state == GameStage.WAITING_READY_TO_ANSWER
             and user_id in self.players
+            and await self.app.store.game_accessor.transition(
+                game_id=self.game_id,
+                expected=GameStage.WAITING_READY_TO_ANSWER,
+                new_state=GameStage.WAITING_ANSWER,
+                responsed_player_id=user_id,
+            )
         ):
             self.game_state = GameStage.WAITING_ANSWER
             self.answered_player_id = user_id
             self.answered_player = await self.app.store.vk_api.get_vk_user(user_id)
 
-            await self.app.store.game_accessor.change_state(
-                game_id=self.game_id, new_state=GameStage.WAITING_ANSWER
-            )
-            await self.app.store.game_accessor.change_answer_player(
-                game_id=self.game_id, vk_user_id=user_id
-            )
             await self.app.store.vk_api.send_event_answer(
                 event_id=event_id,
                 peer_id=self.conversation_id,
@@ -339,12 +351,11 @@ class Game100Logic(AbstractGame):
                 response_text="Поздравляю, ты отвечаешь на вопрос!",
             )
 
-            keyboard_start_game = VkKeyboard(one_time=True)
-            vk_user = await self.app.store.vk_api.get_vk_user(user_id)
+            vk_user = self.answered_player
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text=f"На вопрос отвечает" f" {vk_user.last_name} {vk_user.first_name}!",
-                keyboard=await keyboard_start_game.get_keyboard(),
+                keyboard=EMPTY_ONE_TIME_KEYBOARD,
             )
 
             task = asyncio.create_task(self._answer_timer())
@@ -367,6 +378,7 @@ class Game100Logic(AbstractGame):
                 response_text="Уже нет в этом смысла!",
             )
 
+    @traced()
     async def waiting_answer(self, user_id: int, answer: str):
         """Функция принимает ответ игрока во время ожидания ответа
         1) Проверяет верность ответа
@@ -383,18 +395,27 @@ class Game100Logic(AbstractGame):
             for task in self.background_tasks:
                 task.cancel()
 
-            await self.app.store.game_accessor.change_answer_player(
-                game_id=self.game_id, vk_user_id=None
-            )
+            # Ответ принимается, только если таймер еще не забрал ход
+            if not await self.app.store.game_accessor.transition(
+                game_id=self.game_id,
+                expected=GameStage.WAITING_ANSWER,
+                new_state=GameStage.WAITING_READY_TO_ANSWER,
+                responsed_player_id=None,
+            ):
+                return
+
+            self.game_state = GameStage.WAITING_READY_TO_ANSWER
+            self.answered_player_id = None
 
-            if answer.lower() in self.answers:
+            right_answer = self.answers.match(answer)
+            if right_answer is not None:
                 player: Player = await (
                     self.app.store.game_accessor.get_player_by_vk_id_game_id(
                         vk_id=user_id, game_id=self.game_id
                     )
                 )
                 await self.app.store.game_accessor.player_add_answer_from_game(
-                    answer_id=self.answers[answer.lower()].id,
+                    answer_id=right_answer.id,
                     player_id=player.id,
                     game_id=self.game_id,
                 )
@@ -404,39 +425,35 @@ class Game100Logic(AbstractGame):
                 await self.app.store.vk_api.send_message(
                     peer_id=self.conversation_id,
                     text=f"Игрок: {self.answered_player} ответил правильно! \n"
-                    f" Получил {self.answers.pop(answer.lower()).score}"
+                    f" Получил {right_answer.score}"
                     f" очков! \n",
                 )
 
-                if len(self.answers.keys()) == 0:
+                self.answers.remove(right_answer)
+                if len(self.answers) == 0:
                     await self.end_game(user_id=user_id)
 
                 else:
                     await self._resend_question()
-                    self.game_state = GameStage.WAITING_READY_TO_ANSWER
-                    await self.app.store.game_accessor.change_state(
-                        game_id=self.game_id,
-                        new_state=GameStage.WAITING_READY_TO_ANSWER,
-                    )
 
             else:
-                self.game_state = GameStage.WAITING_READY_TO_ANSWER
-                await self.app.store.game_accessor.change_state(
-                    game_id=self.game_id,
-                    new_state=GameStage.WAITING_READY_TO_ANSWER,
-                )
                 await self._resend_question()
 
+    @traced()
     async def end_game(self, user_id: int) -> bool:
-        if user_id in self.players or user_id == self.game_model.admin_game_id:
+        if (
+            user_id in self.players or user_id == self.game_model.admin_game_id
+        ) and await self.app.store.game_accessor.transition(
+            game_id=self.game_id,
+            expected=ACTIVE_STAGES,
+            new_state=GameStage.FINISHED,
+            responsed_player_id=None,
+        ):
             self.game_state = GameStage.FINISHED
-            await self.app.store.game_accessor.change_state(
-                game_id=self.game_id, new_state=GameStage.FINISHED
-            )
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text="Игра окончена!",
-                keyboard=await VkKeyboard().get_keyboard(),
+                keyboard=EMPTY_KEYBOARD,
             )
             players_scores = await self.app.store.game_accessor.get_score(
                 game_id=self.game_id
@@ -450,26 +467,32 @@ class Game100Logic(AbstractGame):
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text=text,
-                keyboard=await VkKeyboard().get_keyboard(),
+                keyboard=EMPTY_KEYBOARD,
             )
+            await self.app.store.vk_api.edits.flush(peer_id=self.conversation_id)
             await self.app.store.vk_api.unpin_message(peer_id=self.conversation_id)
 
             return True
 
         return False
 
+    @traced()
     async def cancel_game(self, user_id: int) -> bool:
-        if user_id == self.game_model.admin_game_id:
-            self.game_state = GameStage.CANCELED
-            await self.app.store.game_accessor.change_state(
-                game_id=self.game_id, new_state=GameStage.CANCELED
+        if user_id == self.game_model.admin_game_id and (
+            await self.app.store.game_accessor.transition(
+                game_id=self.game_id,
+                expected=ACTIVE_STAGES,
+                new_state=GameStage.CANCELED,
+                responsed_player_id=None,
             )
-            keyboard_empty = VkKeyboard()
+        ):
+            self.game_state = GameStage.CANCELED
             await self.app.store.vk_api.send_message(
                 peer_id=self.conversation_id,
                 text="Игра отменена!",
-                keyboard=await keyboard_empty.get_keyboard(),
+                keyboard=EMPTY_KEYBOARD,
             )
+            await self.app.store.vk_api.edits.flush(peer_id=self.conversation_id)
             await self.app.store.vk_api.unpin_message(peer_id=self.conversation_id)
             return True
 
@@ -489,5 +512,6 @@ class Game100Logic(AbstractGame):
     async def resume_game(self):
         self.logger.info("Возобновление игры")
 
+    @traced()
     async def handle_message(self, message: str, user_id: int, conversation_id: int):
         """Функция обрабатывает сообщения от пользователей"""
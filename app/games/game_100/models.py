@@ -71,7 +71,9 @@ class Player(BaseModel):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     vk_user_id: Mapped[int] = mapped_column(nullable=False, primary_key=True)
     name: Mapped[str] = mapped_column(String[50])
-    game_id: Mapped[int] = mapped_column(ForeignKey("games.id"), primary_key=True)
+    game_id: Mapped[int] = mapped_column(
+        ForeignKey("games.id"), primary_key=True, index=True
+    )
 
     game: Mapped["Game"] = relationship(back_populates="players")
     player_answers_games: Mapped[list["PlayerAnswerGame"]] = relationship(
@@ -92,7 +94,9 @@ class PlayerAnswerGame(BaseModel):
     id: Mapped[int] = mapped_column(primary_key=True)
 
     player_id: Mapped[int] = mapped_column(ForeignKey("players.id"), nullable=False)
-    game_id: Mapped[int] = mapped_column(ForeignKey("games.id"), nullable=False)
+    game_id: Mapped[int] = mapped_column(
+        ForeignKey("games.id"), nullable=False, index=True
+    )
     answer_id: Mapped[int] = mapped_column(ForeignKey("answers.id"), nullable=False)
 
     player: Mapped[list["Player"]] = relationship(back_populates="player_answers_games")
@@ -3,6 +3,7 @@ import typing
 from app.games.game_100.views import (
     AddSettingsView,
     DefaultSettingsView,
+    GameExportView,
     GameGetByIdView,
     GameListView,
     GameProfileListActiveView,
@@ -18,6 +19,7 @@ def setup_routes(app: "Application"):
     app.router.add_view("/api/v1/game/list_active", GameProfileListActiveView)
     app.router.add_view("/api/v1/game/list", GameListView)
     app.router.add_view("/api/v1/game/get_by_id", GameGetByIdView)
+    app.router.add_view("/api/v1/game/export", GameExportView)
 
     app.router.add_view("/api/v1/game/profile.get_by_id", SettingsGetByIdView)
     app.router.add_view("/api/v1/game/profile.patch", PatchSettingsView)
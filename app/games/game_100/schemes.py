@@ -5,6 +5,7 @@ from marshmallow import (
 )
 
 from app.quiz.schemes import AnswerSchema, QuestionSchema
+from app.web.schemes import CursorPageSchema, CursorQuerySchema
 
 
 class GameSettingsIdSchema(Schema):
@@ -49,14 +50,11 @@ class GameSettingsSchema(Schema):
     time_to_answer = fields.Int(required=True, validate=validate.Range(min=1, max=99))
 
 
-class GameListQuerySchema(Schema):
-    limit = fields.Int(required=False, validate=validate.Range(min=1))
-    offset = fields.Int(required=False, validate=validate.Range(min=1))
+class GameListQuerySchema(CursorQuerySchema):
+    pass
 
 
-class GameListQueryFilteredSchema(Schema):
-    limit = fields.Int(required=False, validate=validate.Range(min=1))
-    offset = fields.Int(required=False, validate=validate.Range(min=1))
+class GameListQueryFilteredSchema(CursorQuerySchema):
     state = fields.Str(
         required=False,
         validate=validate.OneOf(
@@ -93,8 +91,19 @@ class GameSchema(Schema):
     player_answers_games = fields.Nested(PlayerAnswersGames, many=True, required=True)
 
 
-class GameListSchema(Schema):
-    games = fields.Nested(GameSchema, many=True)
+class GameSummarySchema(Schema):
+    id = fields.Int(required=True)
+    conversation_id = fields.Int(required=False, allow_none=True)
+    state = fields.Str(required=True)
+    question_id = fields.Int(required=True)
+    profile_id = fields.Int(required=True)
+    players_count = fields.Int(required=True)
+    answers_count = fields.Int(required=True)
+    total_score = fields.Int(required=True)
+
+
+class GameListSchema(CursorPageSchema):
+    games = fields.Nested(GameSummarySchema, many=True)
 
 
 class GameIdSchema(Schema):
@@ -19,7 +19,9 @@ from app.games.game_100.schemes import (
     SettingsIdSchema,
 )
 from app.web.app import View
+from app.web.export import stream_export
 from app.web.mixins import AuthRequiredMixin
+from app.web.schemes import ExportQuerySchema
 from app.web.utils import json_response
 
 
@@ -40,22 +42,30 @@ class GameListView(AuthRequiredMixin, View):
         ----
         limit - количество игр на странице
         ----
-        offset - смещение
+        cursor - next_cursor из ответа на предыдущую страницу
         ----
         В случае пустых значений - возвращает все что есть.
+        ----
+        Каждая игра - краткая сводка: players_count - кол-во игроков,
+        answers_count - угаданных ответов, total_score - сумма их очков.
+        Подробности по игре - в /game/get_by_id
         """,
     )
     @querystring_schema(GameListQueryFilteredSchema)
     @response_schema(GameListSchema)
     async def get(self):
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
+        cursor = self.request.query.get("cursor")
         state = self.request.query.get("state")
-        games = await self.store.game_accessor.get_games_filtered_state(
-            limit=limit, offset=offset, state=state
+        page = await self.store.game_accessor.get_games_filtered_state(
+            cursor=cursor, limit=limit, state=state
         )
 
-        return json_response(data=GameListSchema().dump({"games": games}))
+        return json_response(
+            data=GameListSchema().dump(
+                {"games": page.items, "next_cursor": page.next_cursor}
+            )
+        )
 
 
 class GameProfileListActiveView(AuthRequiredMixin, View):
@@ -63,25 +73,47 @@ class GameProfileListActiveView(AuthRequiredMixin, View):
         tags=["Game"],
         summary="Получить активные игры",
         description="Отобразить активные игры, которые идут"
-        " в настоящий момент времени",
+        " в настоящий момент времени, краткой сводкой как в списке игр",
     )
     @querystring_schema(GameListQuerySchema)
     @response_schema(GameListSchema)
     async def get(self):
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
+        cursor = self.request.query.get("cursor")
+        page = await self.store.game_accessor.get_active_games(cursor=cursor, limit=limit)
 
         return json_response(
             data=GameListSchema().dump(
-                {
-                    "games": await self.store.game_accessor.get_active_games(
-                        limit=limit, offset=offset
-                    )
-                }
+                {"games": page.items, "next_cursor": page.next_cursor}
             )
         )
 
 
+class GameExportView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Game"],
+        summary="Выгрузить игры с очками игроков",
+        description="""
+        Выгрузка всех игр одним потоковым ответом: строка на игрока в игре,
+        для игр без игроков - строка с пустыми полями игрока
+        format - ndjson (объект на строку, по умолчанию) или csv
+        Поля: game_id, conversation_id, state, vk_user_id, player_name, score
+        """,
+    )
+    @querystring_schema(ExportQuerySchema)
+    async def get(self):
+        export_format = self.request.query.get("format", "ndjson")
+        game_accessor = self.store.game_accessor
+
+        return await stream_export(
+            self.request,
+            game_accessor.stream_games_scores(),
+            game_accessor.EXPORT_COLUMNS,
+            export_format,
+            filename="games",
+        )
+
+
 class GameGetByIdView(AuthRequiredMixin, View):
     @docs(
         tags=["Game"],
@@ -0,0 +1,83 @@
+from app.metrics.registry import Counter, Gauge, Histogram, MetricsRegistry
+
+REGISTRY = MetricsRegistry()
+
+POLL_CYCLE_SECONDS = REGISTRY.register(
+    Histogram(
+        "vk_bot_long_poll_cycle_seconds",
+        "Время одного цикла long poll: запрос к ВК и раскладка апдейтов по шардам",
+        buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 20.0, 25.0, 30.0),
+    )
+)
+
+OVERFLOWED_UPDATES = REGISTRY.register(
+    Counter(
+        "vk_bot_overflowed_updates_total",
+        "Апдейты, не поместившиеся в очередь шарда и ждавшие в переполнении",
+        labels=("shard",),
+    )
+)
+
+UPDATE_HANDLING_SECONDS = REGISTRY.register(
+    Histogram(
+        "vk_bot_update_handling_seconds",
+        "Время обработки одного апдейта в BotManager",
+        labels=("type",),
+    )
+)
+
+VK_API_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "vk_bot_vk_api_request_seconds",
+        "Время вызова метода API ВК, включая батчинг и очередь планировщика",
+        labels=("method",),
+    )
+)
+
+VK_API_ERRORS = REGISTRY.register(
+    Counter(
+        "vk_bot_vk_api_errors_total",
+        "Вызовы API ВК, завершившиеся ошибкой",
+        labels=("method",),
+    )
+)
+
+DB_SESSION_SECONDS = REGISTRY.register(
+    Histogram(
+        "vk_bot_db_session_seconds",
+        "Время работы с сессией БД по методам аксессоров",
+        labels=("method",),
+    )
+)
+
+ACTIVE_GAMES = REGISTRY.register(
+    Gauge(
+        "vk_bot_active_games",
+        "Кол-во идущих игр по типам",
+        labels=("type",),
+    )
+)
+
+SLOW_TRACES = REGISTRY.register(
+    Counter(
+        "vk_bot_slow_traces_total",
+        "Апдейты, обработка которых заняла больше порога трассировки",
+        labels=("type",),
+    )
+)
+
+DB_POOL_WAIT_SECONDS = REGISTRY.register(
+    Histogram(
+        "vk_bot_db_pool_wait_seconds",
+        "Ожидание свободного соединения в пуле БД",
+    )
+)
+
+DB_POOL_CONNECTIONS = REGISTRY.register(
+    Gauge(
+        "vk_bot_db_pool_connections",
+        "Соединения пула БД: checked_out - заняты сессиями, checked_in - свободны,"
+        " overflow - открыты сверх pool_size",
+        labels=("state",),
+    )
+)
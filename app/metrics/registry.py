@@ -0,0 +1,204 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Mapping
+from typing import TypeVar
+
+# Границы корзин гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{escape_label(str(value))}"'
+        for name, value in zip(names, values, strict=True)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """Метрика в текстовом формате Prometheus.
+    Значения хранятся по кортежу значений меток, поэтому запись в метрику -
+    это поиск в словаре и пара сложений, без блокировок: бот работает
+    в одном event loop.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    @abstractmethod
+    def collect(self) -> list[str]:
+        """Строки значений метрики без HELP и TYPE"""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.collect(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{format_labels(self.labels, values)} {format_value(value)}"
+            for values, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Значение, которое считается в момент сбора метрик функцией function:
+    она возвращает словарь {кортеж значений меток: значение}
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.function: Callable[[], Mapping[tuple, float]] | None = None
+
+    def set_function(self, function: Callable[[], Mapping[tuple, float]]) -> None:
+        self.function = function
+
+    def collect(self) -> list[str]:
+        if self.function is None:
+            return []
+
+        return [
+            f"{self.name}{format_labels(self.labels, values)} {format_value(value)}"
+            for values, value in self.function().items()
+        ]
+
+
+class HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class HistogramTimer:
+    __slots__ = ("histogram", "label_values", "started_at")
+
+    def __init__(self, histogram: "Histogram", label_values: tuple):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self) -> "HistogramTimer":
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started_at, *self.label_values)
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = HistogramSeries(len(self.buckets) + 1)
+
+        # Значение попадает в первую корзину, граница которой не меньше его
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def time(self, *label_values) -> HistogramTimer:
+        """Контекстный менеджер, записывающий время выполнения блока"""
+        return HistogramTimer(self, label_values)
+
+    def get_count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return sum(series.counts) if series else 0
+
+    def collect(self) -> list[str]:
+        lines = []
+        bounds = (*self.buckets, float("inf"))
+        for values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series.counts, strict=True):
+                cumulative += count
+                labels = format_labels(
+                    self.labels, values, extra=f'le="{format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self.metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
@@ -0,0 +1,215 @@
+import functools
+import json
+import logging
+import logging.handlers
+import time
+import typing
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import ParamSpec, TypeVar
+
+from app.metrics.metrics import SLOW_TRACES
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass(slots=True)
+class Span:
+    """Участок обработки апдейта
+    depth - вложенность, 0 - вызовы прямо из обработки апдейта
+    started_at - время начала, time.monotonic()
+    """
+
+    name: str
+    depth: int
+    started_at: float
+    duration: float = 0.0
+
+
+@dataclass(slots=True)
+class Trace:
+    """Обработка одного апдейта: от постановки в очередь до конца обработки.
+    finished - трасса закрыта: фоновые задачи (таймеры игр, склейка правок)
+    наследуют контекст, но в закрытую трассу больше не пишут
+    """
+
+    name: str
+    started_at: float
+    attrs: dict = field(default_factory=dict)
+    spans: list[Span] = field(default_factory=list)
+    duration: float = 0.0
+    finished: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace": self.name,
+            **self.attrs,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "depth": span.depth,
+                    "start_ms": round((span.started_at - self.started_at) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                }
+                for span in sorted(self.spans, key=lambda span: span.started_at)
+            ],
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+_current_depth: ContextVar[int] = ContextVar("trace_depth", default=0)
+
+
+class TraceContext:
+    __slots__ = ("token", "trace", "tracer")
+
+    def __init__(self, tracer: "Tracer", trace: Trace):
+        self.tracer = tracer
+        self.trace = trace
+
+    def __enter__(self) -> Trace:
+        self.token = _current_trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc_info) -> None:
+        _current_trace.reset(self.token)
+        self.trace.duration = time.monotonic() - self.trace.started_at
+        self.trace.finished = True
+        self.tracer.finish(self.trace)
+
+
+class SpanContext:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.token = _current_depth.set(self.span.depth + 1)
+        return self.span
+
+    def __exit__(self, *exc_info) -> None:
+        _current_depth.reset(self.token)
+        self.span.duration = time.monotonic() - self.span.started_at
+
+
+class NullContext:
+    """Заглушка вне трассировки: span ничего не записывает"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+NULL_CONTEXT = NullContext()
+
+
+class Tracer:
+    """Трассировка обработки апдейтов через contextvars.
+    Трасса начинается в воркере шарда и по контексту asyncio доходит до
+    менеджеров, логики игр, сессий БД и запросов к ВК - каждый из них
+    записывает в нее свой span. Трассы дольше slow_threshold секунд
+    пишутся в лог slow_traces одной JSON строкой с разбивкой по span'ам.
+    """
+
+    def __init__(self):
+        self.logger = getLogger("slow_traces")
+        self.enabled = False
+        self.slow_threshold = 1.0
+
+    def configure(self, enabled: bool, slow_threshold: float) -> None:
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+
+    def trace(
+        self, name: str, started_at: float | None = None, **attrs
+    ) -> TraceContext | NullContext:
+        """Начинает трассу
+        :param name: тип трассы, например тип апдейта
+        :param started_at: начало трассы по time.monotonic(), если апдейт
+        уже успел подождать в очереди
+        """
+        if not self.enabled:
+            return NULL_CONTEXT
+
+        trace = Trace(
+            name=name,
+            started_at=time.monotonic() if started_at is None else started_at,
+            attrs=attrs,
+        )
+        return TraceContext(self, trace)
+
+    def span(self, name: str) -> SpanContext | NullContext:
+        trace = _current_trace.get()
+        if trace is None or trace.finished:
+            return NULL_CONTEXT
+
+        span = Span(name=name, depth=_current_depth.get(), started_at=time.monotonic())
+        trace.spans.append(span)
+        return SpanContext(span)
+
+    def add_span(self, name: str, started_at: float, duration: float) -> None:
+        """Записывает уже прошедший участок, например ожидание в очереди"""
+        trace = _current_trace.get()
+        if trace is not None and not trace.finished:
+            trace.spans.append(
+                Span(
+                    name=name,
+                    depth=_current_depth.get(),
+                    started_at=started_at,
+                    duration=duration,
+                )
+            )
+
+    def finish(self, trace: Trace) -> None:
+        if trace.duration < self.slow_threshold:
+            return
+
+        SLOW_TRACES.inc(trace.name)
+        self.logger.warning(json.dumps(trace.to_dict(), ensure_ascii=False))
+
+
+TRACER = Tracer()
+
+
+def traced(
+    name: str | None = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Декоратор корутины: ее вызов записывается в текущую трассу span'ом,
+    по умолчанию с именем вида Класс.метод
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with TRACER.span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def setup_tracing(app: "Application") -> None:
+    config = app.config.tracing
+    TRACER.configure(enabled=config.enabled, slow_threshold=config.slow_threshold)
+
+    if config.enabled and config.file:
+        handler = logging.handlers.RotatingFileHandler(
+            filename=config.file, maxBytes=10 * 1024 * 1024, backupCount=3
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        TRACER.logger.addHandler(handler)
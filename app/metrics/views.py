@@ -0,0 +1,28 @@
+from aiohttp.web_response import Response
+from aiohttp_apispec import docs
+
+from app.metrics.metrics import REGISTRY
+from app.web.app import View
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(View):
+    @docs(
+        tags=["Metrics"],
+        summary="Метрики бота для Prometheus",
+        description="""
+        Метрики в текстовом формате Prometheus, без авторизации - для сборщика:
+        vk_bot_long_poll_cycle_seconds - цикл long poll,
+        vk_bot_update_handling_seconds{type} - обработка апдейта в BotManager,
+        vk_bot_vk_api_request_seconds{method} - вызов метода API ВК,
+        vk_bot_vk_api_errors_total{method} - ошибки вызовов API ВК,
+        vk_bot_db_session_seconds{method} - работа с сессией БД
+        по методам аксессоров,
+        vk_bot_active_games{type} - идущие игры по типам
+        """,
+    )
+    async def get(self):
+        return Response(
+            body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
@@ -5,6 +5,7 @@ from app.quiz.views import (
     QuestionDeleteByIdView,
     QuestionGetByIdView,
     QuestionGetCountByThemeId,
+    QuestionImportView,
     QuestionListView,
     QuestionPatchById,
     ThemeAddView,
@@ -29,3 +30,4 @@ def setup_routes(app: "Application"):
         "/api/v1/game/quiz.questions_delete_by_id", QuestionDeleteByIdView
     )
     app.router.add_view("/api/v1/game/quiz.questions_patch_by_id", QuestionPatchById)
+    app.router.add_view("/api/v1/game/quiz.questions_import", QuestionImportView)
@@ -1,5 +1,7 @@
 from marshmallow import Schema, fields, validate
 
+from app.web.schemes import CursorPageSchema, CursorQuerySchema
+
 
 class ThemeSchema(Schema):
     id = fields.Int(required=False)
@@ -26,12 +28,11 @@ class QuestionSchema(Schema):
     )
 
 
-class ThemeListQuerySchema(Schema):
-    limit = fields.Int(required=False, validate=validate.Range(min=0))
-    offset = fields.Int(required=False, validate=validate.Range(min=0))
+class ThemeListQuerySchema(CursorQuerySchema):
+    pass
 
 
-class ThemeListSchema(Schema):
+class ThemeListSchema(CursorPageSchema):
     themes = fields.Nested(ThemeSchema, many=True)
 
 
@@ -47,16 +48,15 @@ class QuestionCountByThemeIdSchemaResponse(Schema):
     questions_count = fields.Int(required=True)
 
 
-class ThemeQueryIdSchema(ThemeIdSchema):
-    offset = fields.Int(required=False, validate=validate.Range(min=0))
-    limit = fields.Int(required=False, validate=validate.Range(min=0))
+class ThemeQueryIdSchema(ThemeIdSchema, CursorQuerySchema):
+    pass
 
 
 class QuestionIdSchema(Schema):
     question_id = fields.Int(validate=validate.Range(min=1))
 
 
-class QuestionListSchema(Schema):
+class QuestionListSchema(CursorPageSchema):
     questions = fields.Nested(QuestionSchema, many=True)
 
 
@@ -20,9 +20,15 @@ from app.quiz.schemes import (
     ThemeQueryIdSchema,
     ThemeSchema,
 )
+from app.store.question_bank.bulk_import import (
+    IMPORT_MAX_SIZE,
+    ImportFileError,
+    parse_quiz_questions,
+)
 from app.web.app import View
 from app.web.mixins import AuthRequiredMixin
-from app.web.utils import json_response
+from app.web.schemes import ImportQuerySchema, ImportResultSchema
+from app.web.utils import error_json_response, json_response, read_text
 
 
 class ThemeAddView(AuthRequiredMixin, View):
@@ -48,16 +54,22 @@ class ThemeListView(AuthRequiredMixin, View):
         summary="Отобразить существующие темы",
         description="""
         Возвращает все существующие темы.
+        limit - количество возвращаемых тем
+        cursor - next_cursor из ответа на предыдущую страницу
         """,
     )
     @querystring_schema(ThemeListQuerySchema)
     @response_schema(ThemeListSchema)
     async def get(self):
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
-        themes = await self.store.quizzes.get_themes_list(limit, offset)
+        cursor = self.request.query.get("cursor")
+        page = await self.store.quizzes.get_themes_list(cursor, limit)
 
-        return json_response(data=ThemeListSchema().dump({"themes": themes}))
+        return json_response(
+            data=ThemeListSchema().dump(
+                {"themes": page.items, "next_cursor": page.next_cursor}
+            )
+        )
 
 
 class ThemeDeleteByIdView(
@@ -160,7 +172,8 @@ class QuestionListView(AuthRequiredMixin, View):
         description="""
         Отобразить список вопросов, если не указана тема -
         то отображаются все вопросы так же есть query поля
-        limit и offset - для ограничения выборки
+        limit - кол-во вопросов на странице
+        cursor - next_cursor из ответа на предыдущую страницу
         """,
     )
     @querystring_schema(ThemeQueryIdSchema)
@@ -170,10 +183,14 @@ class QuestionListView(AuthRequiredMixin, View):
         # надо сделать чтобы слало просто все вопросы
         theme_id = self.request.query.get("theme_id")
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
-        questions = await self.store.quizzes.get_questions_list(theme_id, offset, limit)
+        cursor = self.request.query.get("cursor")
+        page = await self.store.quizzes.get_questions_list(theme_id, cursor, limit)
 
-        return json_response(data=QuestionListSchema().dump({"questions": questions}))
+        return json_response(
+            data=QuestionListSchema().dump(
+                {"questions": page.items, "next_cursor": page.next_cursor}
+            )
+        )
 
 
 class QuestionGetCountByThemeId(AuthRequiredMixin, View):
@@ -229,3 +246,37 @@ class QuestionPatchById(AuthRequiredMixin, View):
         )
 
         return json_response(data=QuestionSchema().dump(question))
+
+
+class QuestionImportView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Quiz"],
+        summary="Массовый импорт вопросов",
+        description="""
+        Импорт вопросов из файла в теле запроса, format - json или csv.
+        json: [{"title": ..., "theme_id": ..., "answers": [{"title": ...,
+        "score": ...}]}], csv: title,theme_id,answer,score - строка на ответ,
+        строки одного вопроса - с одинаковыми title и theme_id.
+        Файл проверяется целиком, и при любой ошибке не добавляется ни один
+        вопрос: в ответе 400 со списком ошибок по строкам файла.
+        """,
+    )
+    @querystring_schema(ImportQuerySchema)
+    @response_schema(ImportResultSchema)
+    async def post(self):
+        import_format = self.request.query.get("format", "json")
+        text = await read_text(self.request, IMPORT_MAX_SIZE)
+        try:
+            rows, errors = parse_quiz_questions(text, import_format)
+        except ImportFileError as exc:
+            return error_json_response(400, "bad_request", message=str(exc))
+
+        result = await self.store.quizzes.import_questions(rows, errors)
+        if result.errors:
+            return error_json_response(
+                400,
+                "bad_request",
+                message="Вопросы не импортированы, в файле есть ошибки",
+                data=ImportResultSchema().dump(result),
+            )
+        return json_response(data=ImportResultSchema().dump(result))
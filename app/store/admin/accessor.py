@@ -19,7 +19,9 @@ class AdminAccessor(BaseAccessor):
         )
 
     async def get_by_email(self, email: str) -> AdminModel | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="AdminAccessor.get_by_email"
+        ) as session:
             query = select(AdminModel).where(AdminModel.email == email)
             return await session.scalar(query)
 
@@ -32,7 +34,9 @@ class AdminAccessor(BaseAccessor):
         stmt = insert(AdminModel).values(admin_data)
         stmt = stmt.on_conflict_do_nothing(index_elements=["email"])
 
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="AdminAccessor.upsert_admin"
+        ) as session:
             await session.execute(stmt)
             await session.commit()
 
@@ -0,0 +1,172 @@
+import asyncio
+import typing
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from logging import getLogger
+
+import aio_pika
+
+if typing.TYPE_CHECKING:
+    from app.web.config import AmqpConfig
+
+# Брокер в памяти процесса вместо RabbitMQ - для тестов и бенчмарков
+IN_MEMORY_URL = "memory://"
+
+
+def get_queue_name(exchange: str, partition: int) -> str:
+    return f"{exchange}.{partition}"
+
+
+class Delivery(ABC):
+    """Полученное из брокера сообщение, которое нужно подтвердить после обработки"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    @abstractmethod
+    async def ack(self) -> None:
+        """Подтверждает обработку, брокер больше не отдаст сообщение"""
+
+
+class BaseBroker(ABC):
+    """Апдейты раскладываются по партициям: партиция = peer_id % partitions,
+    у каждой партиции своя очередь. Партицию разбирает один воркер,
+    поэтому сообщения одной беседы обрабатываются по порядку.
+    """
+
+    def __init__(self, config: "AmqpConfig"):
+        self.config = config
+        self.logger = getLogger(__name__)
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Подключается к брокеру и готовит очереди партиций"""
+
+    async def close(self) -> None:  # noqa: B027 не у всех брокеров есть соединение
+        pass
+
+    @abstractmethod
+    async def publish(self, partition: int, body: bytes) -> None:
+        """Отправляет сообщение в очередь партиции"""
+
+    @abstractmethod
+    def consume(self, partition: int) -> AsyncIterator[Delivery]:
+        """Сообщения очереди партиции, по одному, не больше prefetch
+        неподтвержденных на воркер
+        """
+
+
+class InMemoryDelivery(Delivery):
+    def __init__(self, body: bytes, prefetch: asyncio.Semaphore):
+        super().__init__(body)
+        self._prefetch = prefetch
+        self._acked = False
+
+    async def ack(self) -> None:
+        if not self._acked:
+            self._acked = True
+            self._prefetch.release()
+
+
+class InMemoryBroker(BaseBroker):
+    """Брокер внутри процесса, повторяющий поведение RabbitMQ,
+    которое важно боту: партиции и ограничение неподтвержденных сообщений
+    """
+
+    def __init__(
+        self,
+        config: "AmqpConfig",
+        queues: dict[int, asyncio.Queue[bytes]] | None = None,
+    ):
+        """Брокер в памяти процесса
+        :param queues: очереди партиций другого InMemoryBroker, чтобы
+        несколько воркеров внутри процесса разбирали один брокер
+        """
+        super().__init__(config)
+        self.queues: dict[int, asyncio.Queue[bytes]] = (
+            queues if queues is not None else defaultdict(asyncio.Queue)
+        )
+        self._prefetch: asyncio.Semaphore | None = None
+
+    async def connect(self) -> None:
+        # Как и prefetch_count канала с global_=True - общий лимит
+        # на все очереди воркера
+        self._prefetch = asyncio.Semaphore(self.config.prefetch)
+
+    async def publish(self, partition: int, body: bytes) -> None:
+        self.queues[partition].put_nowait(body)
+
+    async def consume(self, partition: int) -> AsyncIterator[Delivery]:
+        queue = self.queues[partition]
+        while True:
+            # Сначала ждем сообщение, потом место в prefetch, иначе пустые
+            # партиции заняли бы весь лимит
+            body = await queue.get()
+            await self._prefetch.acquire()
+            yield InMemoryDelivery(body, self._prefetch)
+
+
+class AmqpDelivery(Delivery):
+    def __init__(self, message: aio_pika.abc.AbstractIncomingMessage):
+        super().__init__(message.body)
+        self._message = message
+
+    async def ack(self) -> None:
+        await self._message.ack()
+
+
+class AmqpBroker(BaseBroker):
+    """Брокер поверх RabbitMQ: direct exchange, по очереди на партицию"""
+
+    def __init__(self, config: "AmqpConfig"):
+        super().__init__(config)
+        self.connection: aio_pika.abc.AbstractRobustConnection | None = None
+        self.channel: aio_pika.abc.AbstractChannel | None = None
+        self.exchange: aio_pika.abc.AbstractExchange | None = None
+
+    async def connect(self) -> None:
+        self.logger.info("Подключаемся к брокеру %s", self.config.exchange)
+        self.connection = await aio_pika.connect_robust(self.config.url)
+        self.channel = await self.connection.channel()
+        # global_=True - лимит на весь канал, то есть на все партиции воркера.
+        # По умолчанию RabbitMQ считает его на каждого консьюмера,
+        # и воркер с N партициями получил бы prefetch * N апдейтов
+        await self.channel.set_qos(prefetch_count=self.config.prefetch, global_=True)
+
+        self.exchange = await self.channel.declare_exchange(
+            self.config.exchange, aio_pika.ExchangeType.DIRECT, durable=True
+        )
+        for partition in range(self.config.partitions):
+            queue = await self.channel.declare_queue(
+                get_queue_name(self.config.exchange, partition),
+                durable=True,
+                # Если воркеры ошибочно подпишутся на одну партицию,
+                # сообщения все равно получит только один из них
+                arguments={"x-single-active-consumer": True},
+            )
+            await queue.bind(self.exchange, routing_key=str(partition))
+
+    async def close(self) -> None:
+        if self.connection:
+            await self.connection.close()
+
+    async def publish(self, partition: int, body: bytes) -> None:
+        await self.exchange.publish(
+            aio_pika.Message(body, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+            routing_key=str(partition),
+        )
+
+    async def consume(self, partition: int) -> AsyncIterator[Delivery]:
+        queue = await self.channel.get_queue(
+            get_queue_name(self.config.exchange, partition)
+        )
+        async with queue.iterator() as messages:
+            async for message in messages:
+                yield AmqpDelivery(message)
+
+
+def create_broker(config: "AmqpConfig") -> BaseBroker:
+    if config.url.startswith(IN_MEMORY_URL):
+        return InMemoryBroker(config)
+    return AmqpBroker(config)
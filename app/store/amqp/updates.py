@@ -0,0 +1,119 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from logging import getLogger
+
+from app.store.amqp.broker import BaseBroker, Delivery
+from app.store.vk_api.dataclasses import EventUpdate, MessageUpdate
+from app.store.vk_api.decoder import decode_update, encode_update
+from app.store.vk_api.dispatcher import UpdateDispatcher
+
+
+@dataclass
+class AmqpStats:
+    published: int = 0
+    consumed: int = 0
+    acked: int = 0
+    skipped: int = 0
+
+
+def get_partition(peer_id: int, partitions: int) -> int:
+    return peer_id % partitions
+
+
+class UpdatePublisher:
+    """Процесс приема: вместо локальной обработки отправляет апдейты в брокер,
+    в партицию по peer_id беседы
+    """
+
+    def __init__(self, broker: BaseBroker):
+        self.broker = broker
+        self.partitions = broker.config.partitions
+        self.stats = AmqpStats()
+
+    async def put(self, update: MessageUpdate | EventUpdate) -> None:
+        peer_id = UpdateDispatcher.get_peer_id(update)
+        await self.broker.publish(
+            get_partition(peer_id, self.partitions), encode_update(update)
+        )
+        self.stats.published += 1
+
+    def get_stats(self) -> dict:
+        return {"role": "publisher", "published": self.stats.published}
+
+
+class UpdateConsumer:
+    """Процесс обработки: забирает апдейты своих партиций из брокера
+    и отдает их в шарды диспетчера. Сообщение подтверждается только после
+    того, как BotManager его обработал, поэтому брокер держит у воркера
+    не больше prefetch необработанных апдейтов, а при падении воркера
+    неподтвержденные апдейты достанутся другому.
+    """
+
+    def __init__(self, broker: BaseBroker, dispatcher: UpdateDispatcher):
+        self.broker = broker
+        self.dispatcher = dispatcher
+        self.logger = getLogger(__name__)
+        self.stats = AmqpStats()
+        self.partitions = [
+            partition
+            for partition in range(broker.config.partitions)
+            if partition % broker.config.workers_count == broker.config.worker_index
+        ]
+
+        self._consumers: list[asyncio.Task] = []
+        self._acks: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self.logger.info("Разбираем партиции %s", self.partitions)
+        self._consumers = [
+            asyncio.create_task(self._consume(partition), name=f"consume_{partition}")
+            for partition in self.partitions
+        ]
+
+    async def stop(self) -> None:
+        """Прекращает прием новых апдейтов, уже принятые дорабатывает диспетчер"""
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    async def wait_acks(self) -> None:
+        """Дожидается подтверждения уже обработанных апдейтов"""
+        await asyncio.gather(*self._acks, return_exceptions=True)
+
+    async def _consume(self, partition: int) -> None:
+        async for delivery in self.broker.consume(partition):
+            self.stats.consumed += 1
+            try:
+                update = decode_update(json.loads(delivery.body))
+            except (ValueError, KeyError, TypeError):
+                self.logger.exception("Не удалось разобрать апдейт из брокера")
+                update = None
+
+            if update is None:
+                self.stats.skipped += 1
+                await delivery.ack()
+                continue
+
+            # Апдейты партиции ставятся в очередь строго по одному,
+            # поэтому порядок сообщений беседы сохраняется
+            done = await self.dispatcher.submit(update)
+            task = asyncio.create_task(self._ack_when_done(delivery, done))
+            self._acks.add(task)
+            task.add_done_callback(self._acks.discard)
+
+    async def _ack_when_done(self, delivery: Delivery, done: asyncio.Future) -> None:
+        await done
+        await delivery.ack()
+        self.stats.acked += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "role": "worker",
+            "partitions": self.partitions,
+            "consumed": self.stats.consumed,
+            "acked": self.stats.acked,
+            "skipped": self.stats.skipped,
+            "in_flight": len(self._acks),
+        }
@@ -1,4 +1,4 @@
-from collections.abc import Sequence
+from collections.abc import AsyncGenerator, Iterable
 from typing import TYPE_CHECKING
 
 import sqlalchemy.exc
@@ -8,20 +8,53 @@ from aiohttp.web_exceptions import (
     HTTPNotFound,
     HTTPServiceUnavailable,
 )
-from sqlalchemy import delete, func, update
+from sqlalchemy import delete, func, insert, update
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 
 from app.base.base_accessor import BaseAccessor
 from app.blitz.models import GameBlitzQuestion, GameBlitzTheme
 from app.games.blitz.constants import BlitzGameStage
-from app.games.blitz.models import BlitzGame
+from app.games.blitz.models import (
+    BlitzGame,
+    BlitzPlayerQuestionGame,
+    GameBlitzPlayer,
+)
+from app.store.database.export import stream_rows
+from app.store.database.pagination import Page, paginate
+from app.store.question_bank.bulk_import import (
+    BlitzImportRow,
+    ImportResult,
+    RowError,
+    validate_blitz_rows,
+)
+from app.store.question_bank.cache import (
+    BlitzQuestionEntry,
+    QuestionBank,
+    QuestionBankCache,
+)
 
 if TYPE_CHECKING:
     from app.web.app import Application
 
 
 class BlitzAccessor(BaseAccessor):
+    EXPORT_COLUMNS = (
+        "game_id",
+        "conversation_id",
+        "game_stage",
+        "theme_id",
+        "vk_user_id",
+        "player_name",
+        "correct_answers",
+    )
+
+    def __init__(self, app: "Application", *args, **kwargs):
+        super().__init__(app, *args, **kwargs)
+        self.question_bank: QuestionBankCache[BlitzQuestionEntry] = QuestionBankCache(
+            self._load_question_bank
+        )
+
     async def connect(self, app: "Application") -> None:
         self.logger.info("Подключаем BlitzAccessor")
 
@@ -43,7 +76,9 @@ class BlitzAccessor(BaseAccessor):
     async def create_theme(
         self, title: str, description: str | None = None
     ) -> GameBlitzTheme:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.create_theme"
+        ) as session:
             theme = GameBlitzTheme(title=title, description=description)
             self.logger.info("Добавляем в базу данных %s", theme)
 
@@ -62,7 +97,9 @@ class BlitzAccessor(BaseAccessor):
             return theme
 
     async def get_theme_by_title(self, title: str) -> GameBlitzTheme | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_theme_by_title"
+        ) as session:
             title = await session.execute(
                 select(GameBlitzTheme).where(GameBlitzTheme.title == title)
             )
@@ -70,7 +107,9 @@ class BlitzAccessor(BaseAccessor):
         return title.scalar_one_or_none()
 
     async def get_theme_by_id(self, id_: int) -> GameBlitzTheme | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_theme_by_id"
+        ) as session:
             theme = await session.execute(
                 select(GameBlitzTheme).where(GameBlitzTheme.id == int(id_))
             )
@@ -78,22 +117,19 @@ class BlitzAccessor(BaseAccessor):
         return theme.scalar_one_or_none()
 
     async def get_themes_list(
-        self, limit: int | None = None, offset: int | None = None
-    ) -> Sequence[GameBlitzTheme]:
-        async with self.app.database.session() as session:
-            stmt = select(GameBlitzTheme)
-
-            if limit is not None:
-                stmt = stmt.limit(limit)
-            if offset is not None:
-                stmt = stmt.offset(offset)
-
-            result = await session.execute(stmt)
-
-        return result.scalars().all()
+        self, cursor: str | None = None, limit: int | None = None
+    ) -> Page[GameBlitzTheme]:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_themes_list"
+        ) as session:
+            return await paginate(
+                session, select(GameBlitzTheme), GameBlitzTheme.id, cursor, limit
+            )
 
     async def delete_theme_by_id(self, id_: int) -> GameBlitzTheme | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.delete_theme_by_id"
+        ) as session:
             theme = await session.get(GameBlitzTheme, id_)
 
             if theme is None:
@@ -105,12 +141,16 @@ class BlitzAccessor(BaseAccessor):
                 raise HTTPConflict(
                     reason="Нельзя удалить т.к. существуют" " вопросы принадлежащие теме"
                 ) from exc
+
+        self.question_bank.invalidate(theme.id)
         return theme
 
     async def create_question(
         self, title: str, theme_id: int, answer: str
     ) -> GameBlitzQuestion:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.create_question"
+        ) as session:
             question = GameBlitzQuestion(title=title, theme_id=theme_id, answer=answer)
 
             try:
@@ -125,10 +165,72 @@ class BlitzAccessor(BaseAccessor):
                 self.logger.exception(exc_info=exc, msg=exc)
                 raise HTTPServiceUnavailable from exc
 
+        self.question_bank.invalidate(theme_id)
         return question
 
+    async def import_questions(
+        self, rows: list[BlitzImportRow], errors: list[RowError] | None = None
+    ) -> ImportResult:
+        """Массовое добавление вопросов одной транзакцией многострочными INSERT.
+        Вопросы проверяются все сразу, и при любой ошибке не пишется ничего
+        :param errors: ошибки разбора файла, их строки уже не попали в rows
+        """
+        errors = [
+            *(errors or ()),
+            *validate_blitz_rows(rows, await self._get_theme_ids(rows)),
+        ]
+        if errors:
+            return ImportResult(errors=sorted(errors, key=lambda error: error.row))
+        if not rows:
+            return ImportResult()
+
+        async with self.app.database.session(
+            label="BlitzAccessor.import_questions"
+        ) as session:
+            try:
+                await session.execute(
+                    insert(GameBlitzQuestion),
+                    [
+                        {
+                            "title": row.title,
+                            "theme_id": row.theme_id,
+                            "answer": row.answer,
+                        }
+                        for row in rows
+                    ],
+                )
+                await session.commit()
+
+            except sqlalchemy.exc.IntegrityError as exc:
+                self.logger.exception(exc_info=exc, msg=exc)
+                raise HTTPBadRequest(reason="не удалось импортировать вопросы") from exc
+
+            except sqlalchemy.exc.InterfaceError as exc:
+                self.logger.exception(exc_info=exc, msg=exc)
+                raise HTTPServiceUnavailable from exc
+
+        self.logger.info("Импортировано %s вопросов блица", len(rows))
+        self.question_bank.invalidate(*{row.theme_id for row in rows})
+        return ImportResult(imported=len(rows))
+
+    async def _get_theme_ids(self, rows: Iterable[BlitzImportRow]) -> set[int]:
+        """Какие из тем строк импорта существуют"""
+        theme_ids = {row.theme_id for row in rows}
+        if not theme_ids:
+            return set()
+
+        async with self.app.database.session(
+            label="BlitzAccessor._get_theme_ids"
+        ) as session:
+            existing = await session.scalars(
+                select(GameBlitzTheme.id).where(GameBlitzTheme.id.in_(theme_ids))
+            )
+        return set(existing.all())
+
     async def get_question_by_id(self, id_: int) -> GameBlitzQuestion | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_question_by_id"
+        ) as session:
             result = await session.execute(
                 select(GameBlitzQuestion).where(GameBlitzQuestion.id == id_)
             )
@@ -138,15 +240,17 @@ class BlitzAccessor(BaseAccessor):
     async def get_question_by_title(self, title: str) -> GameBlitzQuestion | None:
         stmt = select(GameBlitzQuestion).where(GameBlitzQuestion.title == title)
 
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_question_by_title"
+        ) as session:
             return await session.scalar(stmt)
 
     async def get_questions_list(
         self,
         theme_id: int | str | None = None,
-        offset: int | None = None,
+        cursor: str | None = None,
         limit: int | None = None,
-    ) -> Sequence[GameBlitzQuestion]:
+    ) -> Page[GameBlitzQuestion]:
         if theme_id is None:
             raise HTTPBadRequest(reason="Theme id is None")
 
@@ -154,23 +258,51 @@ class BlitzAccessor(BaseAccessor):
             GameBlitzQuestion.theme_id == int(theme_id)
         )
 
-        if limit:
-            stmt = stmt.limit(limit)
-        if offset:
-            stmt = stmt.offset(offset)
+        async with self.app.database.session(
+            label="BlitzAccessor.get_questions_list"
+        ) as session:
+            page = await paginate(session, stmt, GameBlitzQuestion.id, cursor, limit)
 
-        async with self.app.database.session() as session:
-            questions = await session.scalars(stmt)
+        if not page.items and not cursor:
+            raise HTTPNotFound(reason=f"Вопросы теме: [{theme_id}] отсутствуют")
 
-        questions = questions.unique().all()
+        return page
 
-        if len(questions) == 0:
+    async def get_question_bank(self, theme_id: int | str) -> QuestionBank:
+        """Вопросы темы для игры: из кэша, без обращения к БД"""
+        bank = await self.question_bank.get(int(theme_id))
+
+        if len(bank.questions) == 0:
             raise HTTPNotFound(reason=f"Вопросы теме: [{theme_id}] отсутствуют")
 
-        return questions
+        return bank
+
+    async def _load_question_bank(
+        self, theme_id: int | None
+    ) -> tuple[BlitzQuestionEntry, ...]:
+        stmt = select(GameBlitzQuestion).order_by(GameBlitzQuestion.id)
+        if theme_id is not None:
+            stmt = stmt.where(GameBlitzQuestion.theme_id == theme_id)
+
+        async with self.app.database.session(
+            label="BlitzAccessor._load_question_bank"
+        ) as session:
+            questions = await session.scalars(stmt)
+
+        return tuple(
+            BlitzQuestionEntry(
+                id=question.id,
+                title=question.title,
+                answer=question.answer,
+                theme_id=question.theme_id,
+            )
+            for question in questions
+        )
 
     async def get_questions_count(self, theme_id: int | None = None) -> int:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_questions_count"
+        ) as session:
             try:
                 if theme_id is None:
                     count_query = select(func.count()).select_from(GameBlitzQuestion)
@@ -189,7 +321,9 @@ class BlitzAccessor(BaseAccessor):
             return result.scalar()
 
     async def delete_question_by_id(self, id_: int) -> GameBlitzQuestion | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.delete_question_by_id"
+        ) as session:
             try:
                 question = (
                     await session.execute(
@@ -219,6 +353,7 @@ class BlitzAccessor(BaseAccessor):
 
             else:
                 self.logger.info("Вопрос с %s успешно удален", question.id)
+                self.question_bank.invalidate(question.theme_id)
                 return question
 
     async def update_question(
@@ -228,7 +363,9 @@ class BlitzAccessor(BaseAccessor):
         new_theme_id: int | None,
         new_answer: str | None,
     ):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.update_question"
+        ) as session:
             try:
                 stmt = select(GameBlitzQuestion).where(
                     GameBlitzQuestion.id == question_id
@@ -239,6 +376,7 @@ class BlitzAccessor(BaseAccessor):
                 if not question:
                     raise HTTPBadRequest(reason="Вопрос не найден")
 
+                theme_id = question.theme_id
                 stmt = update(GameBlitzQuestion).where(
                     GameBlitzQuestion.id == question_id
                 )
@@ -268,6 +406,9 @@ class BlitzAccessor(BaseAccessor):
                 await session.rollback()  # Откатываем транзакцию перед повторной попыткой
                 raise HTTPServiceUnavailable from exc
 
+        # Вопрос мог переехать в другую тему - сбрасываем обе
+        self.question_bank.invalidate(theme_id, new_theme_id)
+
     async def add_game(
         self,
         conversation_id: int,
@@ -275,7 +416,7 @@ class BlitzAccessor(BaseAccessor):
         theme_id: int = 1,
         admin_game_id: int | None = None,
     ) -> BlitzGame | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(label="BlitzAccessor.add_game") as session:
             stmt = (
                 select(BlitzGame)
                 .where(BlitzGame.conversation_id == conversation_id)
@@ -301,7 +442,9 @@ class BlitzAccessor(BaseAccessor):
         return game
 
     async def change_state(self, game_id: int, new_state: BlitzGameStage) -> BlitzGame:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.change_state"
+        ) as session:
             try:
                 stmt = (
                     update(BlitzGame)
@@ -329,7 +472,9 @@ class BlitzAccessor(BaseAccessor):
         self,
         game_id: int,
     ) -> BlitzGame:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="BlitzAccessor.get_game_by_id"
+        ) as session:
             stmt = (
                 select(BlitzGame)
                 .where(BlitzGame.id == game_id)
@@ -345,33 +490,54 @@ class BlitzAccessor(BaseAccessor):
 
     async def get_games_by_state(
         self,
+        cursor: str | None = None,
         limit: int | None = None,
-        offset: int | None = None,
         state: BlitzGameStage = None,
-    ):
-        async with self.app.database.session() as session:
-            stmt = select(BlitzGame).where(BlitzGame.game_stage == state)
-            if limit:
-                stmt = stmt.limit(limit)
-
-            if offset:
-                stmt = stmt.offset(offset)
-
-            result = await session.execute(stmt)
-        return result.unique().scalars().all()
-
-    async def get_active_games(self, limit: int | None = None, offset: int | None = None):
-        async with self.app.database.session() as session:
-            stmt = select(BlitzGame).where(
-                BlitzGame.game_stage.in_(
-                    [BlitzGameStage.WAITING_ANSWER, BlitzGameStage.PAUSE]
-                )
+    ) -> Page[BlitzGame]:
+        stmt = select(BlitzGame).where(BlitzGame.game_stage == state)
+
+        async with self.app.database.session(
+            label="BlitzAccessor.get_games_by_state"
+        ) as session:
+            return await paginate(session, stmt, BlitzGame.id, cursor, limit)
+
+    async def get_active_games(
+        self, cursor: str | None = None, limit: int | None = None
+    ) -> Page[BlitzGame]:
+        stmt = select(BlitzGame).where(
+            BlitzGame.game_stage.in_(
+                [BlitzGameStage.WAITING_ANSWER, BlitzGameStage.PAUSE]
             )
-            if limit:
-                stmt = stmt.limit(limit)
+        )
 
-            if offset:
-                stmt = stmt.offset(offset)
+        async with self.app.database.session(
+            label="BlitzAccessor.get_active_games"
+        ) as session:
+            return await paginate(session, stmt, BlitzGame.id, cursor, limit)
+
+    def stream_games_results(self) -> AsyncGenerator[dict]:
+        """Результаты блиц-игр для выгрузки: строка на игрока в игре
+        с кол-вом угаданных вопросов, для игр без ответов - одна строка
+        с пустым игроком
+        """
+        stmt = (
+            select(
+                BlitzGame.id.label("game_id"),
+                BlitzGame.conversation_id,
+                BlitzGame.game_stage,
+                BlitzGame.theme_id,
+                GameBlitzPlayer.vk_user_id,
+                GameBlitzPlayer.name.label("player_name"),
+                func.count(BlitzPlayerQuestionGame.id).label("correct_answers"),
+            )
+            .outerjoin(
+                BlitzPlayerQuestionGame, BlitzPlayerQuestionGame.game_id == BlitzGame.id
+            )
+            .outerjoin(
+                GameBlitzPlayer, BlitzPlayerQuestionGame.player_id == GameBlitzPlayer.id
+            )
+            .group_by(BlitzGame.id, GameBlitzPlayer.id)
+            .order_by(BlitzGame.id, GameBlitzPlayer.id)
+        )
 
-            result = await session.execute(stmt)
-        return result.unique().scalars().all()
+        return stream_rows(self.app.database, stmt, "BlitzAccessor.stream_games_results")
@@ -1,3 +1,4 @@
+import time
 from logging import getLogger
 from typing import TYPE_CHECKING, Any
 
@@ -9,12 +10,42 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 
+from app.metrics.metrics import DB_POOL_CONNECTIONS, DB_SESSION_SECONDS
+from app.metrics.tracing import TRACER
+from app.store.database.pool import TimedQueuePool
 from app.store.database.sqlalchemy_base import BaseModel
 
 if TYPE_CHECKING:
     from app.web.app import Application
 
 
+class TimedAsyncSession(AsyncSession):
+    """Сессия, которая пишет в метрики и в трассу апдейта время от входа
+    в async with до выхода.
+    Метка передается при открытии: database.session(label="QuizAccessor.get_theme_by_id"),
+    так время БД видно по методам аксессоров.
+    """
+
+    def __init__(self, *args: Any, label: str = "session", **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._metrics_label = label
+
+    async def __aenter__(self) -> "TimedAsyncSession":
+        self._started_at = time.perf_counter()
+        self._span = TRACER.span(f"db {self._metrics_label}")
+        self._span.__enter__()
+        return await super().__aenter__()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        try:
+            await super().__aexit__(*exc_info)
+        finally:
+            self._span.__exit__(*exc_info)
+            DB_SESSION_SECONDS.observe(
+                time.perf_counter() - self._started_at, self._metrics_label
+            )
+
+
 class Database:
     def __init__(self, app: "Application") -> None:
         self.app = app
@@ -25,22 +56,55 @@ class Database:
         self.session: async_sessionmaker[AsyncSession] | None = None
 
     async def connect(self, *args: Any, **kwargs: Any) -> None:
-        host: str = self.app.config.database.host
-        port: int = self.app.config.database.port
-        user: str = self.app.config.database.user
-        password: str = self.app.config.database.password
-        database: str = self.app.config.database.database
+        config = self.app.config.database
+        host: str = config.host
+        port: int = config.port
+        user: str = config.user
+        password: str = config.password
+        database: str = config.database
 
         self.engine = create_async_engine(
             url=f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{database}",
             echo=False,
             future=True,
+            poolclass=TimedQueuePool,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+            pool_pre_ping=config.pool_pre_ping,
+            connect_args={
+                "command_timeout": config.command_timeout,
+                # Кэш подготовленных запросов SQLAlchemy и самого asyncpg
+                "prepared_statement_cache_size": config.statement_cache_size,
+                "statement_cache_size": config.statement_cache_size,
+            },
+        )
+        self.logger.info(
+            "Пул соединений БД: pool_size=%s, max_overflow=%s",
+            config.pool_size,
+            config.max_overflow,
         )
+        DB_POOL_CONNECTIONS.set_function(self.get_pool_connections)
 
         self.session = async_sessionmaker(
-            bind=self.engine, class_=AsyncSession, expire_on_commit=False
+            bind=self.engine, class_=TimedAsyncSession, expire_on_commit=False
         )
 
+    def get_pool_stats(self) -> dict:
+        if self.engine is None:
+            return {}
+        return self.engine.pool.get_stats()
+
+    def get_pool_connections(self) -> dict[tuple[str], int]:
+        """Соединения пула по состояниям, в виде значений метрики DB_POOL_CONNECTIONS"""
+        stats = self.get_pool_stats()
+        return {
+            (state,): stats[state]
+            for state in ("checked_out", "checked_in", "overflow")
+            if state in stats
+        }
+
     async def disconnect(self, *args: Any, **kwargs: Any) -> None:
         try:
             self.logger.info("Отключаем БД")
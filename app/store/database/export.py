@@ -0,0 +1,25 @@
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Select
+
+if TYPE_CHECKING:
+    from app.store.database.database import Database
+
+# Сколько строк серверный курсор отдает за одно обращение к базе
+EXPORT_BATCH_SIZE = 1000
+
+
+async def stream_rows(
+    database: "Database", stmt: Select, label: str
+) -> AsyncGenerator[dict]:
+    """Строки выборки по одной через серверный курсор: в памяти
+    держится не больше EXPORT_BATCH_SIZE строк, сколько бы их ни было.
+    Сессия открыта, пока выгрузка не дочитана или не прервана
+    :param label: метка сессии в метриках и трассе, обычно метод аксессора
+    """
+    stmt = stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+    async with database.session(label=label) as session:
+        result = await session.stream(stmt)
+        async for row in result.mappings():
+            yield dict(row)
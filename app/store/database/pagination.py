@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from aiohttp.web_exceptions import HTTPBadRequest
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+T = TypeVar("T")
+
+# Размер страницы, если limit не указан
+DEFAULT_PAGE_SIZE = 100
+
+
+@dataclass(slots=True)
+class Page(Generic[T]):
+    """Страница списка
+    next_cursor - курсор следующей страницы, None - страница последняя
+    """
+
+    items: Sequence[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(*values: int | str) -> str:
+    """Курсор - значения ключа сортировки последней строки страницы,
+    для клиента это непрозрачная строка
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """Значения ключа сортировки из курсора
+    :param cursor: курсор из запроса
+    :param types: типы значений курсора по порядку
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPBadRequest(reason="Неверный cursor") from None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(map(isinstance, values, types))
+    ):
+        raise HTTPBadRequest(reason="Неверный cursor")
+    return values
+
+
+async def paginate(
+    session: AsyncSession,
+    stmt: Select,
+    key: InstrumentedAttribute,
+    cursor: str | None = None,
+    limit: int | str | None = None,
+    descending: bool = False,
+) -> Page:
+    """Страница выборки по ключу: WHERE key > курсор ORDER BY key LIMIT n.
+    В отличие от OFFSET, база не перебирает строки предыдущих страниц,
+    поэтому любая страница стоит столько же, сколько первая.
+    :param stmt: выборка с фильтрами, без ORDER BY и LIMIT: модель
+    (на странице объекты) или столбцы (на странице строки Row)
+    :param key: уникальный целочисленный столбец сортировки, обычно id
+    :param descending: листать от больших значений ключа к меньшим
+    """
+    limit = int(limit or DEFAULT_PAGE_SIZE)
+    if cursor:
+        (last,) = decode_cursor(cursor, int)
+        stmt = stmt.where(key < last if descending else key > last)
+
+    stmt = stmt.order_by(key.desc() if descending else key).limit(limit + 1)
+    result = (await session.execute(stmt)).unique()
+    if len(stmt.column_descriptions) == 1:
+        result = result.scalars()
+    rows = result.all()
+
+    page = Page(items=rows[:limit])
+    if len(rows) > limit:
+        page.next_cursor = encode_cursor(getattr(page.items[-1], key.key))
+    return page
+
+
+async def iter_pages(
+    fetch: Callable[..., Awaitable[Page[T]]], **kwargs
+) -> AsyncIterator[T]:
+    """Все строки списка, страница за страницей
+    :param fetch: метод аксессора, возвращающий Page и принимающий cursor
+    """
+    cursor = None
+    while True:
+        page = await fetch(cursor=cursor, **kwargs)
+        for item in page.items:
+            yield item
+        cursor = page.next_cursor
+        if cursor is None:
+            return
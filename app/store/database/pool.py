@@ -0,0 +1,68 @@
+import time
+from dataclasses import dataclass
+
+import sqlalchemy.exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from app.metrics.metrics import DB_POOL_WAIT_SECONDS
+
+
+@dataclass
+class PoolStats:
+    """Счетчики выдачи соединений из пула
+    checkouts - выдано соединений
+    timeouts - запросы, не дождавшиеся соединения за pool_timeout
+    wait_total / wait_max - суммарное и максимальное ожидание соединения, сек
+    """
+
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений asyncpg, который считает, сколько сессии ждут соединение.
+    Когда заняты pool_size + max_overflow соединений, следующая сессия ждет
+    в очереди пула - это ожидание и показывает, что пул мал для нагрузки.
+    Время меряется вокруг публичного connect (в него входит и pre_ping):
+    у пула нет события начала выдачи, а внутренние методы QueuePool
+    меняются между версиями SQLAlchemy.
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.stats = PoolStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except sqlalchemy.exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+
+        wait = time.perf_counter() - started_at
+        self.stats.checkouts += 1
+        self.stats.wait_total += wait
+        self.stats.wait_max = max(self.stats.wait_max, wait)
+        DB_POOL_WAIT_SECONDS.observe(wait)
+        return connection
+
+    def get_stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self.max_overflow,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": self.stats.checkouts,
+            "timeouts": self.stats.timeouts,
+            "avg_wait": (
+                self.stats.wait_total / self.stats.checkouts
+                if self.stats.checkouts
+                else 0.0
+            ),
+            "max_wait": self.stats.wait_max,
+        }
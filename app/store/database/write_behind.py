@@ -0,0 +1,126 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+# Метка в очереди: записать накопленное, не дожидаясь flush_interval
+_FLUSH = object()
+
+
+@dataclass
+class WriteBehindStats:
+    """Счетчики отложенной записи
+    written - записано строк
+    batches - кол-во записей в БД
+    failed - строки, которые не удалось записать
+    blocked - вызовы put, ждавшие места в переполненном буфере
+    """
+
+    written: int = 0
+    batches: int = 0
+    failed: int = 0
+    blocked: int = 0
+
+
+class WriteBehindBuffer(Generic[T]):
+    """Буфер отложенной записи в БД.
+    Строки копятся в очереди и пишутся одной пачкой, когда набралось
+    batch_size строк или прошло flush_interval секунд с первой строки пачки.
+    Пачки пишутся по одной, поэтому если БД не успевает, очередь
+    заполняется и put ждет свободного места - обработка апдейтов
+    притормаживает, а не копит строки в памяти без ограничений.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[T]], Awaitable[None]],
+        batch_size: int,
+        flush_interval: float,
+        max_size: int,
+    ):
+        """Буфер отложенной записи
+        :param write: корутина, записывающая пачку строк
+        :param batch_size: максимум строк в одной записи
+        :param flush_interval: сколько секунд копить строки перед записью
+        :param max_size: максимум строк в буфере, дальше put ждет
+        """
+        self.logger = getLogger(__name__)
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.stats = WriteBehindStats()
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._task: asyncio.Task | None = None
+
+    async def put(self, item: T) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+        if self._queue.full():
+            self.stats.blocked += 1
+        await self._queue.put(item)
+
+    async def close(self) -> None:
+        """Дописывает все строки из буфера"""
+        if self._task is None:
+            return
+
+        await self._queue.put(_FLUSH)
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_size": self.max_size,
+            "written": self.stats.written,
+            "batches": self.stats.batches,
+            "failed": self.stats.failed,
+            "blocked": self.stats.blocked,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    try:
+                        async with asyncio.timeout_at(deadline):
+                            item = await self._queue.get()
+                    except TimeoutError:
+                        break
+
+                if item is _FLUSH:
+                    self._queue.task_done()
+                    break
+
+                batch.append(item)
+                if deadline is None:
+                    deadline = loop.time() + self.flush_interval
+
+            if batch:
+                await self._write_batch(batch)
+
+    async def _write_batch(self, batch: list[T]) -> None:
+        try:
+            await self._write(batch)
+        except Exception:
+            self.stats.failed += len(batch)
+            self.logger.exception("Не удалось записать пачку из %s строк", len(batch))
+        else:
+            self.stats.written += len(batch)
+            self.stats.batches += 1
+        finally:
+            for _ in batch:
+                self._queue.task_done()
@@ -1,12 +1,13 @@
 import typing
-from collections.abc import Sequence
+from collections.abc import AsyncGenerator, Iterable, Sequence
+from typing import Any
 
 import sqlalchemy
 from aiohttp.web_exceptions import HTTPBadRequest, HTTPNotFound
 from asyncpg import UniqueViolationError
-from sqlalchemy import desc, func, select, update
+from sqlalchemy import Row, Select, and_, desc, func, select, true, update
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.base.base_accessor import BaseAccessor
 from app.games.game_100.constants import GameStage
@@ -17,12 +18,24 @@ from app.games.game_100.models import (
     PlayerAnswerGame,
 )
 from app.quiz.models import Answer, Question
+from app.store.database.export import stream_rows
+from app.store.database.pagination import Page, paginate
+from app.store.question_bank.sampler import QuestionSampler
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
 
 
 class GameAccessor(BaseAccessor):
+    EXPORT_COLUMNS = (
+        "game_id",
+        "conversation_id",
+        "state",
+        "vk_user_id",
+        "player_name",
+        "score",
+    )
+
     def __init__(self, app, *args, **kwargs):
         self.app = app
         super().__init__(app, *args, **kwargs)
@@ -35,23 +48,25 @@ class GameAccessor(BaseAccessor):
             "finished": GameStage.FINISHED,
             "canceled": GameStage.CANCELED,
         }
+        self.question_sampler = QuestionSampler()
 
     async def add_game(
         self,
         peer_id: int,
     ) -> Game | None:
-        async with self.app.database.session() as session:
-            stmt = select(Question).order_by(func.random()).limit(1)
-            result = await session.execute(stmt)
-            question = result.scalar_one_or_none()
-            if question is None:
-                # выбросить кастомное исключение
-                self.logger.error("В Базе данных отсутствует хотябы один вопрос!")
-                return None
-
+        # Случайный вопрос выбирается из кэша, а не ORDER BY random() по таблице,
+        # недавние вопросы беседы по возможности не повторяются
+        question_ids = await self.app.store.quizzes.question_ids.get()
+        if not question_ids.questions:
+            # выбросить кастомное исключение
+            self.logger.error("В Базе данных отсутствует хотябы один вопрос!")
+            return None
+
+        question_id = self.question_sampler.choose(question_ids.questions, peer_id)
+        async with self.app.database.session(label="GameAccessor.add_game") as session:
             game = Game(
                 conversation_id=peer_id,
-                question=question,
+                question_id=question_id,
                 state=GameStage.WAIT_INIT,
             )
             session.add(game)
@@ -60,7 +75,9 @@ class GameAccessor(BaseAccessor):
         return game
 
     async def change_pinned_message(self, game_id: int, id_pinned_message: int):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameAccessor.change_pinned_message"
+        ) as session:
             stmt = (
                 update(Game)
                 .where(Game.id == game_id)
@@ -84,7 +101,7 @@ class GameAccessor(BaseAccessor):
 
     async def add_player(self, game_id: int, vk_user_id: int, name: str):
         player = Player(game_id=game_id, vk_user_id=vk_user_id, name=name)
-        async with self.app.database.session() as session:
+        async with self.app.database.session(label="GameAccessor.add_player") as session:
             try:
                 session.add(player)
                 await session.commit()
@@ -109,13 +126,17 @@ class GameAccessor(BaseAccessor):
             .where(Player.vk_user_id == vk_id)
             .where(Player.game_id == game_id)
         )
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameAccessor.get_player_by_vk_id_game_id"
+        ) as session:
             player = await session.execute(stmt)
 
         return player.scalar_one_or_none()
 
     async def delete_player(self, game_id: int, vk_user_id: int):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameAccessor.delete_player"
+        ) as session:
             try:
                 async with session.begin():
                     player = (
@@ -140,48 +161,50 @@ class GameAccessor(BaseAccessor):
             else:
                 return player
 
-    async def change_state(self, game_id: int, new_state: GameStage):
-        async with self.app.database.session() as session:
-            stmt = (
-                update(Game)
-                .where(Game.id == game_id)
-                .values(state=new_state)
-                .execution_options(synchronize_session="fetch")
-            )
-            await session.execute(stmt)
-
-            await session.commit()
-
-    async def change_answer_player(self, game_id: int, vk_user_id: int):
-        """Закрепить за игроком право на ответ
-        указываем vk_id пользоывателя в игре
-        :param game_id: id игры в которой принимается ответ
-        :param vk_user_id: vk id пользователя от которого ждем ответ
-        :return:
+    async def transition(
+        self,
+        game_id: int,
+        expected: GameStage | Iterable[GameStage],
+        new_state: GameStage,
+        **values: Any,
+    ) -> Game | None:
+        """Переход игры в новую стадию одним запросом
+        UPDATE ... WHERE state = expected RETURNING: вместе со стадией меняются
+        и остальные поля шага (ответчик, админ игры и т.п.).
+        Если игра уже не в ожидаемой стадии (например, кнопку успел нажать
+        другой игрок или сработал таймер), ничего не меняется.
+        :param game_id: id игры
+        :param expected: стадия (или стадии), из которой возможен переход
+        :param new_state: новая стадия
+        :param values: другие поля игры, которые меняются этим шагом
+        :return: игра после перехода или None, если переход не состоялся
         """
-        async with self.app.database.session() as session:
-            stmt = (
-                update(Game)
-                .where(Game.id == game_id)
-                .values(responsed_player_id=vk_user_id)
-                .execution_options(synchronize_session="fetch")
-            )
-            await session.execute(stmt)
+        if isinstance(expected, GameStage):
+            expected = (expected,)
+
+        stmt = (
+            update(Game)
+            .where(Game.id == game_id, Game.state.in_(expected))
+            .values(state=new_state, **values)
+            .returning(Game)
+        )
+        async with self.app.database.session(label="GameAccessor.transition") as session:
+            game = await session.scalar(stmt)
             await session.commit()
 
-    async def change_admin_game_id(self, game_id: int, vk_user_id: int):
-        async with self.app.database.session() as session:
-            stmt = (
-                update(Game)
-                .where(Game.id == game_id)
-                .values(admin_game_id=vk_user_id)
-                .execution_options(synchronize_session="fetch")
+        if game is None:
+            self.logger.info(
+                "Игра %s не перешла в %s: она уже не в стадии %s",
+                game_id,
+                new_state,
+                expected,
             )
-            await session.execute(stmt)
-            await session.commit()
+        return game
 
     async def get_game_by_peer_id(self, peer_id: int) -> Sequence[Game] | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameAccessor.get_game_by_peer_id"
+        ) as session:
             result = await session.execute(
                 select(Game)
                 .where(Game.conversation_id == peer_id)
@@ -193,18 +216,25 @@ class GameAccessor(BaseAccessor):
         return result.unique().scalar_one_or_none()
 
     async def get_game_by_id(self, id_: int):
-        async with self.app.database.session() as session:
-            result = await session.execute(
+        """Игра со всеми связями. Коллекции грузятся отдельными запросами
+        (selectinload), чтобы не перемножать их строки в одном join
+        """
+        async with self.app.database.session(
+            label="GameAccessor.get_game_by_id"
+        ) as session:
+            return await session.scalar(
                 select(Game)
                 .where(Game.id == id_)
                 .options(
-                    joinedload(Game.question).joinedload(Question.answers),
-                    joinedload(Game.players),
                     joinedload(Game.profile),
-                    joinedload(Game.player_answers_games),
+                    joinedload(Game.question).selectinload(Question.answers),
+                    selectinload(Game.players),
+                    selectinload(Game.player_answers_games).options(
+                        joinedload(PlayerAnswerGame.answer),
+                        joinedload(PlayerAnswerGame.player),
+                    ),
                 )
             )
-        return result.unique().scalar_one_or_none()
 
     async def player_add_answer_from_game(self, answer_id, player_id, game_id):
         """Функция добавления правильного ответа игрока для подсчета очков
@@ -213,7 +243,9 @@ class GameAccessor(BaseAccessor):
         :param game_id: id игры на который ответил игрок
         :return:
         """
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameAccessor.player_add_answer_from_game"
+        ) as session:
             player_answer_game = PlayerAnswerGame(
                 answer_id=answer_id, player_id=player_id, game_id=game_id
             )
@@ -222,60 +254,95 @@ class GameAccessor(BaseAccessor):
 
     async def get_games_filtered_state(
         self,
+        cursor: str | None = None,
         limit: int | None = None,
-        offset: int | None = None,
         state: str | None = None,
-    ):
-        async with self.app.database.session() as session:
-            stmt = select(Game).options(
-                joinedload(Game.question).joinedload(Question.answers),
-                joinedload(Game.players),
-                joinedload(Game.player_answers_games).joinedload(PlayerAnswerGame.answer),
-                joinedload(Game.profile),
-                joinedload(Game.player_answers_games).joinedload(PlayerAnswerGame.player),
-            )
+    ) -> Page[Row]:
+        stmt = self._games_summary()
 
-            if state:
-                try:
-                    stmt = stmt.where(Game.state == self.state_dict[state.lower()])
-                except KeyError as exc:
-                    raise HTTPBadRequest(reason="Такого статуса не существует") from exc
-
-            if limit:
-                stmt = stmt.limit(limit)
-
-            if offset:
-                stmt = stmt.offset(offset)
-
-            result = await session.execute(stmt)
-        return result.unique().scalars().all()
+        if state:
+            try:
+                stmt = stmt.where(Game.state == self.state_dict[state.lower()])
+            except KeyError as exc:
+                raise HTTPBadRequest(reason="Такого статуса не существует") from exc
+
+        async with self.app.database.session(
+            label="GameAccessor.get_games_filtered_state"
+        ) as session:
+            return await paginate(session, stmt, Game.id, cursor, limit)
+
+    async def get_active_games(
+        self, cursor: str | None = None, limit: int | None = None
+    ) -> Page[Row]:
+        stmt = self._games_summary().where(
+            Game.state.not_in([GameStage.FINISHED, GameStage.CANCELED])
+        )
 
-    async def get_active_games(self, limit: int | None = None, offset: int | None = None):
-        async with self.app.database.session() as session:
-            stmt = (
-                select(Game)
-                .where(Game.state.not_in([GameStage.FINISHED, GameStage.CANCELED]))
-                .options(
-                    joinedload(Game.question).joinedload(Question.answers),
-                    joinedload(Game.players),
-                    joinedload(Game.player_answers_games).joinedload(
-                        PlayerAnswerGame.answer
-                    ),
-                    joinedload(Game.profile),
-                    joinedload(Game.player_answers_games).joinedload(
-                        PlayerAnswerGame.player
-                    ),
-                )
+        async with self.app.database.session(
+            label="GameAccessor.get_active_games"
+        ) as session:
+            return await paginate(session, stmt, Game.id, cursor, limit)
+
+    @staticmethod
+    def _games_summary() -> Select:
+        """Сводка по играм для списков: одна строка на игру.
+        Кол-во игроков и очки считаются подзапросами по индексам game_id
+        только для игр страницы, без join вопросов, ответов и игроков,
+        которые размножают строки (игроки x ответы x ответы вопроса)
+        """
+        players_count = (
+            select(func.count(Player.id))
+            .where(Player.game_id == Game.id)
+            .scalar_subquery()
+        )
+        answers = (
+            select(
+                func.count(PlayerAnswerGame.id).label("answers_count"),
+                func.coalesce(func.sum(Answer.score), 0).label("total_score"),
             )
+            .join(Answer, PlayerAnswerGame.answer_id == Answer.id)
+            .where(PlayerAnswerGame.game_id == Game.id)
+            .lateral()
+        )
 
-            if limit:
-                stmt = stmt.limit(limit)
-
-            if offset:
-                stmt = stmt.offset(offset)
+        return select(
+            Game.id,
+            Game.conversation_id,
+            Game.state,
+            Game.question_id,
+            Game.profile_id,
+            players_count.label("players_count"),
+            answers.c.answers_count,
+            answers.c.total_score,
+        ).join(answers, true())
+
+    def stream_games_scores(self) -> AsyncGenerator[dict]:
+        """Очки игроков по всем играм для выгрузки: строка на игрока в игре,
+        для игр без игроков - одна строка с пустым игроком
+        """
+        stmt = (
+            select(
+                Game.id.label("game_id"),
+                Game.conversation_id,
+                Game.state,
+                Player.vk_user_id,
+                Player.name.label("player_name"),
+                func.coalesce(func.sum(Answer.score), 0).label("score"),
+            )
+            .outerjoin(Player, Player.game_id == Game.id)
+            .outerjoin(
+                PlayerAnswerGame,
+                and_(
+                    PlayerAnswerGame.game_id == Game.id,
+                    PlayerAnswerGame.player_id == Player.id,
+                ),
+            )
+            .outerjoin(Answer, PlayerAnswerGame.answer_id == Answer.id)
+            .group_by(Game.id, Player.id, Player.vk_user_id, Player.name)
+            .order_by(Game.id, Player.id)
+        )
 
-            result = await session.execute(stmt)
-        return result.unique().scalars().all()
+        return stream_rows(self.app.database, stmt, "GameAccessor.stream_games_scores")
 
     async def get_score(self, game_id: int):
         stmt = (
@@ -292,7 +359,7 @@ class GameAccessor(BaseAccessor):
         )
 
         # Выполнение запроса и получение результатов
-        async with self.app.database.session() as session:
+        async with self.app.database.session(label="GameAccessor.get_score") as session:
             result = await session.execute(stmt)
             return result.all()  # Получение всех результатов запроса
 
@@ -338,7 +405,9 @@ class GameSettingsAccessor(BaseAccessor):
         stmt = insert(GameSettings).values(game_settings_data)
         stmt = stmt.on_conflict_do_nothing(index_elements=["profile_name"])
 
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameSettingsAccessor.upsert_settings"
+        ) as session:
             await session.execute(stmt)
             await session.commit()
             self.logger.info(
@@ -347,7 +416,9 @@ class GameSettingsAccessor(BaseAccessor):
             )
 
     async def get_by_id(self, id_: int):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameSettingsAccessor.get_by_id"
+        ) as session:
             result = await session.execute(
                 select(GameSettings)
                 .where(GameSettings.id == id_)
@@ -363,7 +434,9 @@ class GameSettingsAccessor(BaseAccessor):
         return game_settings
 
     async def add_settings(self, new_game_settings: GameSettings):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameSettingsAccessor.add_settings"
+        ) as session:
             if new_game_settings.min_count_gamers > new_game_settings.max_count_gamers:
                 raise HTTPBadRequest(
                     reason="min_count_gamers не может быть" " больше max_count_gamers"
@@ -386,7 +459,9 @@ class GameSettingsAccessor(BaseAccessor):
         max_count_gamers: int | None = None,
         time_to_answer: int | None = None,
     ):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="GameSettingsAccessor.update_settings"
+        ) as session:
             try:
                 stmt = select(GameSettings).where(GameSettings.id == id_)
                 result = await session.execute(stmt)
@@ -9,12 +9,13 @@ class VkButtons(Enum):
         label="Буду играть",
         type_btn="callback",
         payload={"type": "show_snackbar", "text": "/reg_on"},
-        color="secondary",
+        color="primary",
     ).get()
     BTN_REG_OFF = VkButton(
         label="Отменить регистрацию",
         type_btn="callback",
         payload={"type": "show_snackbar", "text": "/reg_off"},
+        color="secondary",
     ).get()
     BTN_ANSWER = VkButton(
         label="Знаю ответ!",
@@ -1,15 +1,21 @@
 import typing
 from abc import ABC, abstractmethod
+from collections import Counter
+from itertools import chain
 from logging import getLogger
 
 from aiohttp.web_exceptions import HTTPBadRequest, HTTPConflict, HTTPNotFound
 
 from app.games.blitz.logic import AbstractGame, BlitzGameStage, GameBlitz
 from app.games.blitz.models import BlitzGame
+from app.metrics.metrics import ACTIVE_GAMES, UPDATE_HANDLING_SECONDS
+from app.metrics.tracing import TRACER, traced
+from app.store.database.pagination import iter_pages
 from app.store.vk_api.dataclasses import (
     EventUpdate,
     MessageUpdate,
 )
+from app.store.vk_api.decoder import MESSAGE_EVENT, MESSAGE_NEW
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
@@ -75,7 +81,7 @@ class DbMessageSaver(Observer):
         message = update.object.message.text
         from_id = update.object.message.from_id
         try:
-            await self.app.store.vk_messages.add_message(
+            await self.app.store.vk_messages.save_message(
                 conversation_id=conversation_id,
                 text=message,
                 user_id=from_id,
@@ -119,26 +125,24 @@ class GameManager(AbstractGameManager):
         self.logger = getLogger(__name__)
         self.logger.info("Инициализирован GameManager")
         self._active_games: dict = {}
+        ACTIVE_GAMES.set_function(self.get_active_games_count)
 
-    async def _take_active_game_in_chat(
-        self, conversation_id: int
-    ) -> AbstractGame | None:
-        """Возвращает активную игру в чат, если она есть, иначе None"""
-        if not self._active_games:
-            self.logger.info("Нет активных игр в inner_memory")
-            for game in await self.app.store.game_accessor.get_active_games():
-                self._active_games[game.conversation_id] = game
-
-        game_manager = self._active_games.get(conversation_id)
-        if game_manager:
-            return game_manager
-
-        return None
+    def get_active_games_count(self) -> dict[tuple[str], int]:
+        """Кол-во идущих игр по типам, в виде значений метрики ACTIVE_GAMES.
+        Блиц идет здесь, а "100 к 1" - в BotManager.games, считаются оба реестра
+        """
+        games = chain(
+            self._active_games.values(), self.app.store.bots_manager.games.values()
+        )
+        counts = Counter(game.game_type for game in games)
+        return {(game_type,): count for game_type, count in counts.items()}
 
     async def _load_game_to_inner_memory(self):
         self.games = []
         self._active_games = {}
-        blitz_db_games = await self.app.store.blitzes.get_active_games()
+        blitz_db_games = [
+            game async for game in iter_pages(self.app.store.blitzes.get_active_games)
+        ]
         blitz_games = [
             GameBlitz(
                 self.app,
@@ -303,6 +307,7 @@ class GameManager(AbstractGameManager):
         self.logger.info("Отмена игры в чате %s", conversation_id)
         self._active_games.pop(conversation_id)
 
+    @traced()
     async def handle_message(self, message, user_id, conversation_id):
         self.logger.info("игра ловит сообщение %s от юзера %s", message, user_id)
         if self._active_games is None:
@@ -367,7 +372,8 @@ class BotManager:
 
     async def notify_observers(self, update: MessageUpdate):
         for observer in self.observers:
-            await observer.handle_message_update(update)
+            with TRACER.span(type(observer).__name__):
+                await observer.handle_message_update(update)
 
     async def new_message(self, update: MessageUpdate):
         await self.notify_observers(update)
@@ -375,27 +381,34 @@ class BotManager:
     async def handle_events(self, events: list[EventUpdate]):
         """Обработка callback событий - событий при нажатие на кнопки"""
         for event in events:
-            conversation_id = event.object.peer_id
-            payload_text = event.object.payload.text
-            user_id = event.object.user_id
-            event_id = event.object.event_id
+            with UPDATE_HANDLING_SECONDS.time(MESSAGE_EVENT):
+                await self.handle_event(event)
 
-            try:
-                game = self.games[conversation_id]
+    @traced()
+    async def handle_event(self, event: EventUpdate):
+        """Обработка нажатия на кнопку"""
+        conversation_id = event.object.peer_id
+        payload_text = event.object.payload.text
+        user_id = event.object.user_id
+        event_id = event.object.event_id
 
-                if payload_text == "/reg_on":
-                    await game.register_player(event_id=event_id, user_id=user_id)
-                elif payload_text == "/reg_off":
-                    await game.unregister_player(event_id=event_id, user_id=user_id)
-                elif payload_text == "/give_answer":
-                    await game.waiting_ready_to_answer(event_id=event_id, user_id=user_id)
+        try:
+            game = self.games[conversation_id]
 
-            except KeyError:
-                self.logger.error("Пришло эвент сообщение в несуществующую игру")
-            except Exception:
-                self.logger.exception("Ошибка при обработке эвента сообщения")
+            if payload_text == "/reg_on":
+                await game.register_player(event_id=event_id, user_id=user_id)
+            elif payload_text == "/reg_off":
+                await game.unregister_player(event_id=event_id, user_id=user_id)
+            elif payload_text == "/give_answer":
+                await game.waiting_ready_to_answer(event_id=event_id, user_id=user_id)
+
+        except KeyError:
+            self.logger.error("Пришло эвент сообщение в несуществующую игру")
+        except Exception:
+            self.logger.exception("Ошибка при обработке эвента сообщения")
 
     async def handle_updates(self, updates: list[MessageUpdate]):
         """Обработка пришедших сообщений от пользователей"""
         for update in updates:
-            await self.new_message(update)
+            with UPDATE_HANDLING_SECONDS.time(MESSAGE_NEW):
+                await self.new_message(update)
@@ -0,0 +1,262 @@
+"""Разбор и проверка файлов массового импорта вопросов.
+Файл проверяется целиком до записи в БД: ошибки собираются по всем
+строкам сразу, чтобы исправить файл за один раз, а не по одной ошибке
+на каждую попытку импорта.
+
+Форматы:
+- json: {"questions": [...]} или просто список вопросов, строка ошибки -
+  номер вопроса в списке с 1
+- csv: с заголовком, строка ошибки - номер строки файла.
+  Вопрос "100 к 1" занимает по строке на ответ: title,theme_id,answer,score,
+  строки одного вопроса (одинаковые title и theme_id) собираются вместе.
+  Вопрос блица - одна строка: title,theme_id,answer
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from app.blitz.schemes import BlitzQuestionSchema
+from app.quiz.schemes import QuestionSchema
+
+# Наибольший размер файла импорта
+IMPORT_MAX_SIZE = 20 * 1024 * 1024
+
+
+class ImportFileError(ValueError):
+    """Файл не удалось разобрать целиком"""
+
+
+@dataclass(slots=True)
+class RowError:
+    row: int
+    message: str
+
+
+@dataclass(slots=True)
+class ImportResult:
+    """imported - записано вопросов, errors - ошибки строк.
+    Если есть хоть одна ошибка, не записывается ни один вопрос
+    """
+
+    imported: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class QuizImportRow:
+    row: int
+    title: str
+    theme_id: int
+    answers: list[tuple[str, int]] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class BlitzImportRow:
+    row: int
+    title: str
+    theme_id: int
+    answer: str
+
+
+def parse_quiz_questions(
+    text: str, import_format: str
+) -> tuple[list[QuizImportRow], list[RowError]]:
+    """Вопросы "100 к 1" из файла и ошибки строк, которые не удалось разобрать"""
+    rows, errors = [], []
+
+    if import_format == "json":
+        for row, item in _json_items(text):
+            try:
+                rows.append(
+                    QuizImportRow(
+                        row=row,
+                        title=_str(item, "title"),
+                        theme_id=_int(item, "theme_id"),
+                        answers=[
+                            (_str(answer, "title"), _int(answer, "score"))
+                            for answer in _list(item, "answers")
+                        ],
+                    )
+                )
+            except ValueError as exc:
+                errors.append(RowError(row, str(exc)))
+        return rows, errors
+
+    questions: dict[tuple[str, int], QuizImportRow] = {}
+    for row, item in _csv_items(text, ("title", "theme_id", "answer", "score")):
+        try:
+            title, theme_id = _str(item, "title"), _int(item, "theme_id")
+            answer = (_str(item, "answer"), _int(item, "score"))
+        except ValueError as exc:
+            errors.append(RowError(row, str(exc)))
+            continue
+
+        question = questions.get((title, theme_id))
+        if question is None:
+            question = questions[title, theme_id] = QuizImportRow(row, title, theme_id)
+        question.answers.append(answer)
+
+    return list(questions.values()), errors
+
+
+def parse_blitz_questions(
+    text: str, import_format: str
+) -> tuple[list[BlitzImportRow], list[RowError]]:
+    """Вопросы блица из файла и ошибки строк, которые не удалось разобрать"""
+    if import_format == "json":
+        items = _json_items(text)
+    else:
+        items = _csv_items(text, ("title", "theme_id", "answer"))
+
+    rows, errors = [], []
+    for row, item in items:
+        try:
+            rows.append(
+                BlitzImportRow(
+                    row=row,
+                    title=_str(item, "title"),
+                    theme_id=_int(item, "theme_id"),
+                    answer=_str(item, "answer"),
+                )
+            )
+        except ValueError as exc:
+            errors.append(RowError(row, str(exc)))
+
+    return rows, errors
+
+
+def validate_quiz_rows(rows: list[QuizImportRow], theme_ids: set[int]) -> list[RowError]:
+    """Проверка вопросов "100 к 1" по тем же правилам, что и при добавлении
+    по одному: поля - схемой QuestionSchema, сумма очков - как в create_question
+    """
+    errors = _check_themes(rows, theme_ids)
+
+    schema = QuestionSchema()
+    for row in rows:
+        errors.extend(
+            _schema_errors(
+                row.row,
+                schema.validate(
+                    {
+                        "title": row.title,
+                        "theme_id": row.theme_id,
+                        "answers": [
+                            {"title": title, "score": score}
+                            for title, score in row.answers
+                        ],
+                    }
+                ),
+            )
+        )
+        score_sum = sum(score for _, score in row.answers)
+        if score_sum != 100:
+            errors.append(
+                RowError(
+                    row.row,
+                    f"Сумма очков всех ответов должна быть равна 100, "
+                    f"текущая сумма: {score_sum}",
+                )
+            )
+
+    return sorted(errors, key=lambda error: error.row)
+
+
+def validate_blitz_rows(
+    rows: list[BlitzImportRow], theme_ids: set[int]
+) -> list[RowError]:
+    """Проверка вопросов блица схемой BlitzQuestionSchema,
+    как при добавлении по одному
+    """
+    errors = _check_themes(rows, theme_ids)
+
+    schema = BlitzQuestionSchema()
+    for row in rows:
+        errors.extend(
+            _schema_errors(
+                row.row,
+                schema.validate(
+                    {"title": row.title, "theme_id": row.theme_id, "answer": row.answer}
+                ),
+            )
+        )
+
+    return sorted(errors, key=lambda error: error.row)
+
+
+def _schema_errors(row: int, messages: dict, path: str = "") -> list[RowError]:
+    """Ошибки схемы marshmallow построчно, вложенные поля через точку:
+    {"answers": {0: {"score": [...]}}} -> "answers.0.score: ..."
+    """
+    errors = []
+    for key, value in messages.items():
+        field_path = f"{path}.{key}" if path else str(key)
+        if isinstance(value, dict):
+            errors.extend(_schema_errors(row, value, field_path))
+        else:
+            errors.extend(RowError(row, f"{field_path}: {message}") for message in value)
+    return errors
+
+
+def _check_themes(
+    rows: Iterable[QuizImportRow | BlitzImportRow], theme_ids: set[int]
+) -> list[RowError]:
+    return [
+        RowError(row.row, f"Темы с id = {row.theme_id} не существует")
+        for row in rows
+        if row.theme_id not in theme_ids
+    ]
+
+
+def _json_items(text: str) -> list[tuple[int, dict]]:
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        raise ImportFileError(f"Файл не JSON: {exc}") from None
+
+    if isinstance(data, dict):
+        data = data.get("questions")
+    if not isinstance(data, list):
+        raise ImportFileError('Ожидается список вопросов или {"questions": [...]}')
+
+    return [
+        (row, item if isinstance(item, dict) else {})
+        for row, item in enumerate(data, start=1)
+    ]
+
+
+def _csv_items(text: str, columns: tuple[str, ...]) -> list[tuple[int, dict]]:
+    reader = csv.DictReader(io.StringIO(text))
+    missing = set(columns) - set(reader.fieldnames or ())
+    if missing:
+        raise ImportFileError(
+            f"В заголовке CSV нет столбцов: {', '.join(sorted(missing))}"
+        )
+
+    # Первая строка файла - заголовок
+    return [(reader.line_num, item) for item in reader]
+
+
+def _str(item: dict, key: str) -> str:
+    value = item.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"Не заполнено поле {key}")
+    return value.strip()
+
+
+def _int(item: dict, key: str) -> int:
+    value = item.get(key)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    raise ValueError(f"Поле {key} должно быть целым числом")
+
+
+def _list(item: dict, key: str) -> list[dict]:
+    value = item.get(key)
+    if not isinstance(value, list) or not all(isinstance(v, dict) for v in value):
+        raise ValueError(f"Поле {key} должно быть списком")
+    return value
@@ -0,0 +1,115 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class BlitzQuestionEntry:
+    id: int
+    title: str
+    answer: str
+    theme_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionBank(Generic[T]):
+    """Неизменяемый набор вопросов темы, один на все игры по этой теме.
+    theme_id None - вопросы всех тем
+    """
+
+    theme_id: int | None
+    questions: tuple[T, ...]
+
+
+@dataclass
+class QuestionBankStats:
+    """Счетчики кэша вопросов
+    hits - банки, отданные из кэша
+    misses - загрузки банка из БД
+    coalesced - запросы, дождавшиеся уже идущей загрузки той же темы
+    invalidations - сброшенные после правок админом банки
+    """
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+
+
+class QuestionBankCache(Generic[T]):
+    """Read-through кэш вопросов по темам.
+    Банк темы загружается из БД при первом запросе и дальше отдается всем
+    играм без обращения к БД, пока админ не изменит вопросы этой темы.
+    Загрузка, начатая до сброса, в кэш не попадает: иначе в нем мог бы
+    остаться банк со старыми вопросами.
+    """
+
+    def __init__(self, load: Callable[[int | None], Awaitable[tuple[T, ...]]]):
+        """Кэш вопросов
+        :param load: корутина, загружающая вопросы темы из БД,
+        для None - вопросы всех тем
+        """
+        self.logger = getLogger(__name__)
+        self._load = load
+        self.stats = QuestionBankStats()
+
+        self._banks: dict[int | None, QuestionBank[T]] = {}
+        self._in_flight: dict[int | None, asyncio.Future] = {}
+        self._generation = 0
+
+    async def get(self, theme_id: int | None = None) -> QuestionBank[T]:
+        bank = self._banks.get(theme_id)
+        if bank is not None:
+            self.stats.hits += 1
+            return bank
+
+        future = self._in_flight.get(theme_id)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[theme_id] = future
+        generation = self._generation
+        try:
+            bank = QuestionBank(theme_id=theme_id, questions=await self._load(theme_id))
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Исключение уже получит этот вызов, ожидающих может и не быть
+            future.exception()
+            raise
+        else:
+            future.set_result(bank)
+            if generation == self._generation:
+                self._banks[theme_id] = bank
+        finally:
+            if self._in_flight.get(theme_id) is future:
+                del self._in_flight[theme_id]
+
+        return bank
+
+    def invalidate(self, *theme_ids: int | None) -> None:
+        """Сбрасывает банки тем и общий банк всех вопросов"""
+        self._generation += 1
+        keys = {int(theme_id) for theme_id in theme_ids if theme_id is not None}
+        for theme_id in (*keys, None):
+            if self._banks.pop(theme_id, None) is not None:
+                self.stats.invalidations += 1
+            # Идущая загрузка могла прочитать вопросы до правки
+            self._in_flight.pop(theme_id, None)
+        self.logger.info("Сброшен кэш вопросов тем %s", theme_ids)
+
+    def get_stats(self) -> dict:
+        return {
+            "themes": len(self._banks),
+            "questions": sum(len(bank.questions) for bank in self._banks.values()),
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "coalesced": self.stats.coalesced,
+            "invalidations": self.stats.invalidations,
+        }
@@ -0,0 +1,96 @@
+import random
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+
+@dataclass
+class SamplerStats:
+    """Счетчики выбора вопросов
+    choices - выбрано вопросов
+    retries - повторные выборы, когда попался недавний вопрос беседы
+    fallbacks - выборы перебором, когда случайные попытки не помогли
+    """
+
+    choices: int = 0
+    retries: int = 0
+    fallbacks: int = 0
+
+
+class QuestionSampler:
+    """Случайный выбор вопроса за O(1).
+    id вопроса берется по случайному индексу в неизменяемом массиве id темы,
+    а не ORDER BY random() по таблице. Массив пересобирается при изменении
+    вопросов темы (см. QuestionBankCache), так что выбор идет по актуальным id.
+    Для каждой беседы помнятся последние recent_size вопросов: если
+    случайный вопрос среди них, выбор повторяется до attempts раз, и только
+    для маленьких банков, где почти все вопросы недавние, - перебором.
+    """
+
+    def __init__(
+        self,
+        recent_size: int = 20,
+        max_conversations: int = 10000,
+        attempts: int = 8,
+        rng: random.Random | None = None,
+    ):
+        """Выбор вопросов
+        :param recent_size: сколько последних вопросов беседы не повторять
+        :param max_conversations: для скольких бесед помнить вопросы, дальше
+        забываются беседы, давно не начинавшие игр
+        :param attempts: сколько раз выбирать случайно, прежде чем перебирать
+        """
+        self.recent_size = recent_size
+        self.max_conversations = max_conversations
+        self.attempts = attempts
+        self.stats = SamplerStats()
+        self._rng = rng or random.Random()
+        self._recent: OrderedDict[int, deque[int]] = OrderedDict()
+
+    def choose(
+        self, question_ids: Sequence[int], conversation_id: int | None = None
+    ) -> int:
+        """Случайный id вопроса, по возможности не из недавних вопросов беседы"""
+        if not question_ids:
+            raise IndexError("Нет вопросов для выбора")
+
+        self.stats.choices += 1
+        recent = self._get_recent(conversation_id)
+        question_id = question_ids[self._rng.randrange(len(question_ids))]
+
+        if recent and question_id in recent:
+            for _ in range(self.attempts):
+                self.stats.retries += 1
+                question_id = question_ids[self._rng.randrange(len(question_ids))]
+                if question_id not in recent:
+                    break
+            else:
+                self.stats.fallbacks += 1
+                fresh = [id_ for id_ in question_ids if id_ not in recent]
+                if fresh:
+                    question_id = self._rng.choice(fresh)
+
+        if recent is not None:
+            recent.append(question_id)
+        return question_id
+
+    def get_stats(self) -> dict:
+        return {
+            "conversations": len(self._recent),
+            "choices": self.stats.choices,
+            "retries": self.stats.retries,
+            "fallbacks": self.stats.fallbacks,
+        }
+
+    def _get_recent(self, conversation_id: int | None) -> deque[int] | None:
+        if conversation_id is None or self.recent_size <= 0:
+            return None
+
+        recent = self._recent.get(conversation_id)
+        if recent is None:
+            recent = self._recent[conversation_id] = deque(maxlen=self.recent_size)
+            while len(self._recent) > self.max_conversations:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(conversation_id)
+        return recent
@@ -1,4 +1,4 @@
-from collections.abc import Iterable, Sequence
+from collections.abc import AsyncGenerator, Iterable
 from typing import TYPE_CHECKING
 
 import sqlalchemy.exc
@@ -8,9 +8,11 @@ from aiohttp.web_exceptions import (
     HTTPNotFound,
     HTTPServiceUnavailable,
 )
-from sqlalchemy import delete, func, update
+from sqlalchemy import case, delete, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.base.base_accessor import BaseAccessor
 from app.quiz.data import create_new_data
@@ -19,7 +21,17 @@ from app.quiz.models import (
     Question,
     Theme,
 )
-from app.vk.models import VkMessage
+from app.store.database.export import stream_rows
+from app.store.database.pagination import Page, paginate
+from app.store.database.write_behind import WriteBehindBuffer
+from app.store.question_bank.bulk_import import (
+    ImportResult,
+    QuizImportRow,
+    RowError,
+    validate_quiz_rows,
+)
+from app.store.question_bank.cache import QuestionBankCache
+from app.vk.models import VkConversation, VkMessage
 from tests.conftest import logger
 
 if TYPE_CHECKING:
@@ -27,6 +39,13 @@ if TYPE_CHECKING:
 
 
 class QuizAccessor(BaseAccessor):
+    def __init__(self, app: "Application", *args, **kwargs):
+        super().__init__(app, *args, **kwargs)
+        # Только id вопросов - для выбора вопроса новой игры
+        self.question_ids: QuestionBankCache[int] = QuestionBankCache(
+            self._load_question_ids
+        )
+
     async def connect(self, app: "Application") -> None:
         self.logger.info("Подключаем QuizAccessor")
 
@@ -39,15 +58,23 @@ class QuizAccessor(BaseAccessor):
 
         if count_questions == 0:
             self.logger.info("В базовой теме нет вопросов, добавляем стандартные")
-            for question in create_new_data():
-                await self.create_question(
+            rows = [
+                QuizImportRow(
+                    row=row,
                     title=question.title,
                     theme_id=question.theme_id,
-                    answers=question.answers,
+                    answers=[(answer.title, answer.score) for answer in question.answers],
                 )
+                for row, question in enumerate(create_new_data(), start=1)
+            ]
+            result = await self.import_questions(rows)
+            for error in result.errors:
+                self.logger.error("Стандартный вопрос %s: %s", error.row, error.message)
 
     async def create_theme(self, title: str, description: str | None = None) -> Theme:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.create_theme"
+        ) as session:
             theme = Theme(title=title, description=description)
             self.logger.info("Добавляем в базу данных %s", theme)
 
@@ -66,34 +93,33 @@ class QuizAccessor(BaseAccessor):
             return theme
 
     async def get_theme_by_title(self, title: str) -> Theme | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.get_theme_by_title"
+        ) as session:
             title = await session.execute(select(Theme).where(Theme.title == title))
 
         return title.scalar_one_or_none()
 
     async def get_theme_by_id(self, id_: int) -> Theme | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.get_theme_by_id"
+        ) as session:
             theme = await session.execute(select(Theme).where(Theme.id == int(id_)))
 
         return theme.scalar_one_or_none()
 
     async def get_themes_list(
-        self, limit: int | None = None, offset: int | None = None
-    ) -> Sequence[Theme]:
-        async with self.app.database.session() as session:
-            stmt = select(Theme)
-
-            if limit is not None:
-                stmt = stmt.limit(limit)
-            if offset is not None:
-                stmt = stmt.offset(offset)
-
-            result = await session.execute(stmt)
-
-        return result.scalars().all()
+        self, cursor: str | None = None, limit: int | None = None
+    ) -> Page[Theme]:
+        async with self.app.database.session(
+            label="QuizAccessor.get_themes_list"
+        ) as session:
+            return await paginate(session, select(Theme), Theme.id, cursor, limit)
 
     async def delete_theme_by_id(self, id_: int) -> Theme | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.delete_theme_by_id"
+        ) as session:
             theme = await session.get(Theme, id_)
 
             if theme is None:
@@ -105,12 +131,16 @@ class QuizAccessor(BaseAccessor):
                 raise HTTPConflict(
                     reason="Нельзя удалить т.к. существуют" " вопросы принадлежащие теме"
                 ) from exc
+
+        self._invalidate_themes(theme.id)
         return theme
 
     async def create_question(
         self, title: str, theme_id: int, answers: Iterable[Answer]
     ) -> Question:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.create_question"
+        ) as session:
             question = Question(title=title, theme_id=theme_id, answers=answers)
             sum_score = sum(answer.score for answer in question.answers)
 
@@ -132,10 +162,74 @@ class QuizAccessor(BaseAccessor):
                 self.logger.exception(exc_info=exc, msg=exc)
                 raise HTTPServiceUnavailable from exc
 
+        self._invalidate_themes(theme_id)
         return question
 
+    async def import_questions(
+        self, rows: list[QuizImportRow], errors: list[RowError] | None = None
+    ) -> ImportResult:
+        """Массовое добавление вопросов с ответами одной транзакцией:
+        вопросы и ответы пишутся многострочными INSERT.
+        Вопросы проверяются все сразу, и при любой ошибке не пишется ничего
+        :param errors: ошибки разбора файла, их строки уже не попали в rows
+        """
+        errors = [
+            *(errors or ()),
+            *validate_quiz_rows(rows, await self._get_theme_ids(rows)),
+        ]
+        if errors:
+            return ImportResult(errors=sorted(errors, key=lambda error: error.row))
+        if not rows:
+            return ImportResult()
+
+        async with self.app.database.session(
+            label="QuizAccessor.import_questions"
+        ) as session:
+            try:
+                question_ids = await session.scalars(
+                    insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                    [{"title": row.title, "theme_id": row.theme_id} for row in rows],
+                )
+                await session.execute(
+                    insert(Answer),
+                    [
+                        {"question_id": question_id, "title": title, "score": score}
+                        for question_id, row in zip(question_ids.all(), rows, strict=True)
+                        for title, score in row.answers
+                    ],
+                )
+                await session.commit()
+
+            except sqlalchemy.exc.IntegrityError as exc:
+                self.logger.exception(exc_info=exc, msg=exc)
+                raise HTTPBadRequest(reason="не удалось импортировать вопросы") from exc
+
+            except sqlalchemy.exc.InterfaceError as exc:
+                self.logger.exception(exc_info=exc, msg=exc)
+                raise HTTPServiceUnavailable from exc
+
+        self.logger.info("Импортировано %s вопросов", len(rows))
+        self._invalidate_themes(*{row.theme_id for row in rows})
+        return ImportResult(imported=len(rows))
+
+    async def _get_theme_ids(self, rows: Iterable[QuizImportRow]) -> set[int]:
+        """Какие из тем строк импорта существуют"""
+        theme_ids = {row.theme_id for row in rows}
+        if not theme_ids:
+            return set()
+
+        async with self.app.database.session(
+            label="QuizAccessor._get_theme_ids"
+        ) as session:
+            existing = await session.scalars(
+                select(Theme.id).where(Theme.id.in_(theme_ids))
+            )
+        return set(existing.all())
+
     async def get_question_by_id(self, id_: int) -> Question | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.get_question_by_id"
+        ) as session:
             result = await session.execute(
                 select(Question)
                 .where(Question.id == id_)
@@ -151,41 +245,53 @@ class QuizAccessor(BaseAccessor):
             .options(joinedload(Question.answers))
         )
 
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.get_question_by_title"
+        ) as session:
             return await session.scalar(stmt)
 
     async def get_questions_list(
         self,
         theme_id: int | None = None,
-        offset: int | None = None,
+        cursor: str | None = None,
         limit: int | None = None,
-    ) -> Sequence[Question]:
+    ) -> Page[Question]:
         if theme_id is None:
             raise HTTPBadRequest
 
         stmt = (
             select(Question)
             .where(Question.theme_id == int(theme_id))
-            .options(joinedload(Question.answers))
+            .options(selectinload(Question.answers))
         )
 
-        if limit:
-            stmt = stmt.limit(limit)
-        if offset:
-            stmt = stmt.offset(offset)
+        async with self.app.database.session(
+            label="QuizAccessor.get_questions_list"
+        ) as session:
+            page = await paginate(session, stmt, Question.id, cursor, limit)
 
-        async with self.app.database.session() as session:
-            questions = await session.scalars(stmt)
+        if not page.items and not cursor:
+            raise HTTPNotFound
 
-        questions = questions.unique().all()
+        return page
 
-        if len(questions) == 0:
-            raise HTTPNotFound
+    async def _load_question_ids(self, theme_id: int | None) -> tuple[int, ...]:
+        stmt = select(Question.id).order_by(Question.id)
+        if theme_id is not None:
+            stmt = stmt.where(Question.theme_id == theme_id)
 
-        return questions
+        async with self.app.database.session(
+            label="QuizAccessor._load_question_ids"
+        ) as session:
+            return tuple(await session.scalars(stmt))
+
+    def _invalidate_themes(self, *theme_ids: int | None) -> None:
+        self.question_ids.invalidate(*theme_ids)
 
     async def delete_question_by_id(self, id_: int) -> Question | None:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.delete_question_by_id"
+        ) as session:
             try:
                 question = (
                     await session.execute(
@@ -220,10 +326,13 @@ class QuizAccessor(BaseAccessor):
 
             else:
                 self.logger.info("Вопрос с %s успешно удален", question.id)
+                self._invalidate_themes(question.theme_id)
                 return question
 
     async def get_questions_count(self, theme_id: int | None = None) -> int:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.get_questions_count"
+        ) as session:
             try:
                 if theme_id is None:
                     count_query = select(func.count()).select_from(Question)
@@ -248,7 +357,9 @@ class QuizAccessor(BaseAccessor):
         new_theme_id: int | None,
         new_answers: Iterable[Answer] | None,
     ):
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="QuizAccessor.update_question"
+        ) as session:
             try:
                 stmt = select(Question).where(Question.id == question_id)
                 result = await session.execute(stmt)
@@ -257,6 +368,7 @@ class QuizAccessor(BaseAccessor):
                 if not question:
                     raise HTTPBadRequest(reason="Вопрос не найден")
 
+                theme_id = question.theme_id
                 stmt = update(Question).where(Question.id == question_id)
                 if new_title:
                     stmt = stmt.values(title=new_title)
@@ -282,24 +394,118 @@ class QuizAccessor(BaseAccessor):
                 await session.rollback()  # Откатываем транзакцию перед повторной попыткой
                 raise HTTPServiceUnavailable from exc
 
+        # Вопрос мог переехать в другую тему - сбрасываем обе
+        self._invalidate_themes(theme_id, new_theme_id)
+
 
 class VkMessageAccessor(BaseAccessor):
+    EXPORT_COLUMNS = ("id", "conversation_id", "user_id", "text", "date")
+
+    def __init__(self, app: "Application", *args, **kwargs):
+        super().__init__(app, *args, **kwargs)
+        # Буфер нужен до connect: прием апдейтов (long poll, брокер, callback)
+        # может начаться раньше, чем подключится этот аксессор
+        config = app.config.message_saver
+        self.buffer: WriteBehindBuffer[dict] = WriteBehindBuffer(
+            self.add_messages,
+            batch_size=config.batch_size,
+            flush_interval=config.flush_interval,
+            max_size=config.max_buffer,
+        )
+
     async def connect(self, app: "Application") -> None:
         self.logger.info("Подключаем VKMessageAccessor")
         count_messages = await self.get_messages_count()
         logger.info("В базе %s сообщений", count_messages)
 
+    async def disconnect(self, app: "Application") -> None:
+        self.logger.info("Дописываем несохраненные сообщения")
+        await self.buffer.close()
+
+    async def save_message(self, conversation_id: int, text: str, user_id: int) -> None:
+        """Ставит сообщение в очередь на запись, в БД оно попадет пачкой
+        с другими. Если очередь переполнена - ждет, пока БД ее разгребет
+        """
+        await self.buffer.put(
+            {"conversation_id": conversation_id, "text": text, "user_id": user_id}
+        )
+
+    async def add_messages(self, messages: list[dict]) -> None:
+        """Записывает пачку сообщений одним INSERT на несколько строк"""
+        async with self.app.database.session(
+            label="VkMessageAccessor.add_messages"
+        ) as session:
+            inserted = await session.scalars(
+                insert(VkMessage).values(messages).returning(VkMessage)
+            )
+            await self._update_conversations(session, inserted.all())
+            await session.commit()
+
+    async def _update_conversations(
+        self, session: AsyncSession, messages: Iterable[VkMessage]
+    ) -> None:
+        """Обновляет сводки бесед записанных сообщений одним upsert"""
+        summaries: dict[int, dict] = {}
+        for message in messages:
+            summary = summaries.get(message.conversation_id)
+            if summary is None:
+                summary = summaries[message.conversation_id] = {
+                    "conversation_id": message.conversation_id,
+                    "last_message_id": message.id,
+                    "messages_count": 0,
+                }
+            summary["messages_count"] += 1
+            if message.id >= summary["last_message_id"]:
+                summary["last_message_id"] = message.id
+                summary["last_text"] = message.text
+                summary["last_user_id"] = message.user_id
+                summary["last_activity"] = message.date
+
+        if not summaries:
+            return
+
+        # Беседы в одном порядке во всех транзакциях - без взаимных блокировок
+        stmt = pg_insert(VkConversation).values(
+            [summaries[key] for key in sorted(summaries)]
+        )
+        excluded = stmt.excluded
+        is_newer = excluded.last_message_id > VkConversation.last_message_id
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VkConversation.conversation_id],
+            set_={
+                "messages_count": VkConversation.messages_count + excluded.messages_count,
+                **{
+                    column: case(
+                        (is_newer, getattr(excluded, column)),
+                        else_=getattr(VkConversation, column),
+                    )
+                    for column in (
+                        "last_message_id",
+                        "last_text",
+                        "last_user_id",
+                        "last_activity",
+                    )
+                },
+            },
+        )
+        await session.execute(stmt)
+
     async def add_message(self, conversation_id, text: str, user_id: int) -> VkMessage:
-        async with self.app.database.session() as session:
-            message: VkMessage = VkMessage(
-                conversation_id=conversation_id,
-                text=text,
-                user_id=user_id,
+        async with self.app.database.session(
+            label="VkMessageAccessor.add_message"
+        ) as session:
+            stmt = (
+                insert(VkMessage)
+                .values(conversation_id=conversation_id, text=text, user_id=user_id)
+                .returning(VkMessage)
+            )
+            self.logger.info(
+                "Добавляем в базу данных сообщение беседы %s", conversation_id
             )
-            self.logger.info("Добавляем в базу данных %s", message)
 
             try:
-                session.add(message)
+                message: VkMessage = await session.scalar(stmt)
+                await self._update_conversations(session, [message])
                 await session.commit()
 
             except sqlalchemy.exc.IntegrityError as exc:
@@ -317,7 +523,9 @@ class VkMessageAccessor(BaseAccessor):
             return message
 
     async def get_messages_count(self) -> int:
-        async with self.app.database.session() as session:
+        async with self.app.database.session(
+            label="VkMessageAccessor.get_messages_count"
+        ) as session:
             try:
                 count_query = select(func.count()).select_from(VkMessage)
                 result = await session.execute(count_query)
@@ -328,50 +536,71 @@ class VkMessageAccessor(BaseAccessor):
 
             return result.scalar()
 
+    def stream_messages(self, conversation_id: int | None = None) -> AsyncGenerator[dict]:
+        """Все сообщения (или сообщения беседы) по порядку записи для выгрузки"""
+        stmt = select(
+            *(getattr(VkMessage, column) for column in self.EXPORT_COLUMNS)
+        ).order_by(VkMessage.id)
+        if conversation_id is not None:
+            stmt = stmt.where(VkMessage.conversation_id == int(conversation_id))
+
+        return stream_rows(self.app.database, stmt, "VkMessageAccessor.stream_messages")
+
     async def get_messages_list(
         self,
         conversation_id: int | None = None,
-        offset: int | None = None,
+        cursor: str | None = None,
         limit: int | None = None,
-    ):
+    ) -> Page[VkMessage]:
+        """Сообщения беседы по порядку записи, страницами по id
+        (индекс ix_vk_messages_conversation_id_id): следующая страница
+        начинается сразу после последнего id предыдущей, без OFFSET
+        """
         if conversation_id is None:
             raise HTTPBadRequest(reason="Не указан идентификатор чата")
 
         stmt = select(VkMessage).where(VkMessage.conversation_id == int(conversation_id))
 
-        if limit:
-            stmt = stmt.limit(limit)
-        if offset:
-            stmt = stmt.offset(offset)
         try:
-            async with self.app.database.session() as session:
-                messages = await session.scalars(stmt)
-        except Exception as exc:
+            async with self.app.database.session(
+                label="VkMessageAccessor.get_messages_list"
+            ) as session:
+                page = await paginate(session, stmt, VkMessage.id, cursor, limit)
+        except (sqlalchemy.exc.SQLAlchemyError, OSError) as exc:
             self.logger.exception(exc_info=exc, msg=exc)
             raise HTTPServiceUnavailable from exc
 
-        vk_messages = messages.unique().all()
-
-        if len(vk_messages) == 0:
+        if not page.items and not cursor:
             raise HTTPNotFound
 
-        return vk_messages
+        return page
 
     async def get_conversations_list(
         self,
-    ):
-        stmt = select(VkMessage).distinct(VkMessage.conversation_id)
-
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> Page[VkConversation]:
+        """Беседы из сводки vk_conversations по conversation_id.
+        Ключ страниц не меняется с новыми сообщениями: при листании по
+        последнему сообщению беседа, ставшая активной, перепрыгнула бы
+        на уже пройденную страницу и была бы пропущена
+        """
         try:
-            async with self.app.database.session() as session:
-                messages = await session.scalars(stmt)
-        except Exception as exc:
+            async with self.app.database.session(
+                label="VkMessageAccessor.get_conversations_list"
+            ) as session:
+                page = await paginate(
+                    session,
+                    select(VkConversation),
+                    VkConversation.conversation_id,
+                    cursor,
+                    limit,
+                )
+        except (sqlalchemy.exc.SQLAlchemyError, OSError) as exc:
             self.logger.exception(exc_info=exc, msg=exc)
             raise HTTPServiceUnavailable from exc
 
-        vk_messages = messages.unique().all()
-
-        if len(vk_messages) == 0:
+        if not page.items and not cursor:
             raise HTTPNotFound
 
-        return vk_messages
+        return page
@@ -30,5 +30,7 @@ class Store:
 def setup_store(app: "Application"):
     app.database = Database(app)
     app.on_startup.append(app.database.connect)
-    app.on_cleanup.append(app.database.disconnect)
     app.store = Store(app)
+    # Аксессоры при остановке дописывают данные в БД (буфер сообщений,
+    # апдейты из очередей шардов), поэтому БД закрывается после них
+    app.on_cleanup.append(app.database.disconnect)
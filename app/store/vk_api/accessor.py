@@ -1,32 +1,40 @@
 import asyncio
 import json
 import random
+import time
 import typing
 from logging import getLogger
 from urllib.parse import urlencode, urljoin
 
-from aiohttp import TCPConnector
-from aiohttp.client import ClientSession
-
 from app.base.base_accessor import BaseAccessor
+from app.metrics.metrics import VK_API_ERRORS, VK_API_REQUEST_SECONDS
+from app.metrics.tracing import TRACER
+from app.store.amqp.broker import BaseBroker, create_broker
+from app.store.amqp.updates import UpdateConsumer, UpdatePublisher
+from app.store.vk_api.batcher import VkExecuteBatcher
 from app.store.vk_api.constants import (
     API_PATH,
     API_VERSION,
+    BOT_MODE_AMQP_PUBLISHER,
+    BOT_MODE_AMQP_WORKER,
+    BOT_MODE_CALLBACK,
     VK_METHOD_ACT,
     VK_METHOD_WAIT,
     VkMessagesMethods,
 )
-from app.store.vk_api.dataclasses import (
-    EventObject,
-    EventPayload,
-    EventUpdate,
-    LongPollResponse,
-    MessageObject,
-    MessageUpdate,
-    VkMessage,
-    VkUser,
-)
+from app.store.vk_api.dataclasses import VkUser
+from app.store.vk_api.decoder import LongPollBatch, decode_long_poll, decode_update
+from app.store.vk_api.dedup import RecentEventIds
+from app.store.vk_api.dispatcher import UpdateDispatcher
+from app.store.vk_api.edits import MessageEditCoalescer
+from app.store.vk_api.http import HttpPool
 from app.store.vk_api.poller import Poller
+from app.store.vk_api.scheduler import (
+    METHOD_PRIORITIES,
+    RequestPriority,
+    RequestScheduler,
+)
+from app.store.vk_api.users import VkUserCache
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
@@ -41,65 +49,216 @@ class VkApiAccessor(BaseAccessor):
         self._VK_METHOD_ACT: str = VK_METHOD_ACT
         self._VK_METHOD_WAIT: int = kwargs.get("wait", VK_METHOD_WAIT)
 
-        self.session: ClientSession | None = None
+        self.api_pool: HttpPool | None = None
+        self.long_poll_pool: HttpPool | None = None
         self.key: str | None = None
         self.server: str | None = None
         self.poller: Poller | None = None
+        self.dispatcher: UpdateDispatcher | None = None
+        self.batcher: VkExecuteBatcher | None = None
+        self.scheduler: RequestScheduler | None = None
+        self.users: VkUserCache | None = None
+        self.edits: MessageEditCoalescer | None = None
+        self.broker: BaseBroker | None = None
+        self.publisher: UpdatePublisher | None = None
+        self.consumer: UpdateConsumer | None = None
+        self.callback_events: RecentEventIds | None = None
         self.ts: int | None = None
         self.logger = getLogger(__name__)
 
-    async def worker(self, queue):
-        """Воркер получения сообщений от ВК, сортирует их по событиям
-        или сообщениям а после обрабатывает
-        :param queue: Очередь сообщений
-        """
-        while True:
-            task = await queue.get()
+    async def connect(self, app: "Application") -> None:
+        self._API_PATH = app.config.vk_api.api_url
+        self.api_pool = HttpPool(app.config.vk_api.api_pool)
+        self.long_poll_pool = HttpPool(app.config.vk_api.long_poll_pool)
+
+        if app.config.vk_api.rate_limit > 0:
+            self.scheduler = RequestScheduler(
+                send=self._post_method,
+                rate=app.config.vk_api.rate_limit,
+                burst=app.config.vk_api.rate_burst,
+            )
+            self.scheduler.start()
 
-            if isinstance(task, MessageUpdate):
-                await self.app.store.bots_manager.handle_updates([task])
+        if app.config.vk_api.batch_window > 0:
+            self.batcher = VkExecuteBatcher(
+                send=self._schedule_method,
+                window=app.config.vk_api.batch_window,
+                max_size=app.config.vk_api.batch_max_size,
+            )
 
-            elif isinstance(task, EventUpdate):
-                await self.app.store.bots_manager.handle_events([task])
+        self.users = VkUserCache(
+            fetch=self._fetch_vk_users,
+            max_size=app.config.vk_api.user_cache_size,
+            ttl=app.config.vk_api.user_cache_ttl,
+            window=app.config.vk_api.user_lookup_window,
+        )
 
-            queue.task_done()
+        self.edits = MessageEditCoalescer(
+            edit=self.edit_message,
+            interval=app.config.vk_api.edit_interval,
+        )
 
-    async def connect(self, app: "Application") -> None:
-        self.session = ClientSession(connector=TCPConnector(verify_ssl=False))
+        if not self.app.config.bot.is_turn_on:
+            self.logger.info("Бот выключен")
+            return
+
+        self.logger.info("Запускаем бота")
+        mode = app.config.bot.mode
+
+        if mode == BOT_MODE_AMQP_PUBLISHER:
+            self.logger.info("Апдейты публикуются в брокер для воркеров")
+            self.broker = create_broker(app.config.amqp)
+            await self.broker.connect()
+            self.publisher = UpdatePublisher(self.broker)
+        else:
+            self.dispatcher = UpdateDispatcher(
+                app,
+                shards=app.config.bot.shards,
+                shard_queue_size=app.config.bot.shard_queue_size,
+                shard_overflow_size=app.config.bot.shard_overflow_size,
+            )
+            self.dispatcher.start()
+
+        if mode == BOT_MODE_AMQP_WORKER:
+            self.logger.info("Ждем апдейты из брокера")
+            self.broker = create_broker(app.config.amqp)
+            await self.broker.connect()
+            self.consumer = UpdateConsumer(self.broker, self.dispatcher)
+            self.consumer.start()
+            return
+
+        if mode == BOT_MODE_CALLBACK:
+            self.logger.info("Ждем апдейты от Callback API")
+            self.callback_events = RecentEventIds(
+                ttl=app.config.bot.callback_dedup_ttl,
+                max_size=app.config.bot.callback_dedup_size,
+            )
+            return
 
         try:
             await self._get_long_poll_service()
         except Exception as e:
             self.logger.error("Exception", exc_info=e)
 
-        if self.app.config.bot.is_turn_on:
-            self.logger.info("Запускаем бота")
-
-            self.poller = Poller(app.store)
-            self.logger.info("start polling")
-            self.poller.start()
-        else:
-            self.logger.info("Бот выключен")
+        self.poller = Poller(app.store)
+        self.logger.info("start polling")
+        self.poller.start()
 
     async def disconnect(self, app: "Application") -> None:
-        if self.session:
-            await self.session.close()
-
         if self.poller:
             self.logger.info("Останавливаем poller")
             await self.poller.stop()
 
+        if self.consumer:
+            self.logger.info("Прекращаем прием апдейтов из брокера")
+            await self.consumer.stop()
+
+        if self.dispatcher:
+            self.logger.info("Останавливаем воркеры апдейтов")
+            await self.dispatcher.stop()
+
+        if self.consumer:
+            await self.consumer.wait_acks()
+
+        # Правки и запросы пользователей уходят через батчер, а он через сессию,
+        # поэтому закрываем в таком порядке
+        for client in (
+            self.broker,
+            self.edits,
+            self.users,
+            self.batcher,
+            self.scheduler,
+            self.api_pool,
+            self.long_poll_pool,
+        ):
+            if client:
+                await client.close()
+
+    def get_stats(self) -> dict:
+        """Статистика работы бота для мониторинга"""
+        return {
+            "dispatcher": self.dispatcher.get_stats() if self.dispatcher else None,
+            "batcher": {
+                "calls": self.batcher.stats.calls,
+                "requests": self.batcher.stats.requests,
+                "executes": self.batcher.stats.executes,
+                "avg_batch_size": self.batcher.stats.avg_batch_size,
+            }
+            if self.batcher
+            else None,
+            "scheduler": self.scheduler.get_stats() if self.scheduler else None,
+            "users": self.users.get_stats() if self.users else None,
+            "edits": self.edits.get_stats() if self.edits else None,
+            "amqp": (self.publisher or self.consumer).get_stats()
+            if self.publisher or self.consumer
+            else None,
+            "callback": {
+                "remembered": len(self.callback_events),
+                "duplicates": self.callback_events.duplicates,
+            }
+            if self.callback_events
+            else None,
+            "http_pools": {
+                "api": self.api_pool.get_stats() if self.api_pool else None,
+                "long_poll": self.long_poll_pool.get_stats()
+                if self.long_poll_pool
+                else None,
+            },
+        }
+
     def _build_query(self, host: str, method: str, params: dict) -> str:
         params.setdefault("v", self._API_VERSION)
         return f"{urljoin(host, method)}?{urlencode(params)}"
 
     async def _send_request(self, method: VkMessagesMethods, params: dict) -> dict | None:
-        """Отправка запроса к API Вконтакте"""
-        params["access_token"] = self.app.config.bot.token
+        """Отправка запроса к API Вконтакте.
+        Если включен батчинг - запрос уходит одним execute вместе с другими
+        запросами, накопленными за окно батчинга.
+        Если включен планировщик - запросы уходят в порядке важности
+        (ответы на нажатия кнопок первыми) и не чаще лимита ВК.
+        """
+        priority = METHOD_PRIORITIES.get(method, RequestPriority.MESSAGE)
+        started_at = time.monotonic()
 
         try:
-            async with self.session.post(
-                self._build_query(self._API_PATH, method.value, params)
+            with TRACER.span(f"vk {method.value}"):
+                if self.batcher:
+                    result = await self.batcher.call(method.value, params, priority)
+                else:
+                    result = await self._schedule_method(method.value, params, priority)
+        except Exception:
+            VK_API_ERRORS.inc(method.value)
+            raise
+
+        latency = time.monotonic() - started_at
+        VK_API_REQUEST_SECONDS.observe(latency, method.value)
+        if result is None or "error" in result:
+            VK_API_ERRORS.inc(method.value)
+        if self.scheduler:
+            self.scheduler.record_latency(priority, latency)
+        return result
+
+    async def _schedule_method(
+        self, method: str, params: dict, priority: RequestPriority
+    ) -> dict | None:
+        if self.scheduler:
+            return await self.scheduler.submit(method, params, priority)
+
+        return await self._post_method(method, params)
+
+    async def _post_method(self, method: str, params: dict) -> dict | None:
+        """Отправка одного запроса к API Вконтакте, параметры передаются
+        в теле запроса, т.к. код execute не влезает в url
+        """
+        data = {
+            **params,
+            "access_token": self.app.config.bot.token,
+            "v": self._API_VERSION,
+        }
+
+        try:
+            async with self.api_pool.request(
+                "POST", urljoin(self._API_PATH, method), data=data
             ) as response:
                 return await response.json()
 
@@ -111,7 +270,8 @@ class VkApiAccessor(BaseAccessor):
     async def _get_long_poll_service(self) -> None:
         self.logger.info("Получаем ключ лонгполинга")
 
-        async with self.session.get(
+        async with self.api_pool.request(
+            "GET",
             self._build_query(
                 host=self._API_PATH,
                 method="groups.getLongPollServer",
@@ -119,7 +279,7 @@ class VkApiAccessor(BaseAccessor):
                     "group_id": self.app.config.bot.group_id,
                     "access_token": self.app.config.bot.token,
                 },
-            )
+            ),
         ) as response:
             rsp = await response.json()
 
@@ -138,9 +298,9 @@ class VkApiAccessor(BaseAccessor):
 
         self.logger.info("Бот запущен для группы: %s", self.app.config.bot.group_id)
 
-    async def poll(self):
-        """Получение сообщений от ВК с помощью поллера"""
-        async with self.session.get(
+    async def _request_long_poll(self) -> LongPollBatch | None:
+        async with self.long_poll_pool.request(
+            "GET",
             self._build_query(
                 host=self.server,
                 method="",
@@ -150,73 +310,84 @@ class VkApiAccessor(BaseAccessor):
                     "ts": self.ts,
                     "wait": self._VK_METHOD_WAIT,
                 },
-            )
+            ),
         ) as response:
             if response.headers.get("Content-Type") != "application/json":
                 self.logger.error("От вк пришла дичь")
-                await asyncio.sleep(10)
-                return
-
-            data = await response.json()
-            self.logger.debug("data: %s", data)
-
-            if data == {"failed": 2} or data == {"failed": 3}:
-                self.logger.error("Необходимо обновить ключ LongPoll")
-                await self._get_long_poll_service()
-
-            if data.get("ts") is not None:
-                self.ts = data.get("ts")
-
-            long_poll_response: LongPollResponse = LongPollResponse.Schema().load(data)
-            queue_messages = asyncio.Queue()
-
-            for update in long_poll_response.updates:
-                if update.type == "message_new":
-                    new_msg = MessageUpdate(
-                        event_id=update.event_id,
-                        group_id=update.group_id,
-                        object=MessageObject(
-                            message=VkMessage(
-                                conversation_message_id=update.object.message.conversation_message_id,
-                                date=update.object.message.date,
-                                from_id=update.object.message.from_id,
-                                peer_id=update.object.message.peer_id,
-                                text=update.object.message.text,
-                            ),
-                        ),
-                    )
-                    await queue_messages.put(new_msg)
-
-                elif update.type == "message_event":
-                    new_event = EventUpdate(
-                        event_id=update.event_id,
-                        group_id=update.group_id,
-                        type=update.type,
-                        object=EventObject(
-                            event_id=update.object.event_id,
-                            peer_id=update.object.peer_id,
-                            user_id=update.object.user_id,
-                            payload=EventPayload(
-                                text=update.object.payload.text,
-                                type=update.object.payload.type,
-                            ),
-                        ),
-                    )
-                    await queue_messages.put(new_event)
-
-            try:
-                workers = [
-                    asyncio.create_task(self.worker(queue_messages)) for i in range(4)
-                ]
-                await queue_messages.join()
-                for w in workers:
-                    w.cancel()
-                await asyncio.gather(*workers, return_exceptions=True)
-
-            except Exception as e:
-                self.logger.exception(
-                    "Не вышло переслать сообщения в Bot Manager", exc_info=e
-                )
+                return None
+
+            raw = await response.read()
+            self.logger.debug("data: %s", raw)
+            return decode_long_poll(raw)
+
+    async def poll(self):
+        """Получение сообщений от ВК с помощью поллера.
+        Апдейты только складываются в очередь диспетчера, обработка идет
+        в воркерах, поэтому следующий запрос к ВК уходит сразу после разбора ответа.
+        Если переполнение шардов заполнено, следующий запрос ждет места:
+        ts не сдвигается, и новые апдейты остаются у ВК, а не теряются.
+        """
+        try:
+            batch = await self._request_long_poll()
+        except TimeoutError:
+            self.logger.warning("Long poll сервер не ответил вовремя, повторяем запрос")
+            return
+
+        if batch is None:
+            await asyncio.sleep(10)
+            return
+
+        if batch.failed in (2, 3):
+            self.logger.error("Необходимо обновить ключ LongPoll")
+            await self._get_long_poll_service()
+
+        if batch.ts is not None:
+            self.ts = batch.ts
+
+        # В режиме amqp_publisher апдейты уходят в брокер, а не в локальные шарды
+        if self.publisher is not None:
+            for update in batch.updates:
+                await self.publisher.put(update)
+            return
+
+        for update in batch.updates:
+            self.dispatcher.put(update)
+        await self.dispatcher.wait_for_room()
+
+    def handle_callback_update(self, update: dict) -> bool:
+        """Апдейт от Callback API уходит в те же шарды, что и апдейты long poll.
+        Ставится в очередь без ожидания, чтобы "ok" ушел ВК сразу,
+        а повторы ВК с уже принятым event_id пропускаются
+        :return: False, если переполнение шардов заполнено и апдейт не принят -
+        ВК повторит его позже
+        """
+        if self.dispatcher is None:
+            self.logger.warning("Бот не запущен, апдейт Callback API пропущен")
+            return True
+
+        # До запоминания event_id, иначе повтор ВК сочли бы дубликатом
+        if not self.dispatcher.has_room:
+            self.logger.warning("Шарды переполнены, апдейт Callback API не принят")
+            return False
+
+        event_id = update.get("event_id")
+        if (
+            self.callback_events is not None
+            and event_id is not None
+            and not self.callback_events.add(str(event_id))
+        ):
+            self.logger.info("Повтор апдейта %s от Callback API пропущен", event_id)
+            return True
+
+        try:
+            decoded = decode_update(update)
+        except (KeyError, TypeError):
+            self.logger.exception("Не удалось разобрать апдейт: %s", update)
+            return True
+
+        if decoded is not None:
+            self.dispatcher.put(decoded)
+        return True
 
     async def send_message(
         self, peer_id: int, text: str, keyboard: str | None = None
@@ -243,20 +414,28 @@ class VkApiAccessor(BaseAccessor):
         except KeyError:
             self.logger.exception("В отправленном сообщении нет id")
 
-    async def get_vk_user(self, user_id):
+    async def get_vk_user(self, user_id: int) -> VkUser | None:
+        """Пользователь ВК по id, повторные запросы отдаются из кэша"""
+        return await self.users.get(user_id)
+
+    async def _fetch_vk_users(self, user_ids: list[int]) -> list[VkUser]:
+        """Получает пользователей одним запросом users.get"""
         params = {
-            "user_ids": user_id,
+            "user_ids": ",".join(str(user_id) for user_id in user_ids),
         }
         data = await self._send_request(VkMessagesMethods.get, params)
-        response = data.get("response")
-
-        if response:
-            return VkUser(
-                id=response[0].get("id"),
-                first_name=response[0].get("first_name"),
-                last_name=response[0].get("last_name"),
+        if data is None or data.get("response") is None:
+            self.logger.error("Не удалось получить пользователей: %s", data)
+            return []
+
+        return [
+            VkUser(
+                id=user.get("id"),
+                first_name=user.get("first_name"),
+                last_name=user.get("last_name"),
             )
-        return None
+            for user in data["response"]
+        ]
 
     async def edit_message(
         self, peer_id: int, conversation_message_id, text: str
@@ -0,0 +1,155 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from app.store.vk_api.scheduler import RequestPriority
+
+# Ограничение ВК на кол-во обращений к API внутри одного execute
+EXECUTE_MAX_CALLS = 25
+
+
+@dataclass
+class BatchedCall:
+    method: str
+    params: dict
+    priority: RequestPriority = RequestPriority.MESSAGE
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+@dataclass
+class BatcherStats:
+    calls: int = 0
+    requests: int = 0
+    executes: int = 0
+
+    @property
+    def avg_batch_size(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.calls / self.requests
+
+
+class VkExecuteBatcher:
+    """Копит вызовы API, пришедшие в течение короткого окна, и отправляет
+    до 25 штук одним запросом execute.
+    Каждый вызывающий получает свой результат в том же виде,
+    в каком его вернул бы отдельный запрос: {"response": ...} или {"error": ...}.
+    Срочный вызов (ответ на нажатие кнопки) не ждет окна - пачка уходит сразу
+    с приоритетом самого важного вызова в ней.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, dict, RequestPriority], Awaitable[dict | None]],
+        window: float,
+        max_size: int = EXECUTE_MAX_CALLS,
+    ):
+        """Батчер исходящих запросов
+        :param send: корутина отправки одного запроса к API
+        (метод, параметры, приоритет)
+        :param window: сколько секунд копить вызовы перед отправкой
+        :param max_size: максимальное кол-во вызовов в одном execute
+        """
+        self.logger = getLogger(__name__)
+        self._send = send
+        self.window = window
+        self.max_size = min(max_size, EXECUTE_MAX_CALLS)
+        self.stats = BatcherStats()
+
+        self._pending: list[BatchedCall] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def call(
+        self,
+        method: str,
+        params: dict,
+        priority: RequestPriority = RequestPriority.MESSAGE,
+    ) -> dict | None:
+        batched_call = BatchedCall(method=method, params=params, priority=priority)
+        self._pending.append(batched_call)
+        self.stats.calls += 1
+
+        if (
+            len(self._pending) >= self.max_size
+            or priority == RequestPriority.EVENT_ANSWER
+        ):
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        return await batched_call.future
+
+    async def close(self) -> None:
+        """Отправляет всё накопленное и дожидается ответов"""
+        self._flush()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _send_batch(self, batch: list[BatchedCall]) -> None:
+        self.stats.requests += 1
+        priority = min(batched_call.priority for batched_call in batch)
+        try:
+            if len(batch) == 1:
+                results = [await self._send(batch[0].method, batch[0].params, priority)]
+            else:
+                self.stats.executes += 1
+                results = self._split_response(
+                    await self._send(
+                        "execute", {"code": build_execute_code(batch)}, priority
+                    ),
+                    len(batch),
+                )
+
+        except Exception as exc:
+            for batched_call in batch:
+                if not batched_call.future.done():
+                    batched_call.future.set_exception(exc)
+            return
+
+        for batched_call, result in zip(batch, results, strict=True):
+            if not batched_call.future.done():
+                batched_call.future.set_result(result)
+
+    def _split_response(self, data: dict | None, size: int) -> list[dict | None]:
+        """Раскладывает ответ execute на ответы отдельных вызовов.
+        Упавшие вызовы ВК возвращает как false, а ошибки по порядку
+        складывает в execute_errors.
+        """
+        if data is None or len(data.get("response") or []) != size:
+            self.logger.error("Не удалось выполнить execute: %s", data)
+            return [data] * size
+
+        errors = iter(data.get("execute_errors", []))
+        results = []
+        for response in data["response"]:
+            if response is False:
+                results.append({"error": next(errors, None)})
+            else:
+                results.append({"response": response})
+
+        return results
+
+
+def build_execute_code(batch: list[BatchedCall]) -> str:
+    calls = ",".join(
+        f"API.{call.method}({json.dumps(call.params, ensure_ascii=False)})"
+        for call in batch
+    )
+    return f"return [{calls}];"
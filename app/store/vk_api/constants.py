@@ -15,3 +15,16 @@ API_PATH = "https://api.vk.com/method/"
 API_VERSION = "5.131"
 VK_METHOD_ACT = "a_check"
 VK_METHOD_WAIT = 25
+
+# Способы получения апдейтов от ВК
+BOT_MODE_LONG_POLL = "long_poll"
+BOT_MODE_CALLBACK = "callback"
+# Прием и обработка в разных процессах через брокер сообщений
+BOT_MODE_AMQP_PUBLISHER = "amqp_publisher"
+BOT_MODE_AMQP_WORKER = "amqp_worker"
+BOT_MODES = (
+    BOT_MODE_LONG_POLL,
+    BOT_MODE_CALLBACK,
+    BOT_MODE_AMQP_PUBLISHER,
+    BOT_MODE_AMQP_WORKER,
+)
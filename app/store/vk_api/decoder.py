@@ -0,0 +1,133 @@
+import json
+from dataclasses import dataclass
+from logging import getLogger
+
+from app.store.vk_api.dataclasses import (
+    EventObject,
+    EventPayload,
+    EventUpdate,
+    MessageObject,
+    MessageUpdate,
+    VkMessage,
+)
+
+logger = getLogger(__name__)
+
+MESSAGE_NEW = "message_new"
+MESSAGE_EVENT = "message_event"
+
+
+@dataclass(slots=True)
+class LongPollBatch:
+    """Разобранный ответ long poll сервера
+    ts - номер последнего события, с которого продолжать опрос
+    failed - код ошибки long poll (1 - устарел ts, 2/3 - нужен новый ключ)
+    updates - апдейты, которые умеет обрабатывать бот
+    """
+
+    ts: str | None
+    failed: int | None
+    updates: list[MessageUpdate | EventUpdate]
+
+
+def decode_long_poll(raw: bytes | str) -> LongPollBatch:
+    """Разбирает ответ long poll сервера сразу в апдейты бота.
+    Апдейты неизвестных типов отбрасываются до разбора их содержимого.
+    :param raw: тело ответа long poll сервера
+    """
+    data = json.loads(raw)
+    updates = []
+
+    for update in data.get("updates") or ():
+        try:
+            decoded = decode_update(update)
+        except (KeyError, TypeError):
+            logger.exception("Не удалось разобрать апдейт: %s", update)
+            continue
+
+        if decoded is not None:
+            updates.append(decoded)
+
+    ts = data.get("ts")
+    return LongPollBatch(
+        ts=str(ts) if ts is not None else None,
+        failed=data.get("failed"),
+        updates=updates,
+    )
+
+
+def decode_update(update: dict) -> MessageUpdate | EventUpdate | None:
+    """Собирает апдейт бота из одного апдейта ВК,
+    возвращает None для типов, которые бот не обрабатывает
+    """
+    update_type = update.get("type")
+
+    if update_type == MESSAGE_NEW:
+        message = update["object"]["message"]
+        return MessageUpdate(
+            event_id=update["event_id"],
+            group_id=update["group_id"],
+            object=MessageObject(
+                message=VkMessage(
+                    conversation_message_id=message["conversation_message_id"],
+                    date=message["date"],
+                    from_id=message["from_id"],
+                    peer_id=message["peer_id"],
+                    text=message["text"],
+                )
+            ),
+        )
+
+    if update_type == MESSAGE_EVENT:
+        event = update["object"]
+        payload = event["payload"]
+        return EventUpdate(
+            event_id=update["event_id"],
+            group_id=update["group_id"],
+            type=update_type,
+            object=EventObject(
+                event_id=event["event_id"],
+                peer_id=event["peer_id"],
+                user_id=event["user_id"],
+                payload=EventPayload(text=payload["text"], type=payload["type"]),
+            ),
+        )
+
+    return None
+
+
+def encode_update(update: MessageUpdate | EventUpdate) -> bytes:
+    """Сериализует апдейт бота обратно в формат ВК, чтобы передать его
+    другому процессу, который разберет его через decode_update
+    """
+    if isinstance(update, MessageUpdate):
+        message = update.object.message
+        data = {
+            "type": MESSAGE_NEW,
+            "event_id": update.event_id,
+            "group_id": update.group_id,
+            "object": {
+                "message": {
+                    "conversation_message_id": message.conversation_message_id,
+                    "date": message.date,
+                    "from_id": message.from_id,
+                    "peer_id": message.peer_id,
+                    "text": message.text,
+                }
+            },
+        }
+    else:
+        event = update.object
+        data = {
+            "type": MESSAGE_EVENT,
+            "event_id": update.event_id,
+            "group_id": update.group_id,
+            "object": {
+                "event_id": event.event_id,
+                "peer_id": event.peer_id,
+                "user_id": event.user_id,
+                "payload": {"text": event.payload.text, "type": event.payload.type},
+            },
+        }
+
+    return json.dumps(data, ensure_ascii=False).encode()
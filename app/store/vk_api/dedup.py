@@ -0,0 +1,41 @@
+import time
+from collections import OrderedDict
+
+
+class RecentEventIds:
+    """event_id недавно принятых апдейтов.
+    ВК повторяет апдейт Callback API с тем же event_id, если не дождался
+    "ok", поэтому повтор в пределах ttl не обрабатывается второй раз.
+    id хранятся в порядке прихода, и устаревшие удаляются с начала.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        """Недавние event_id
+        :param ttl: сколько секунд помнить event_id
+        :param max_size: максимум запоминаемых id, дальше забываются старые
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.duplicates = 0
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, event_id: str) -> bool:
+        """Запоминает event_id
+        :return: False, если апдейт с этим event_id уже приходил
+        """
+        now = time.monotonic()
+        while self._seen:
+            oldest, added_at = next(iter(self._seen.items()))
+            if now - added_at < self.ttl and len(self._seen) < self.max_size:
+                break
+            del self._seen[oldest]
+
+        if event_id in self._seen:
+            self.duplicates += 1
+            return False
+
+        self._seen[event_id] = now
+        return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -0,0 +1,272 @@
+import asyncio
+import time
+import typing
+from asyncio import Task
+from collections import deque
+from dataclasses import dataclass
+from logging import getLogger
+
+from app.metrics.metrics import OVERFLOWED_UPDATES
+from app.metrics.tracing import TRACER
+from app.store.vk_api.dataclasses import EventUpdate, MessageUpdate
+from app.store.vk_api.decoder import MESSAGE_EVENT, MESSAGE_NEW
+
+if typing.TYPE_CHECKING:
+    from app.web.app import Application
+
+Update = MessageUpdate | EventUpdate
+ShardItem = tuple[float, Update, asyncio.Future | None]
+
+
+@dataclass
+class DispatcherStats:
+    """Счетчики шарда
+    processed - кол-во обработанных апдейтов
+    failed - кол-во апдейтов, обработка которых упала с исключением
+    overflowed - кол-во апдейтов, ушедших в переполнение шарда
+    last_lag/max_lag/total_lag - время (сек) от постановки апдейта в очередь
+    до начала его обработки воркером
+    """
+
+    processed: int = 0
+    failed: int = 0
+    overflowed: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+    total_lag: float = 0.0
+
+    def add_lag(self, lag: float) -> None:
+        self.last_lag = lag
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+    @property
+    def avg_lag(self) -> float:
+        if self.processed == 0:
+            return 0.0
+        return self.total_lag / self.processed
+
+
+class Shard:
+    """Очередь апдейтов группы бесед и единственный воркер, который её разбирает.
+    Один воркер на шард гарантирует, что апдейты одной беседы
+    обрабатываются строго по очереди.
+    Апдейты, не поместившиеся в очередь, ждут в переполнении (overflow)
+    и переходят в очередь по мере ее разбора. Когда в переполнении набирается
+    overflow_size апдейтов, room сбрасывается - прием апдейтов ждет места.
+    """
+
+    def __init__(self, number: int, queue_size: int, overflow_size: int):
+        self.number = number
+        self.queue: asyncio.Queue[ShardItem] = asyncio.Queue(maxsize=queue_size)
+        self.overflow: deque[ShardItem] = deque()
+        self.overflow_size = overflow_size
+        self.room = asyncio.Event()
+        self.room.set()
+        self.stats = DispatcherStats()
+        self.worker: Task | None = None
+
+    def put(self, item: ShardItem) -> None:
+        # Пока переполнение не разобрано, новые апдейты встают за ним,
+        # иначе апдейты одной беседы обогнали бы друг друга
+        if not self.overflow and not self.queue.full():
+            self.queue.put_nowait(item)
+            return
+
+        self.overflow.append(item)
+        self.stats.overflowed += 1
+        OVERFLOWED_UPDATES.inc(str(self.number))
+        if len(self.overflow) >= self.overflow_size:
+            self.room.clear()
+
+    def refill(self) -> None:
+        """Переносит апдейты из переполнения в освободившуюся очередь"""
+        while self.overflow and not self.queue.full():
+            self.queue.put_nowait(self.overflow.popleft())
+        if len(self.overflow) < self.overflow_size:
+            self.room.set()
+
+    def get_stats(self) -> dict:
+        return {
+            "shard": self.number,
+            "queue_depth": self.queue.qsize(),
+            "overflow_depth": len(self.overflow),
+            "processed": self.stats.processed,
+            "failed": self.stats.failed,
+            "overflowed": self.stats.overflowed,
+            "last_lag": self.stats.last_lag,
+            "avg_lag": self.stats.avg_lag,
+            "max_lag": self.stats.max_lag,
+        }
+
+
+class UpdateDispatcher:
+    """Долгоживущий пул воркеров, разбирающий апдейты от ВК.
+    Поллер только складывает апдейты в очереди и сразу уходит
+    за следующей пачкой, обработка идет независимо от приема.
+
+    Апдейты раскладываются по шардам по peer_id: сообщения одной беседы
+    всегда попадают в один шард и обрабатываются по порядку, разные беседы
+    в разных шардах обрабатываются параллельно.
+    put не ждет места в очереди и не теряет апдейты: поллер один на все
+    беседы, и ожидание одного заполненного шарда остановило бы прием апдейтов
+    всех бесед. Не поместившийся апдейт ждет в переполнении шарда, а когда
+    переполнение заполнено, поллер перед следующим запросом к ВК ждет места
+    (wait_for_room) и не сдвигает ts, так что ВК придержит новые апдейты у себя.
+    submit, наоборот, сразу ждет места (backpressure): его вызывает потребитель
+    партиции брокера, и неподтвержденные апдейты остаются в брокере.
+    """
+
+    # Сколько секунд при остановке ждем разбора уже принятых апдейтов
+    _drain_timeout = 5.0
+
+    def __init__(
+        self,
+        app: "Application",
+        shards: int,
+        shard_queue_size: int,
+        shard_overflow_size: int = 5000,
+    ):
+        if shards < 1:
+            raise ValueError("Кол-во шардов должно быть больше 0")
+
+        self.app = app
+        self.logger = getLogger(__name__)
+        self.shards = [
+            Shard(number, shard_queue_size, shard_overflow_size)
+            for number in range(shards)
+        ]
+
+    @property
+    def is_running(self) -> bool:
+        return any(shard.worker for shard in self.shards)
+
+    @property
+    def has_room(self) -> bool:
+        """False, если переполнение какого-то шарда заполнено"""
+        return all(shard.room.is_set() for shard in self.shards)
+
+    def start(self) -> None:
+        self.logger.info("Запускаем %s шардов обработки апдейтов", len(self.shards))
+        for shard in self.shards:
+            shard.worker = asyncio.create_task(
+                self._worker(shard), name=f"update_shard_{shard.number}"
+            )
+
+    async def stop(self) -> None:
+        """Дожидается обработки уже принятых апдейтов и останавливает воркеры"""
+        try:
+            async with asyncio.timeout(self._drain_timeout):
+                await asyncio.gather(*(shard.queue.join() for shard in self.shards))
+        except TimeoutError:
+            self.logger.warning(
+                "Не дождались обработки очереди, осталось %s апдейтов",
+                sum(shard.queue.qsize() for shard in self.shards),
+            )
+
+        workers = [shard.worker for shard in self.shards if shard.worker]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        for shard in self.shards:
+            shard.worker = None
+            shard.overflow.clear()
+            shard.room.set()
+            # Необработанные апдейты, поставленные через submit, не считаются
+            # выполненными - их отправитель сам решает, что с ними делать
+            while not shard.queue.empty():
+                _, _, done = shard.queue.get_nowait()
+                shard.queue.task_done()
+                if done is not None:
+                    done.cancel()
+
+    @staticmethod
+    def get_peer_id(update: Update) -> int:
+        if isinstance(update, MessageUpdate):
+            return update.object.message.peer_id
+        return update.object.peer_id
+
+    def get_shard(self, peer_id: int) -> Shard:
+        return self.shards[hash(peer_id) % len(self.shards)]
+
+    def put(self, update: Update) -> None:
+        """Ставит апдейт в очередь шарда без ожидания,
+        при заполненной очереди - в переполнение шарда
+        """
+        shard = self.get_shard(self.get_peer_id(update))
+        shard.put((time.monotonic(), update, None))
+        if not shard.room.is_set():
+            self.logger.warning(
+                "Переполнение шарда %s заполнено (%s апдейтов), прием ждет места",
+                shard.number,
+                len(shard.overflow),
+            )
+
+    async def wait_for_room(self) -> None:
+        """Ждет, пока переполнение всех шардов не опустится ниже предела"""
+        for shard in self.shards:
+            await shard.room.wait()
+
+    async def submit(self, update: Update) -> asyncio.Future:
+        """Ставит апдейт в очередь как put, но возвращает future,
+        который завершится, когда воркер закончит обработку апдейта
+        (в том числе с ошибкой - она записывается в статистику шарда).
+        """
+        done = asyncio.get_running_loop().create_future()
+        shard = self.get_shard(self.get_peer_id(update))
+        await shard.queue.put((time.monotonic(), update, done))
+        return done
+
+    async def _worker(self, shard: Shard) -> None:
+        while True:
+            enqueued_at, update, done = await shard.queue.get()
+            lag = time.monotonic() - enqueued_at
+            shard.stats.add_lag(lag)
+
+            try:
+                # Трасса апдейта начинается с постановки в очередь шарда
+                with TRACER.trace(
+                    MESSAGE_NEW if isinstance(update, MessageUpdate) else MESSAGE_EVENT,
+                    started_at=enqueued_at,
+                    peer_id=self.get_peer_id(update),
+                    shard=shard.number,
+                ):
+                    TRACER.add_span("UpdateDispatcher.queue", enqueued_at, lag)
+                    await self._handle(update)
+            except asyncio.CancelledError:
+                if done is not None:
+                    done.cancel()
+                raise
+            except Exception:
+                shard.stats.failed += 1
+                self.logger.exception("Не вышло переслать апдейт в Bot Manager")
+            finally:
+                shard.stats.processed += 1
+                # До task_done, чтобы join не завершился при непустом переполнении
+                shard.refill()
+                shard.queue.task_done()
+                if done is not None and not done.done():
+                    done.set_result(None)
+
+    async def _handle(self, update: Update) -> None:
+        if isinstance(update, MessageUpdate):
+            await self.app.store.bots_manager.handle_updates([update])
+
+        elif isinstance(update, EventUpdate):
+            await self.app.store.bots_manager.handle_events([update])
+
+    def get_stats(self) -> dict:
+        shards = [shard.get_stats() for shard in self.shards]
+        return {
+            "shards_count": len(self.shards),
+            "shard_queue_max_size": self.shards[0].queue.maxsize,
+            "shard_overflow_max_size": self.shards[0].overflow_size,
+            "queue_depth": sum(shard["queue_depth"] for shard in shards),
+            "overflow_depth": sum(shard["overflow_depth"] for shard in shards),
+            "processed": sum(shard["processed"] for shard in shards),
+            "failed": sum(shard["failed"] for shard in shards),
+            "overflowed": sum(shard["overflowed"] for shard in shards),
+            "max_lag": max(shard["max_lag"] for shard in shards),
+            "shards": shards,
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from logging import getLogger
+
+
+@dataclass
+class EditStats:
+    """requested - кол-во запрошенных правок
+    written - кол-во правок, фактически отправленных в ВК
+    """
+
+    requested: int = 0
+    written: int = 0
+
+
+@dataclass
+class EditState:
+    """Желаемый и последний записанный текст одного сообщения"""
+
+    text: str | None = None
+    written_text: str | None = None
+    last_write: float = float("-inf")
+    task: asyncio.Task | None = None
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MessageEditCoalescer:
+    """Склеивает частые правки одного сообщения.
+    Для каждого сообщения (peer_id, conversation_message_id) хранится только
+    последний желаемый текст, в ВК он уходит не чаще раза в interval секунд.
+    Первая правка после паузы уходит сразу, последняя записывается всегда:
+    пока желаемый текст отличается от записанного, сообщение будет отредактировано.
+    """
+
+    def __init__(
+        self,
+        edit: Callable[[int, int, str], Awaitable[None]],
+        interval: float,
+    ):
+        """Склейка правок сообщений
+        :param edit: корутина правки сообщения (peer_id, conversation_message_id, text)
+        :param interval: минимальный интервал между правками одного сообщения, сек
+        """
+        self.logger = getLogger(__name__)
+        self._edit = edit
+        self.interval = interval
+        self.stats = EditStats()
+        self._states: dict[tuple[int, int], EditState] = {}
+
+    def edit(self, peer_id: int, conversation_message_id: int, text: str) -> None:
+        """Запоминает новый текст сообщения, отправка идет в фоне"""
+        key = (peer_id, conversation_message_id)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = EditState()
+
+        state.text = text
+        self.stats.requested += 1
+
+        if state.task is None:
+            state.task = asyncio.create_task(self._write(key, state))
+
+    async def flush(self, peer_id: int | None = None) -> None:
+        """Сразу записывает ожидающие правки беседы (или всех бесед) и забывает
+        о сообщениях беседы - вызывается, когда сообщения больше не будут меняться
+        """
+        keys = [key for key in self._states if peer_id is None or key[0] == peer_id]
+        states = [self._states.pop(key) for key in keys]
+
+        for state in states:
+            state.wake.set()
+        await asyncio.gather(
+            *(state.task for state in states if state.task), return_exceptions=True
+        )
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def get_stats(self) -> dict:
+        return {
+            "messages": len(self._states),
+            "requested": self.stats.requested,
+            "written": self.stats.written,
+        }
+
+    async def _write(self, key: tuple[int, int], state: EditState) -> None:
+        try:
+            while state.text != state.written_text:
+                delay = state.last_write + self.interval - time.monotonic()
+                if delay > 0 and not state.wake.is_set():
+                    try:
+                        async with asyncio.timeout(delay):
+                            await state.wake.wait()
+                    except TimeoutError:
+                        pass
+
+                text = state.text
+                state.last_write = time.monotonic()
+                await self._edit(key[0], key[1], text)
+                state.written_text = text
+                self.stats.written += 1
+
+        except Exception:
+            self.logger.exception("Не удалось отредактировать сообщение %s", key)
+
+        finally:
+            state.task = None
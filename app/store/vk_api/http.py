@@ -0,0 +1,107 @@
+import typing
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from aiohttp import (
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+)
+
+if typing.TYPE_CHECKING:
+    from app.web.config import VkHttpPoolConfig
+
+
+@dataclass
+class HttpPoolStats:
+    """Счетчики пула соединений
+    active - запросы от начала до освобождения ответа
+    waiting - запросы, ждущие свободного соединения
+    created - открыто новых соединений
+    reused - запросов ушло по уже открытому keep-alive соединению
+    """
+
+    active: int = 0
+    waiting: int = 0
+    created: int = 0
+    reused: int = 0
+
+
+class HttpPool:
+    """Сессия со своим пулом соединений и таймаутами на каждый запрос.
+    Загрузку пула считаем сами: ожидание и открытие соединений - через
+    TraceConfig, занятость - на время запроса в request. Приватные поля
+    TCPConnector для этого не годятся, они меняются между версиями aiohttp.
+    """
+
+    def __init__(self, config: "VkHttpPoolConfig"):
+        self.config = config
+        self.stats = HttpPoolStats()
+
+        trace_config = TraceConfig()
+        trace_config.on_connection_queued_start.append(self._on_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_queued_end)
+        trace_config.on_connection_create_end.append(self._on_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_reuseconn)
+
+        connector = TCPConnector(
+            ssl=False,
+            limit=config.limit,
+            limit_per_host=config.limit_per_host,
+            keepalive_timeout=config.keepalive_timeout,
+            ttl_dns_cache=config.ttl_dns_cache,
+            use_dns_cache=config.ttl_dns_cache > 0,
+        )
+        timeout = ClientTimeout(
+            total=config.total_timeout,
+            connect=config.connect_timeout,
+        )
+        self.session = ClientSession(
+            connector=connector, timeout=timeout, trace_configs=[trace_config]
+        )
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str, **kwargs
+    ) -> AsyncIterator[ClientResponse]:
+        """Запрос через пул, соединение занято до выхода из контекста"""
+        self.stats.active += 1
+        try:
+            async with self.session.request(method, url, **kwargs) as response:
+                yield response
+        finally:
+            self.stats.active -= 1
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    def get_stats(self) -> dict:
+        """Загрузка пула соединений:
+        in_use - соединения, занятые запросами
+        waiting - запросы, ждущие свободного соединения
+        created/reused - открыто соединений / переиспользовано keep-alive
+        """
+        return {
+            "limit": self.config.limit,
+            "limit_per_host": self.config.limit_per_host,
+            "in_use": self.stats.active - self.stats.waiting,
+            "waiting": self.stats.waiting,
+            "created": self.stats.created,
+            "reused": self.stats.reused,
+        }
+
+    # Хуки TraceConfig должны быть корутинами
+    async def _on_queued_start(self, *_) -> None:
+        self.stats.waiting += 1
+
+    async def _on_queued_end(self, *_) -> None:
+        self.stats.waiting -= 1
+
+    async def _on_create_end(self, *_) -> None:
+        self.stats.created += 1
+
+    async def _on_reuseconn(self, *_) -> None:
+        self.stats.reused += 1
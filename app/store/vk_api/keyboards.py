@@ -0,0 +1,27 @@
+from functools import cache
+
+from app.store.game.constants import VkButtons
+from app.store.vk_api.utils import VkKeyboard
+
+Layout = tuple[tuple[VkButtons, ...], ...]
+
+
+@cache
+def get_keyboard(
+    layout: Layout = (), one_time: bool = False, inline: bool = False
+) -> str:
+    """Сериализованная клавиатура для раскладки кнопок.
+    Клавиатура собирается и сериализуется один раз, дальше отдается из кэша.
+    :param layout: ряды кнопок, например ((BTN_REG_ON, BTN_REG_OFF),)
+    """
+    keyboard = VkKeyboard(one_time=one_time, inline=inline)
+    for row in layout:
+        keyboard.add_row([button.value for button in row])
+    return keyboard.dumps()
+
+
+# Клавиатуры игры, собранные при импорте
+EMPTY_KEYBOARD = get_keyboard()
+EMPTY_ONE_TIME_KEYBOARD = get_keyboard(one_time=True)
+REGISTRATION_KEYBOARD = get_keyboard(((VkButtons.BTN_REG_ON, VkButtons.BTN_REG_OFF),))
+QUESTION_KEYBOARD = get_keyboard(((VkButtons.BTN_ANSWER,),))
@@ -2,6 +2,7 @@ import asyncio
 from asyncio import Future, Task
 from logging import getLogger
 
+from app.metrics.metrics import POLL_CYCLE_SECONDS
 from app.store import Store
 
 
@@ -14,7 +15,7 @@ class Poller:
 
     def _done_callback(self, result: Future) -> None:
         if result.exception():
-            self.store.bots_manager.logger.exception(
+            self.logger.exception(
                 "poller stopped with exception", exc_info=result.exception()
             )
         if self.is_running:
@@ -34,7 +35,8 @@ class Poller:
     async def poll(self) -> None:
         while self.is_running:
             try:
-                await self.store.vk_api.poll()
+                with POLL_CYCLE_SECONDS.time():
+                    await self.store.vk_api.poll()
             except Exception as e:
                 self.logger.exception("Poll error, Бот остановлен!", exc_info=e)
                 await self.stop()
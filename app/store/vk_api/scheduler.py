@@ -0,0 +1,197 @@
+import asyncio
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from logging import getLogger
+
+from app.store.vk_api.constants import VkMessagesMethods
+
+
+class RequestPriority(IntEnum):
+    """Классы исходящих запросов, меньше - важнее.
+    EVENT_ANSWER - ответы на нажатие callback-кнопки, у ВК на них несколько секунд
+    MESSAGE - сообщения в беседу и запросы, которых ждет игра
+    BACKGROUND - правки, закрепы и реакции, которые могут подождать
+    """
+
+    EVENT_ANSWER = 0
+    MESSAGE = 1
+    BACKGROUND = 2
+
+
+METHOD_PRIORITIES = {
+    VkMessagesMethods.send_event_answer: RequestPriority.EVENT_ANSWER,
+    VkMessagesMethods.send: RequestPriority.MESSAGE,
+    VkMessagesMethods.get: RequestPriority.MESSAGE,
+    VkMessagesMethods.edit: RequestPriority.BACKGROUND,
+    VkMessagesMethods.pin: RequestPriority.BACKGROUND,
+    VkMessagesMethods.unpin: RequestPriority.BACKGROUND,
+    VkMessagesMethods.send_reaction: RequestPriority.BACKGROUND,
+}
+
+
+@dataclass
+class PriorityStats:
+    """Счетчики класса запросов
+    requests/wait - HTTP запросы класса и их ожидание в очереди планировщика
+    calls/latency - вызовы API класса и время от вызова до ответа ВК,
+    включая окно батчинга и очередь
+    """
+
+    requests: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    calls: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def add_wait(self, wait: float) -> None:
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def add_latency(self, latency: float) -> None:
+        self.calls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "avg_wait": self.total_wait / self.requests if self.requests else 0.0,
+            "max_wait": self.max_wait,
+            "calls": self.calls,
+            "avg_latency": self.total_latency / self.calls if self.calls else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+
+class TokenBucket:
+    """Ограничение частоты: rate запросов в секунду, до burst подряд"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(order=True)
+class ScheduledRequest:
+    priority: RequestPriority
+    number: int
+    method: str = field(compare=False)
+    params: dict = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class RequestScheduler:
+    """Очередь исходящих запросов к ВК с приоритетами.
+    Запросы уходят не чаще rate в секунду (лимит ВК на токен сообщества),
+    из очереди первым всегда берется самый важный класс, внутри класса - по порядку.
+    Сам запрос выполняется в фоне, планировщик сразу берет следующий.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, dict], Awaitable[dict | None]],
+        rate: float,
+        burst: int,
+    ):
+        """Планировщик запросов
+        :param send: корутина отправки одного запроса к API (метод, параметры)
+        :param rate: запросов в секунду
+        :param burst: сколько запросов можно отправить подряд после простоя
+        """
+        self.logger = getLogger(__name__)
+        self._send = send
+        self.bucket = TokenBucket(rate, burst)
+        self.stats = {priority: PriorityStats() for priority in RequestPriority}
+
+        self._queue: asyncio.PriorityQueue[ScheduledRequest] = asyncio.PriorityQueue()
+        self._numbers = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self._requests: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._worker = asyncio.create_task(self._run(), name="vk_request_scheduler")
+
+    async def close(self) -> None:
+        """Отправляет все запросы из очереди и дожидается ответов"""
+        await self._queue.join()
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        await asyncio.gather(*self._requests, return_exceptions=True)
+
+    async def submit(
+        self, method: str, params: dict, priority: RequestPriority
+    ) -> dict | None:
+        request = ScheduledRequest(
+            priority=priority,
+            number=next(self._numbers),
+            method=method,
+            params=params,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._queue.put_nowait(request)
+        return await request.future
+
+    def record_latency(self, priority: RequestPriority, latency: float) -> None:
+        self.stats[priority].add_latency(latency)
+
+    def get_stats(self) -> dict:
+        return {
+            "rate": self.bucket.rate,
+            "queued": self._queue.qsize(),
+            "in_flight": len(self._requests),
+            "classes": {
+                priority.name.lower(): stats.to_dict()
+                for priority, stats in self.stats.items()
+            },
+        }
+
+    async def _run(self) -> None:
+        while True:
+            # Сначала ждем разрешения лимита, потом берем запрос - так пока
+            # планировщик ждет, в очередь успевают встать более важные запросы
+            await self.bucket.acquire()
+            request = await self._queue.get()
+            try:
+                self.stats[request.priority].add_wait(
+                    time.monotonic() - request.enqueued_at
+                )
+                task = asyncio.create_task(self._execute(request))
+                self._requests.add(task)
+                task.add_done_callback(self._requests.discard)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, request: ScheduledRequest) -> None:
+        try:
+            result = await self._send(request.method, request.params)
+        except Exception as exc:
+            if not request.future.done():
+                request.future.set_exception(exc)
+            return
+
+        if not request.future.done():
+            request.future.set_result(result)
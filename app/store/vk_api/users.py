@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from logging import getLogger
+
+from app.store.vk_api.dataclasses import VkUser
+
+# users.get принимает до 1000 id, но большие пачки не нужны - окно короткое
+USERS_GET_MAX_IDS = 100
+
+
+@dataclass
+class UserCacheStats:
+    """Счетчики кэша пользователей
+    hits - ответы из кэша
+    misses - id, за которыми пришлось идти в ВК
+    coalesced - запросы, дождавшиеся уже летящего запроса за тем же id
+    fetches - кол-во запросов users.get
+    """
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+
+
+class VkUserCache:
+    """LRU кэш пользователей ВК с временем жизни записей.
+    Одновременные запросы одного id ждут один и тот же запрос к ВК,
+    а id, запрошенные в течение короткого окна, уходят одним users.get.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[list[int]], Awaitable[Iterable[VkUser]]],
+        max_size: int,
+        ttl: float,
+        window: float,
+    ):
+        """Кэш пользователей ВК
+        :param fetch: корутина, получающая пользователей по списку id
+        :param max_size: максимум пользователей в кэше
+        :param ttl: сколько секунд пользователь живет в кэше
+        :param window: сколько секунд копить id перед запросом users.get
+        """
+        self.logger = getLogger(__name__)
+        self._fetch = fetch
+        self.max_size = max_size
+        self.ttl = ttl
+        self.window = window
+        self.stats = UserCacheStats()
+
+        self._users: OrderedDict[int, tuple[float, VkUser]] = OrderedDict()
+        self._in_flight: dict[int, asyncio.Future] = {}
+        self._pending: list[int] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._fetches: set[asyncio.Task] = set()
+
+    async def get(self, user_id: int) -> VkUser | None:
+        user_id = int(user_id)
+
+        user = self._get_cached(user_id)
+        if user is not None:
+            self.stats.hits += 1
+            return user
+
+        future = self._in_flight.get(user_id)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[user_id] = future
+        self._pending.append(user_id)
+
+        if len(self._pending) >= USERS_GET_MAX_IDS:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        return await asyncio.shield(future)
+
+    def put(self, user: VkUser) -> None:
+        self._users[user.id] = (time.monotonic() + self.ttl, user)
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    async def close(self) -> None:
+        """Отправляет накопленные id и дожидается ответов"""
+        self._flush()
+        await asyncio.gather(*self._fetches, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "size": len(self._users),
+            "max_size": self.max_size,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "coalesced": self.stats.coalesced,
+            "fetches": self.stats.fetches,
+        }
+
+    def _get_cached(self, user_id: int) -> VkUser | None:
+        cached = self._users.get(user_id)
+        if cached is None:
+            return None
+
+        expires_at, user = cached
+        if expires_at < time.monotonic():
+            del self._users[user_id]
+            return None
+
+        self._users.move_to_end(user_id)
+        return user
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        user_ids, self._pending = self._pending, []
+        task = asyncio.create_task(self._fetch_users(user_ids))
+        self._fetches.add(task)
+        task.add_done_callback(self._fetches.discard)
+
+    async def _fetch_users(self, user_ids: list[int]) -> None:
+        self.stats.fetches += 1
+        users = {}
+        try:
+            users = {user.id: user for user in await self._fetch(user_ids)}
+        except Exception:
+            self.logger.exception("Не удалось получить пользователей %s", user_ids)
+
+        for user_id in user_ids:
+            user = users.get(user_id)
+            if user is not None:
+                self.put(user)
+
+            future = self._in_flight.pop(user_id)
+            if not future.done():
+                future.set_result(user)
@@ -1,5 +1,4 @@
 import json
-from logging import getLogger
 
 
 class VkButton:
@@ -36,9 +35,8 @@ class VkKeyboard:
     def __init__(self, one_time: bool = False, inline: bool = False):
         self.keyboard = {"one_time": one_time, "buttons": [], "inline": inline}
         self.buttons = 0
-        self.logger = getLogger("VkKeyboard")
 
-    async def add_line(self, buttons: list[dict]):
+    def add_row(self, buttons: list[dict]) -> "VkKeyboard":
         if len(buttons) > self._max_width:
             raise ValueError(
                 "Слишком много кнопок в ряде: должно быть меньше: %s ",
@@ -53,6 +51,15 @@ class VkKeyboard:
             )
 
         self.keyboard["buttons"].append(buttons)
+        return self
 
-    async def get_keyboard(self):
+    def dumps(self) -> str:
         return json.dumps(self.keyboard, ensure_ascii=False)
+
+    async def add_line(self, buttons: list[dict]):
+        """Асинхронная обертка над add_row, оставлена для совместимости"""
+        self.add_row(buttons)
+
+    async def get_keyboard(self):
+        """Асинхронная обертка над dumps, оставлена для совместимости"""
+        return self.dumps()
@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.store.database import BaseModel
@@ -6,8 +6,27 @@ from app.store.database import BaseModel
 
 class VkMessage(BaseModel):
     __tablename__ = "vk_messages"
+    # Страницы сообщений беседы листаются по id
+    __table_args__ = (
+        Index("ix_vk_messages_conversation_id_id", "conversation_id", "id"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     conversation_id: Mapped[int] = mapped_column(nullable=False)
     text: Mapped[str] = mapped_column(nullable=False)
     user_id: Mapped[int] = mapped_column(nullable=False)
     date: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+
+
+class VkConversation(BaseModel):
+    """Сводка по беседе: последнее сообщение и кол-во сообщений.
+    Обновляется в той же транзакции, что и запись сообщений
+    """
+
+    __tablename__ = "vk_conversations"
+    conversation_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    last_message_id: Mapped[int] = mapped_column(nullable=False, index=True)
+    last_text: Mapped[str] = mapped_column(nullable=False)
+    last_user_id: Mapped[int] = mapped_column(nullable=False)
+    last_activity: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
+    messages_count: Mapped[int] = mapped_column(nullable=False, default=0)
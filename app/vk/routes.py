@@ -1,6 +1,12 @@
 import typing
 
-from app.vk.views import ConversationsListView, MessagesListView
+from app.vk.views import (
+    BotStatsView,
+    CallbackView,
+    ConversationsListView,
+    MessagesExportView,
+    MessagesListView,
+)
 
 if typing.TYPE_CHECKING:
     from app.web.app import Application
@@ -8,4 +14,7 @@ if typing.TYPE_CHECKING:
 
 def setup_routes(app: "Application"):
     app.router.add_view("/api/v1/vk/messages_list", MessagesListView)
+    app.router.add_view("/api/v1/vk/messages_export", MessagesExportView)
     app.router.add_view("/api/v1/vk/conversations_list", ConversationsListView)
+    app.router.add_view("/api/v1/vk/bot_stats", BotStatsView)
+    app.router.add_view("/api/v1/vk/callback", CallbackView)
@@ -1,10 +1,18 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, fields
 
+from app.web.schemes import CursorPageSchema, CursorQuerySchema, ExportQuerySchema
 
-class VkMessageListQuerySchema(Schema):
+
+class VkMessageListQuerySchema(CursorQuerySchema):
+    conversation_id = fields.Int(required=False)
+
+
+class VkConversationListQuerySchema(CursorQuerySchema):
+    pass
+
+
+class VkMessageExportQuerySchema(ExportQuerySchema):
     conversation_id = fields.Int(required=False)
-    limit = fields.Int(required=False, validate=validate.Range(min=1))
-    offset = fields.Int(required=False, validate=validate.Range(min=1))
 
 
 class VkMessageSchema(Schema):
@@ -15,5 +23,29 @@ class VkMessageSchema(Schema):
     date = fields.DateTime(required=False)
 
 
-class VkMessageListSchema(Schema):
+class VkMessageListSchema(CursorPageSchema):
     vk_messages = fields.Nested(VkMessageSchema, many=True)
+
+
+class VkConversationSchema(Schema):
+    conversation_id = fields.Int(required=True)
+    text = fields.Str(attribute="last_text")
+    user_id = fields.Int(attribute="last_user_id")
+    date = fields.DateTime(attribute="last_activity")
+    messages_count = fields.Int()
+
+
+class VkConversationListSchema(CursorPageSchema):
+    vk_messages = fields.Nested(VkConversationSchema, many=True)
+
+
+class BotStatsSchema(Schema):
+    dispatcher = fields.Dict(required=False, allow_none=True)
+    batcher = fields.Dict(required=False, allow_none=True)
+    scheduler = fields.Dict(required=False, allow_none=True)
+    users = fields.Dict(required=False, allow_none=True)
+    edits = fields.Dict(required=False, allow_none=True)
+    amqp = fields.Dict(required=False, allow_none=True)
+    callback = fields.Dict(required=False, allow_none=True)
+    http_pools = fields.Dict(required=False, allow_none=True)
+    message_saver = fields.Dict(required=False)
@@ -1,7 +1,23 @@
+from aiohttp.web_exceptions import (
+    HTTPBadRequest,
+    HTTPForbidden,
+    HTTPNotFound,
+    HTTPServiceUnavailable,
+)
+from aiohttp.web_response import Response
 from aiohttp_apispec import docs, querystring_schema, response_schema
 
-from app.vk.schemes import VkMessageListQuerySchema, VkMessageListSchema
+from app.store.vk_api.constants import BOT_MODE_CALLBACK
+from app.vk.schemes import (
+    BotStatsSchema,
+    VkConversationListQuerySchema,
+    VkConversationListSchema,
+    VkMessageExportQuerySchema,
+    VkMessageListQuerySchema,
+    VkMessageListSchema,
+)
 from app.web.app import View
+from app.web.export import stream_export
 from app.web.mixins import AuthRequiredMixin
 from app.web.utils import json_response
 
@@ -14,7 +30,10 @@ class MessagesListView(AuthRequiredMixin, View):
         Отобразить список сообщений в беседе -
         conversation_id - идентификатор беседы 
         (для личной беседы это идентификатор пользователя)
-        limit и offset - для ограничения выборки
+        limit - кол-во сообщений на странице
+        cursor - next_cursor из ответа на предыдущую страницу
+        Response: next_cursor - курсор следующей страницы,
+        null - страница последняя
         """,
     )
     @querystring_schema(VkMessageListQuerySchema)
@@ -22,31 +41,193 @@ class MessagesListView(AuthRequiredMixin, View):
     async def get(self):
         conversation_id = self.request.query.get("conversation_id")
         limit = self.request.query.get("limit")
-        offset = self.request.query.get("offset")
-        messages = await self.store.vk_messages.get_messages_list(
-            conversation_id, offset, limit
+        cursor = self.request.query.get("cursor")
+        page = await self.store.vk_messages.get_messages_list(
+            conversation_id, cursor, limit
+        )
+        data = VkMessageListSchema().dump(
+            {"vk_messages": page.items, "next_cursor": page.next_cursor}
         )
-        data = VkMessageListSchema().dump({"vk_messages": messages})
 
         return json_response(data=data)
 
 
+class MessagesExportView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Vk_messages"],
+        summary="Выгрузить историю сообщений vk",
+        description="""
+        Выгрузка всех сообщений по порядку записи, одним потоковым ответом
+        conversation_id - выгрузить только эту беседу
+        format - ndjson (объект на строку, по умолчанию) или csv
+        Поля: id, conversation_id, user_id, text, date
+        """,
+    )
+    @querystring_schema(VkMessageExportQuerySchema)
+    async def get(self):
+        conversation_id = self.request.query.get("conversation_id")
+        export_format = self.request.query.get("format", "ndjson")
+        vk_messages = self.store.vk_messages
+
+        return await stream_export(
+            self.request,
+            vk_messages.stream_messages(conversation_id),
+            vk_messages.EXPORT_COLUMNS,
+            export_format,
+            filename="vk_messages",
+        )
+
+
 class ConversationsListView(AuthRequiredMixin, View):
     @docs(
         tags=["Vk_messages"],
         summary="Отобразить список Бесед vk",
         description="""
-        Отобразить список бесед в БД вк
+        Отобразить список бесед в БД вк по возрастанию conversation_id
+        limit - кол-во бесед на странице
+        cursor - next_cursor из ответа на предыдущую страницу
         Response: 
         "conversation_id": int - идентификатор беседы
         "text":str - текст ПОСЛЕДНЕГО сообщения,
         "user_id": int - идентификатор пользователя последнего сообщения в беседе,
-        "date": DATE - дата этого сообщения
+        "date": DATE - дата этого сообщения,
+        "messages_count": int - кол-во сообщений в беседе
+        "next_cursor": str - курсор следующей страницы, null - страница последняя
         """,
     )
-    @response_schema(VkMessageListSchema)
+    @querystring_schema(VkConversationListQuerySchema)
+    @response_schema(VkConversationListSchema)
+    async def get(self):
+        limit = self.request.query.get("limit")
+        cursor = self.request.query.get("cursor")
+        page = await self.store.vk_messages.get_conversations_list(cursor, limit)
+        data = VkConversationListSchema().dump(
+            {"vk_messages": page.items, "next_cursor": page.next_cursor}
+        )
+
+        return json_response(data=data)
+
+
+class BotStatsView(AuthRequiredMixin, View):
+    @docs(
+        tags=["Vk_messages"],
+        summary="Статистика обработки апдейтов бота",
+        description="""
+        dispatcher - состояние шардов обработки апдейтов:
+        "shards_count": int - кол-во шардов,
+        "shard_queue_max_size": int - размер очереди одного шарда,
+        "shard_overflow_max_size": int - предел переполнения шарда, дальше
+        прием апдейтов ждет места,
+        "queue_depth": int - апдейтов в очередях всех шардов,
+        "overflow_depth": int - апдейтов, ждущих в переполнении шардов,
+        "processed"/"failed": int - обработано / упало с ошибкой,
+        "overflowed": int - апдейтов, не поместившихся в очередь шарда,
+        "max_lag": float - максимальное время ожидания апдейта в очереди, сек
+        "shards": list - те же показатели по каждому шарду
+        ----
+        batcher - объединение исходящих запросов в execute:
+        "calls": int - запросов от бота,
+        "requests": int - фактически отправлено в ВК,
+        "executes": int - из них execute,
+        "avg_batch_size": float - среднее кол-во запросов в одном обращении к ВК
+        ----
+        scheduler - очередь исходящих запросов с приоритетами:
+        "rate": float - лимит запросов в секунду,
+        "queued"/"in_flight": int - запросов в очереди / ждут ответа ВК,
+        "classes": dict - по классам event_answer, message, background:
+        "requests", "avg_wait", "max_wait" - HTTP запросы и ожидание в очереди, сек,
+        "calls", "avg_latency", "max_latency" - вызовы API и время до ответа, сек
+        ----
+        users - кэш пользователей ВК:
+        "size"/"max_size": int - пользователей в кэше / максимум,
+        "hits": int - ответов из кэша,
+        "misses": int - id, запрошенных у ВК,
+        "coalesced": int - запросов, дождавшихся уже летящего запроса,
+        "fetches": int - запросов users.get
+        ----
+        edits - склейка правок сообщений:
+        "messages": int - сообщений с ожидающими правками,
+        "requested": int - запрошено правок,
+        "written": int - отправлено правок в ВК
+        ----
+        amqp - прием и обработка через брокер (режимы amqp_publisher/amqp_worker):
+        "role": str - publisher или worker,
+        "published": int - опубликовано апдейтов (publisher),
+        "partitions": list - партиции воркера,
+        "consumed"/"acked"/"skipped": int - получено / подтверждено после
+        обработки / пропущено без обработки,
+        "in_flight": int - апдейтов в обработке
+        ----
+        callback - повторы апдейтов Callback API (режим callback):
+        "remembered": int - запомнено event_id,
+        "duplicates": int - пропущено повторов
+        ----
+        http_pools - загрузка пулов соединений "api" и "long_poll":
+        "limit"/"limit_per_host": int - ограничения пула,
+        "in_use": int - занятые соединения,
+        "waiting": int - запросы, ждущие свободного соединения,
+        "created"/"reused": int - открыто новых соединений / запросов
+        по уже открытым keep-alive соединениям
+        ----
+        message_saver - пакетное сохранение сообщений бесед в БД:
+        "queued"/"max_size": int - сообщений ждут записи / размер буфера,
+        "written"/"batches": int - записано сообщений / кол-во INSERT,
+        "failed": int - сообщений, которые не удалось записать,
+        "blocked": int - апдейтов, ждавших места в переполненном буфере
+        """,
+    )
+    @response_schema(BotStatsSchema)
     async def get(self):
-        conversations = await self.store.vk_messages.get_conversations_list()
-        data = VkMessageListSchema().dump({"vk_messages": conversations})
+        data = BotStatsSchema().dump(
+            {
+                **self.store.vk_api.get_stats(),
+                "message_saver": self.store.vk_messages.buffer.get_stats(),
+            }
+        )
 
         return json_response(data=data)
+
+
+class CallbackView(View):
+    @docs(
+        tags=["Vk_messages"],
+        summary="Прием апдейтов от Callback API Вконтакте",
+        description="""
+        Адрес, который указывается в настройках Callback API группы.
+        Работает только если в настройках бота mode: callback,
+        в остальных режимах отвечает 404.
+        На запрос подтверждения отвечает confirmation_code из настроек,
+        на остальные апдейты сразу отвечает "ok", обработка идет в шардах бота.
+        Апдейты чужой группы или с неверным secret_key отклоняются,
+        повторы уже принятого апдейта (тот же event_id) не обрабатываются.
+        Если очереди обработки переполнены - 503, ВК повторит апдейт позже.
+        """,
+    )
+    async def post(self):
+        bot_config = self.request.app.config.bot
+        # В остальных режимах апдейты приходят не отсюда, и принимать их
+        # значит дать любому подделать апдейт бота
+        if bot_config.mode != BOT_MODE_CALLBACK:
+            raise HTTPNotFound
+
+        try:
+            update = await self.request.json()
+        except ValueError:
+            raise HTTPBadRequest(reason="Тело запроса не JSON") from None
+
+        if not isinstance(update, dict):
+            raise HTTPBadRequest(reason="Апдейт должен быть JSON объектом")
+
+        if update.get("group_id") != bot_config.group_id:
+            raise HTTPForbidden(reason="Апдейт другой группы")
+
+        if update.get("secret") != bot_config.secret_key:
+            raise HTTPForbidden(reason="Неверный секретный ключ")
+
+        if update.get("type") == "confirmation":
+            return Response(text=bot_config.confirmation_code)
+
+        if not self.store.vk_api.handle_callback_update(update):
+            raise HTTPServiceUnavailable(reason="Очереди обработки переполнены")
+
+        return Response(text="ok")
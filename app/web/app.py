@@ -11,6 +11,7 @@ from aiohttp_session.cookie_storage import EncryptedCookieStorage
 
 from app.admin.models import AdminModel
 from app.logger.logger import setup_logging
+from app.metrics.tracing import setup_tracing
 from app.store import Store
 from app.store.database.database import Database
 from app.store.store import setup_store
@@ -57,6 +58,7 @@ app = Application()
 def setup_app(config_path: str) -> Application:
     setup_logging(app, sh_logging_level=logging.DEBUG, fh_logging_level=logging.WARNING)
     setup_config(app, config_path)
+    setup_tracing(app)
     session_setup(
         app,
         EncryptedCookieStorage(
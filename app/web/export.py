@@ -0,0 +1,93 @@
+import csv
+import enum
+import io
+import json
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import aclosing
+from datetime import datetime
+
+from aiohttp.web_request import Request
+from aiohttp.web_response import StreamResponse
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Сколько строк копить перед записью в ответ
+EXPORT_CHUNK_ROWS = 500
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+
+def encode_rows(
+    rows: Sequence[dict], columns: Sequence[str], export_format: str, header: bool
+) -> bytes:
+    """Пачка строк выгрузки в NDJSON (объект на строку) или CSV
+    :param header: добавить строку заголовков CSV
+    """
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps(
+                {column: _plain(row[column]) for column in columns}, ensure_ascii=False
+            )
+            + "\n"
+            for row in rows
+        ).encode()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([_plain(row[column]) for column in columns] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+    request: Request,
+    rows: AsyncGenerator[dict],
+    columns: Sequence[str],
+    export_format: str,
+    filename: str,
+) -> StreamResponse:
+    """Отдает строки chunked-ответом по мере чтения из базы.
+    write ждет, пока клиент заберет предыдущие данные, так что
+    медленный клиент притормаживает чтение курсора, а не копит ответ в памяти.
+    Первая строка читается до отправки заголовков: ошибка запроса к базе
+    становится обычным ответом с ошибкой, а не оборванным 200.
+    Генератор закрывается и при обрыве клиента - курсор и сессия
+    освобождаются сразу, а не при сборке мусора
+    """
+    async with aclosing(rows):
+        first = await anext(rows, None)
+
+        response = StreamResponse(
+            headers={
+                "Content-Type": EXPORT_FORMATS[export_format],
+                "Content-Disposition": (
+                    f'attachment; filename="{filename}.{export_format}"'
+                ),
+            }
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        chunk = [] if first is None else [first]
+        header = True
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                await response.write(encode_rows(chunk, columns, export_format, header))
+                chunk = []
+                header = False
+
+        if chunk or header:
+            await response.write(encode_rows(chunk, columns, export_format, header))
+    await response.write_eof()
+    return response
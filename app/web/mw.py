@@ -23,6 +23,7 @@ HTTP_ERROR_CODES = {
     404: "not_found",
     405: "not_implemented",
     409: "conflict",
+    413: "request_entity_too_large",
     500: "internal_server_error",
     503: "service unavailable",
 }
@@ -64,6 +65,15 @@ async def auth_middleware(request: "Request", handler):
     return await handler(request)
 
 
+def _cors_headers(origin: str) -> dict[str, str]:
+    return {
+        "Access-Control-Allow-Origin": origin,
+        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+        "Access-Control-Allow-Headers": "Origin, Content-Type, Accept, Authorization",
+        "Access-Control-Allow-Credentials": "true",
+    }
+
+
 @middleware
 async def cors_middleware(request: "Request", handler):
     """Мидлвара добавляющие ответ CORS для всех запросов
@@ -80,31 +90,29 @@ async def cors_middleware(request: "Request", handler):
 
     logger.info("Origin: %s", origin)
     if request.method == "OPTIONS":
-        return web.Response(
-            status=200,
-            headers={
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                "Access-Control-Allow-Headers": "Origin, Content-Type, "
-                "Accept, Authorization",
-                "Access-Control-Allow-Credentials": "true",
-            },
-        )
+        return web.Response(status=200, headers=_cors_headers(origin))
 
+    request["cors_origin"] = origin
     response = await handler(request)
-    # response = web.Response()
     logger.info(response)
-    response.headers["Access-Control-Allow-Origin"] = origin
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = (
-        "Origin, Content-Type, " "Accept, Authorization"
-    )
-    response.headers["Access-Control-Allow-Credentials"] = "true"
     return response
 
 
+async def add_cors_headers(  # noqa: RUF029 сигналы aiohttp - корутины
+    request: "Request", response: web.StreamResponse
+) -> None:
+    """Заголовки CORS ставятся перед отправкой ответа: потоковые ответы
+    (выгрузки) отправляют заголовки еще внутри view, и после возврата
+    из обработчика дописывать их уже поздно
+    """
+    origin = request.get("cors_origin")
+    if origin is not None:
+        response.headers.update(_cors_headers(origin))
+
+
 def setup_middlewares(app: "Application"):
     app.middlewares.append(cors_middleware)
+    app.on_response_prepare.append(add_cors_headers)
     app.middlewares.append(error_handling_middleware)
     app.middlewares.append(auth_middleware)
     app.middlewares.append(validation_middleware)
@@ -6,6 +6,7 @@ def setup_routes(app: Application):
     from app.blitz.routes import setup_routes as blitz_setup_routes
     from app.games.blitz.routes import setup_routes as game_blitz_setup_routes
     from app.games.game_100.routes import setup_routes as game_setup_routes
+    from app.metrics.routes import setup_routes as metrics_setup_routes
     from app.quiz.routes import setup_routes as quiz_setup_routes
     from app.vk.routes import setup_routes as vk_setup_routes
 
@@ -15,3 +16,4 @@ def setup_routes(app: Application):
     game_blitz_setup_routes(app)
     game_setup_routes(app)
     vk_setup_routes(app)
+    metrics_setup_routes(app)
@@ -0,0 +1,36 @@
+from marshmallow import Schema, fields, validate
+
+
+class CursorQuerySchema(Schema):
+    limit = fields.Int(required=False, validate=validate.Range(min=1))
+    cursor = fields.Str(required=False)
+
+
+class CursorPageSchema(Schema):
+    next_cursor = fields.Str(required=False, allow_none=True)
+
+
+class ExportQuerySchema(Schema):
+    format = fields.Str(
+        required=False,
+        load_default="ndjson",
+        validate=validate.OneOf(["ndjson", "csv"]),
+    )
+
+
+class ImportQuerySchema(Schema):
+    format = fields.Str(
+        required=False,
+        load_default="json",
+        validate=validate.OneOf(["json", "csv"]),
+    )
+
+
+class ImportRowErrorSchema(Schema):
+    row = fields.Int(required=True)
+    message = fields.Str(required=True)
+
+
+class ImportResultSchema(Schema):
+    imported = fields.Int(required=True)
+    errors = fields.Nested(ImportRowErrorSchema, many=True)
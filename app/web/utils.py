@@ -1,6 +1,10 @@
-from aiohttp.web import json_response as aiohttp_json_response
+from aiohttp.web import Request, json_response as aiohttp_json_response
+from aiohttp.web_exceptions import HTTPBadRequest, HTTPRequestEntityTooLarge
 from aiohttp.web_response import Response
 
+# Размер куска при чтении тела запроса
+READ_CHUNK_SIZE = 64 * 1024
+
 
 def json_response(data: dict | None = None, status: str = "ok") -> Response:
     return aiohttp_json_response(
@@ -25,3 +29,21 @@ def error_json_response(
             "data": data or {},
         },
     )
+
+
+async def read_text(request: Request, max_size: int) -> str:
+    """Тело запроса как текст UTF-8.
+    В отличие от request.text() не ограничено client_max_size приложения:
+    тело читается кусками до max_size, а больше - 413
+    """
+    chunks, size = [], 0
+    async for chunk in request.content.iter_chunked(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPRequestEntityTooLarge(max_size=max_size, actual_size=size)
+        chunks.append(chunk)
+
+    try:
+        return b"".join(chunks).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPBadRequest(reason="Файл должен быть в кодировке UTF-8") from None
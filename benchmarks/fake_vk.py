@@ -0,0 +1,184 @@
+"""Локальный стенд API Вконтакте для нагрузочных тестов бота.
+
+Отвечает на groups.getLongPollServer, long poll запросы (act=a_check),
+методы из VkMessagesMethods и execute, которым их склеивает батчер.
+Апдейты для бота кладутся через FakeVk.emit, ответы бота
+(messages.send, messages.sendMessageEventAnswer и т.д.) записываются
+и передаются в on_call - по ним генератор нагрузки считает задержку.
+
+Бот направляется на стенд через vk_api.api_url в конфиге:
+    vk_api:
+      api_url: http://127.0.0.1:8081/method/
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from collections.abc import Callable
+
+from aiohttp import web
+
+from app.store.vk_api.constants import VkMessagesMethods
+
+LONG_POLL_KEY = "fake_key"
+
+CALL_PATTERN = re.compile(r"\s*API\.([\w.]+)\(")
+
+
+def parse_execute_code(code: str) -> list[tuple[str, dict]]:
+    """Разбирает код execute вида return [API.method({...}),...];
+    в список (метод, параметры) - ровно в том виде, в каком его строит батчер
+    """
+    body = code.strip()
+    if not body.startswith("return [") or not body.endswith("];"):
+        raise ValueError(f"Неизвестный код execute: {code}")
+    body = body[len("return [") : -len("];")]
+
+    decoder = json.JSONDecoder()
+    calls = []
+    position = 0
+    while position < len(body):
+        match = CALL_PATTERN.match(body, position)
+        if match is None:
+            raise ValueError(f"Неизвестный код execute: {code}")
+        params, position = decoder.raw_decode(body, match.end())
+        if body[position] != ")":
+            raise ValueError(f"Неизвестный код execute: {code}")
+        calls.append((match.group(1), params))
+        position += 1
+        if position < len(body) and body[position] == ",":
+            position += 1
+
+    return calls
+
+
+class FakeVk:
+    """Состояние стенда: очередь апдейтов long poll и вызовы методов ботом"""
+
+    def __init__(
+        self,
+        group_id: int = 1,
+        on_call: Callable[[str, dict, float], None] | None = None,
+    ):
+        """Стенд API
+        :param group_id: id сообщества, от имени которого работает бот
+        :param on_call: вызывается на каждый метод бота (метод, параметры, время)
+        """
+        self.group_id = group_id
+        self.on_call = on_call
+        self.base_url: str | None = None
+        self.updates: list[dict] = []
+        self.calls = Counter()
+        self.connected = asyncio.Event()
+        self._new_updates = asyncio.Event()
+        self._message_ids = Counter()
+        self._methods = {
+            VkMessagesMethods.send.value: self._send,
+            VkMessagesMethods.get.value: self._users_get,
+            VkMessagesMethods.edit.value: self._ok,
+            VkMessagesMethods.pin.value: self._ok,
+            VkMessagesMethods.unpin.value: self._ok,
+            VkMessagesMethods.send_event_answer.value: self._ok,
+            VkMessagesMethods.send_reaction.value: self._ok,
+        }
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/long_poll", self.long_poll)
+        app.router.add_route("*", "/method/groups.getLongPollServer", self.get_server)
+        app.router.add_post("/method/execute", self.execute)
+        app.router.add_post("/method/{method}", self.method)
+        return app
+
+    def emit(self, update: dict) -> None:
+        """Кладет апдейт в формате ВК, бот получит его следующим long poll"""
+        self.updates.append(update)
+        self._new_updates.set()
+
+    async def get_server(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "response": {
+                    "key": LONG_POLL_KEY,
+                    "server": f"{self.base_url}/long_poll",
+                    "ts": str(len(self.updates)),
+                }
+            }
+        )
+
+    async def long_poll(self, request: web.Request) -> web.Response:
+        if request.query.get("key") != LONG_POLL_KEY:
+            return web.Response(
+                body=json.dumps({"failed": 2}),
+                headers={"Content-Type": "application/json"},
+            )
+
+        self.connected.set()
+        ts = int(request.query.get("ts", 0))
+        wait = float(request.query.get("wait", 25))
+
+        if ts >= len(self.updates):
+            self._new_updates.clear()
+            try:
+                async with asyncio.timeout(wait):
+                    await self._new_updates.wait()
+            except TimeoutError:
+                pass
+
+        updates = self.updates[ts:]
+        # Поллер проверяет Content-Type целиком, без charset, как отдает ВК
+        return web.Response(
+            body=json.dumps({"ts": str(ts + len(updates)), "updates": updates}),
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        return web.json_response(self.call(method, params))
+
+    async def execute(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        responses = [
+            self.call(method, params).get("response", False)
+            for method, params in parse_execute_code(data["code"])
+        ]
+        return web.json_response({"response": responses})
+
+    def call(self, method: str, params: dict) -> dict:
+        handler = self._methods.get(method)
+        if handler is None:
+            return {"error": {"error_code": 3, "error_msg": f"Unknown method {method}"}}
+
+        self.calls[method] += 1
+        if self.on_call:
+            self.on_call(method, params, time.perf_counter())
+        return {"response": handler(params)}
+
+    def _send(self, params: dict) -> list[dict]:
+        peer_id = int(params.get("peer_ids") or params["peer_id"])
+        self._message_ids[peer_id] += 1
+        return [
+            {"peer_id": peer_id, "conversation_message_id": self._message_ids[peer_id]}
+        ]
+
+    @staticmethod
+    def _users_get(params: dict) -> list[dict]:
+        return [
+            {"id": int(user_id), "first_name": f"Игрок{user_id}", "last_name": "Тестов"}
+            for user_id in str(params["user_ids"]).split(",")
+        ]
+
+    @staticmethod
+    def _ok(params: dict) -> int:
+        return 1
+
+
+async def start_fake_vk(fake: FakeVk, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    fake.base_url = f"http://{host}:{port}"
+    return runner
@@ -0,0 +1,77 @@
+"""Стоимость клавиатур за один цикл вопроса игры "100 к 1":
+сборка VkKeyboard/VkButton и json.dumps на каждое сообщение против
+готовых клавиатур из app.store.vk_api.keyboards.
+
+Цикл вопроса - клавиатура вопроса, пустая одноразовая клавиатура
+отвечающего и пустая клавиатура конца игры.
+
+Запуск из корня проекта:
+    python -m benchmarks.keyboards --cycles 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.store.vk_api.keyboards import (
+    EMPTY_KEYBOARD,
+    EMPTY_ONE_TIME_KEYBOARD,
+    QUESTION_KEYBOARD,
+)
+from app.store.vk_api.utils import VkButton, VkKeyboard
+
+
+async def build_cycle() -> list[str]:
+    """Как клавиатуры собирались до появления реестра"""
+    keyboard_question = VkKeyboard(one_time=False)
+    btn_ready_to_answer = VkButton(
+        label="Знаю ответ!",
+        type_btn="callback",
+        payload={"type": "show_snackbar", "text": "/give_answer"},
+        color="primary",
+    ).get()
+    await keyboard_question.add_line([btn_ready_to_answer])
+
+    return [
+        await keyboard_question.get_keyboard(),
+        await VkKeyboard(one_time=True).get_keyboard(),
+        await VkKeyboard().get_keyboard(),
+    ]
+
+
+def cached_cycle() -> list[str]:
+    return [QUESTION_KEYBOARD, EMPTY_ONE_TIME_KEYBOARD, EMPTY_KEYBOARD]
+
+
+async def measure(cycles: int) -> tuple[float, float]:
+    """Среднее время одного цикла в микросекундах: сборка и реестр"""
+    assert await build_cycle() == cached_cycle()
+
+    started = time.perf_counter()
+    for _ in range(cycles):
+        await build_cycle()
+    build = (time.perf_counter() - started) / cycles * 1_000_000
+
+    started = time.perf_counter()
+    for _ in range(cycles):
+        cached_cycle()
+    cached = (time.perf_counter() - started) / cycles * 1_000_000
+
+    return build, cached
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=20000)
+    args = parser.parse_args()
+
+    build, cached = asyncio.run(measure(args.cycles))
+
+    print(f"циклов вопроса: {args.cycles}")
+    print(f"сборка клавиатур:  {build:8.2f} мкс/цикл")
+    print(f"готовые из реестра: {cached:8.2f} мкс/цикл")
+    print(f"ускорение:         {build / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Сквозная задержка бота под нагрузкой: от появления апдейта на long poll
+стенда benchmarks.fake_vk до ответа бота в ту же беседу.
+
+M бесед играют в блиц и "100 к 1", всего стенд отдает N апдейтов в секунду.
+Беседа шлет следующий апдейт только после ответа на предыдущий (или таймаута),
+поэтому задержка - время до первого ответа бота:
+- на сообщение - первый messages.send в беседу
+- на нажатие кнопки - messages.sendMessageEventAnswer с тем же event_id
+Апдейты без ответа за --timeout секунд считаются потерянными: например
+неверный ответ в блице, на который бот молчит.
+
+Запуск: сначала стенд, потом бот с vk_api.api_url: http://127.0.0.1:8081/method/
+    python -m benchmarks.load_generator --chats 100 --rate 200 --duration 60
+    python main.py
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from app.store.vk_api.constants import VkMessagesMethods
+from app.store.vk_api.decoder import MESSAGE_EVENT, MESSAGE_NEW
+from benchmarks.fake_vk import FakeVk, start_fake_vk
+
+CHAT_OFFSET = 2000000000
+FIRST_USER_ID = 100000
+
+KIND_MESSAGE = "сообщения"
+KIND_EVENT = "кнопки"
+
+
+@dataclass
+class Chat:
+    """Беседа с игрой, script - бесконечный сценарий ходов игроков"""
+
+    peer_id: int
+    script: Iterator[tuple[str, int, str]]
+    pending: "Emission | None" = None
+
+
+@dataclass
+class Emission:
+    kind: str
+    chat: Chat
+    emitted_at: float
+    event_id: str | None = None
+    expire: asyncio.TimerHandle | None = None
+
+
+@dataclass
+class KindStats:
+    latencies: list[float] = field(default_factory=list)
+    lost: int = 0
+
+    def summary(self) -> str:
+        sent = len(self.latencies) + self.lost
+        if len(self.latencies) < 2:
+            return f"отправлено {sent}, ответов {len(self.latencies)}"
+
+        percentiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return (
+            f"отправлено {sent}, без ответа {self.lost}, "
+            f"p50 {percentiles[49] * 1000:.1f} мс, "
+            f"p90 {percentiles[89] * 1000:.1f} мс, "
+            f"p99 {percentiles[98] * 1000:.1f} мс, "
+            f"max {max(self.latencies) * 1000:.1f} мс"
+        )
+
+
+def blitz_script(users: list[int], answer: str) -> Iterator[tuple[str, int, str]]:
+    """Старт блица и ответы игроков по кругу"""
+    return itertools.chain(
+        [(MESSAGE_NEW, users[0], "/start_blitz")],
+        itertools.cycle([(MESSAGE_NEW, user_id, answer) for user_id in users]),
+    )
+
+
+def game_100_script(users: list[int], answer: str) -> Iterator[tuple[str, int, str]]:
+    """Регистрация игроков, нажатие "Знаю ответ!" и ответ, как в раунде 100 к 1"""
+    return itertools.cycle(
+        [(MESSAGE_EVENT, user_id, "/reg_on") for user_id in users]
+        + [
+            (MESSAGE_EVENT, users[0], "/give_answer"),
+            (MESSAGE_NEW, users[0], answer),
+        ]
+    )
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        fake: FakeVk,
+        chats: int,
+        game_100_share: float,
+        players: int,
+        answer: str,
+        timeout: float,
+    ):
+        self.fake = fake
+        self.fake.on_call = self.on_call
+        self.timeout = timeout
+        self.stats = {KIND_MESSAGE: KindStats(), KIND_EVENT: KindStats()}
+        self.saturated = 0
+
+        self.chats: list[Chat] = []
+        users = itertools.count(FIRST_USER_ID)
+        for number in range(1, chats + 1):
+            chat_users = [next(users) for _ in range(players)]
+            script = game_100_script if number <= chats * game_100_share else blitz_script
+            self.chats.append(Chat(CHAT_OFFSET + number, script(chat_users, answer)))
+
+        self.idle: deque[Chat] = deque(self.chats)
+        self.waiting_events: dict[str, Emission] = {}
+        self._ids = itertools.count(1)
+
+    async def run(self, rate: float, duration: float) -> None:
+        interval = 1 / rate
+        started = time.perf_counter()
+        for tick in itertools.count():
+            tick_at = started + tick * interval
+            if tick_at - started >= duration:
+                break
+            await asyncio.sleep(max(0.0, tick_at - time.perf_counter()))
+
+            if not self.idle:
+                # все беседы ждут ответа - бот не успевает за заданной частотой
+                self.saturated += 1
+                continue
+            self.emit(self.idle.popleft())
+
+        # даем боту ответить на последние апдейты
+        await asyncio.sleep(self.timeout)
+
+    def emit(self, chat: Chat) -> None:
+        update_type, user_id, text = next(chat.script)
+        number = next(self._ids)
+
+        if update_type == MESSAGE_NEW:
+            emission = Emission(KIND_MESSAGE, chat, 0.0)
+            obj = {
+                "message": {
+                    "conversation_message_id": number,
+                    "date": int(time.time()),
+                    "from_id": user_id,
+                    "peer_id": chat.peer_id,
+                    "text": text,
+                }
+            }
+        else:
+            event_id = f"event_{number}"
+            emission = Emission(KIND_EVENT, chat, 0.0, event_id=event_id)
+            self.waiting_events[event_id] = emission
+            obj = {
+                "event_id": event_id,
+                "peer_id": chat.peer_id,
+                "user_id": user_id,
+                "payload": {"type": "show_snackbar", "text": text},
+            }
+
+        chat.pending = emission
+        emission.expire = asyncio.get_running_loop().call_later(
+            self.timeout, self.expire, emission
+        )
+        emission.emitted_at = time.perf_counter()
+        self.fake.emit(
+            {
+                "type": update_type,
+                "event_id": str(number),
+                "group_id": self.fake.group_id,
+                "object": obj,
+            }
+        )
+
+    def on_call(self, method: str, params: dict, called_at: float) -> None:
+        if method == VkMessagesMethods.send_event_answer.value:
+            emission = self.waiting_events.get(params.get("event_id"))
+        elif method == VkMessagesMethods.send.value:
+            peer_id = int(params.get("peer_ids") or params.get("peer_id"))
+            chat = self.chat_by_peer(peer_id)
+            emission = chat.pending if chat else None
+            if emission and emission.kind != KIND_MESSAGE:
+                emission = None
+        else:
+            return
+
+        if emission is None:
+            return
+
+        emission.expire.cancel()
+        self.stats[emission.kind].latencies.append(called_at - emission.emitted_at)
+        self.release(emission)
+
+    def expire(self, emission: Emission) -> None:
+        self.stats[emission.kind].lost += 1
+        self.release(emission)
+
+    def release(self, emission: Emission) -> None:
+        if emission.event_id:
+            self.waiting_events.pop(emission.event_id, None)
+        emission.chat.pending = None
+        self.idle.append(emission.chat)
+
+    def chat_by_peer(self, peer_id: int) -> Chat | None:
+        index = peer_id - CHAT_OFFSET - 1
+        if 0 <= index < len(self.chats):
+            return self.chats[index]
+        return None
+
+
+async def measure(args: argparse.Namespace) -> LoadGenerator:
+    fake = FakeVk(group_id=args.group_id)
+    runner = await start_fake_vk(fake, args.host, args.port)
+    generator = LoadGenerator(
+        fake,
+        chats=args.chats,
+        game_100_share=args.game_100_share,
+        players=args.players,
+        answer=args.answer,
+        timeout=args.timeout,
+    )
+
+    print(f"стенд ВК: {fake.base_url}/method/, ждем бота...")
+    await fake.connected.wait()
+    print("бот подключился, подаем нагрузку")
+
+    try:
+        await generator.run(args.rate, args.duration)
+    finally:
+        await runner.cleanup()
+    return generator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=100, help="апдейтов в секунду")
+    parser.add_argument("--duration", type=float, default=30, help="секунд")
+    parser.add_argument("--players", type=int, default=3, help="игроков в беседе")
+    parser.add_argument(
+        "--game-100-share", type=float, default=0.5, help='доля бесед с "100 к 1"'
+    )
+    parser.add_argument("--answer", default="ответ", help="текст ответов игроков")
+    parser.add_argument("--timeout", type=float, default=5, help="ожидание ответа")
+    parser.add_argument("--group-id", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    generator = asyncio.run(measure(args))
+
+    print(f"бесед: {args.chats}, частота: {args.rate} апдейтов/сек")
+    for kind, stats in generator.stats.items():
+        print(f"{kind}: {stats.summary()}")
+    print(f"пропущено тиков (все беседы ждали ответа): {generator.saturated}")
+    print(f"вызовы API: {dict(generator.fake.calls)}")
+
+
+if __name__ == "__main__":
+    main()
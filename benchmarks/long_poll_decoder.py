@@ -0,0 +1,177 @@
+"""Сравнение разбора ответа long poll: старый путь через marshmallow
+(LongPollResponse + копирование в апдейты бота) и decode_long_poll.
+
+Запуск из корня проекта:
+    python -m benchmarks.long_poll_decoder --updates 100 --repeat 2000
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar
+
+from marshmallow import EXCLUDE, Schema
+from marshmallow_dataclass import dataclass as ms_dataclass
+
+from app.store.vk_api.dataclasses import (
+    EventObject,
+    EventPayload,
+    EventUpdate,
+    MessageObject,
+    MessageUpdate,
+    VkMessage,
+)
+from app.store.vk_api.decoder import decode_long_poll
+
+DATA_PATH = Path(__file__).parent / "data" / "long_poll.json"
+
+
+# Схемы, которыми ответ long poll разбирался до появления decoder.py
+@dataclass
+class LegacyClientInfo:
+    button_actions: list[str]
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+@dataclass
+class LegacyMessage:
+    date: int
+    from_id: int
+    conversation_message_id: int
+    peer_id: int
+    text: str
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+@dataclass
+class LegacyPayload:
+    type: str
+    text: str
+
+
+@dataclass
+class LegacyVkObject:
+    user_id: int | None = None
+    peer_id: int | None = None
+    event_id: str | None = None
+    payload: LegacyPayload | None = None
+    message: LegacyMessage | None = None
+    client_info: LegacyClientInfo | None = None
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+@dataclass
+class LegacyUpdate:
+    group_id: int
+    type: str
+    event_id: str
+    v: str
+    object: LegacyVkObject
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+@ms_dataclass
+class LegacyLongPollResponse:
+    ts: str | None = None
+    updates: list[LegacyUpdate] = list
+    Schema: ClassVar[type[Schema]] = Schema
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+def legacy_decode(raw: bytes) -> list[MessageUpdate | EventUpdate]:
+    response = LegacyLongPollResponse.Schema().load(json.loads(raw))
+    updates = []
+
+    for update in response.updates:
+        if update.type == "message_new":
+            message = update.object.message
+            updates.append(
+                MessageUpdate(
+                    event_id=update.event_id,
+                    group_id=update.group_id,
+                    object=MessageObject(
+                        message=VkMessage(
+                            conversation_message_id=message.conversation_message_id,
+                            date=message.date,
+                            from_id=message.from_id,
+                            peer_id=message.peer_id,
+                            text=message.text,
+                        )
+                    ),
+                )
+            )
+
+        elif update.type == "message_event":
+            updates.append(
+                EventUpdate(
+                    event_id=update.event_id,
+                    group_id=update.group_id,
+                    type=update.type,
+                    object=EventObject(
+                        event_id=update.object.event_id,
+                        peer_id=update.object.peer_id,
+                        user_id=update.object.user_id,
+                        payload=EventPayload(
+                            text=update.object.payload.text,
+                            type=update.object.payload.type,
+                        ),
+                    ),
+                )
+            )
+
+    return updates
+
+
+def build_payload(updates_count: int) -> bytes:
+    """Собирает ответ long poll нужного размера из записанных апдейтов"""
+    recorded = json.loads(DATA_PATH.read_text(encoding="utf-8"))
+    updates = recorded["updates"]
+    return json.dumps(
+        {
+            "ts": recorded["ts"],
+            "updates": [updates[i % len(updates)] for i in range(updates_count)],
+        },
+        ensure_ascii=False,
+    ).encode()
+
+
+def measure(decode, raw: bytes, repeat: int) -> float:
+    """Среднее время разбора одного ответа в микросекундах"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        decode(raw)
+    return (time.perf_counter() - started) / repeat * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    raw = build_payload(args.updates)
+    assert len(legacy_decode(raw)) == len(decode_long_poll(raw).updates)
+
+    legacy = measure(legacy_decode, raw, args.repeat)
+    fast = measure(decode_long_poll, raw, args.repeat)
+
+    print(f"апдейтов в ответе: {args.updates}, повторов: {args.repeat}")
+    print(f"marshmallow:      {legacy:10.1f} мкс/ответ")
+    print(f"decode_long_poll: {fast:10.1f} мкс/ответ")
+    print(f"ускорение:        {legacy / fast:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
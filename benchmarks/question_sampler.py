@@ -0,0 +1,66 @@
+"""Выбор случайного вопроса для новой игры "100 к 1" при большом банке:
+QuestionSampler по массиву id против выбора из id, отфильтрованных
+от недавних вопросов беседы.
+
+ORDER BY random() здесь не замеряется: для него нужен Postgres,
+а его цена - полное чтение и сортировка таблицы questions на каждую игру.
+
+Запуск из корня проекта:
+    python -m benchmarks.question_sampler --questions 100000 --chats 1000
+"""
+
+import argparse
+import random
+import time
+
+from app.store.question_bank.sampler import QuestionSampler
+
+RECENT_SIZE = 20
+
+
+def filter_choose(
+    question_ids: tuple[int, ...], recent: dict[int, list[int]], conversation_id: int
+) -> int:
+    """Выбор без сэмплера: отсеять недавние вопросы беседы и выбрать из остальных"""
+    used = set(recent.setdefault(conversation_id, []))
+    question_id = random.choice([id_ for id_ in question_ids if id_ not in used])
+    recent[conversation_id] = [*recent[conversation_id], question_id][-RECENT_SIZE:]
+    return question_id
+
+
+def measure(choose, games: int, chats: int) -> float:
+    """Среднее время выбора вопроса в микросекундах"""
+    started = time.perf_counter()
+    for game in range(games):
+        choose(game % chats)
+    return (time.perf_counter() - started) / games * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--filter-games", type=int, default=200)
+    args = parser.parse_args()
+
+    question_ids = tuple(range(1, args.questions + 1))
+    sampler = QuestionSampler(recent_size=RECENT_SIZE)
+    sampled = measure(
+        lambda chat: sampler.choose(question_ids, chat), args.games, args.chats
+    )
+    recent: dict[int, list[int]] = {}
+    filtered = measure(
+        lambda chat: filter_choose(question_ids, recent, chat),
+        args.filter_games,
+        args.chats,
+    )
+
+    print(f"вопросов: {args.questions}, бесед: {args.chats}")
+    print(f"QuestionSampler:   {sampled:10.2f} мкс/игра ({sampler.get_stats()})")
+    print(f"фильтр + choice:   {filtered:10.2f} мкс/игра")
+    print(f"ускорение:         {filtered / sampled:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Процесс приема апдейтов: опрашивает long poll ВК и публикует апдейты
+в брокер, обработкой занимаются процессы bot_long_poll_daemon.consumer.
+
+Запуск из корня проекта:
+    python -m bot_long_poll_daemon.publisher [путь до config.yaml]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+from aiohttp.web import AppRunner
+
+from app.logger.logger import setup_logging
+from app.store.vk_api.accessor import VkApiAccessor
+from app.store.vk_api.constants import BOT_MODE_AMQP_PUBLISHER
+from app.web.app import Application
+from app.web.config import setup_config
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "../etc/config.yaml"
+)
+
+
+class PublisherStore:
+    """Процессу приема из всего Store нужен только клиент API Вконтакте,
+    база данных и менеджеры игр ему не нужны
+    """
+
+    def __init__(self, app: Application):
+        self.vk_api = VkApiAccessor(app)
+
+
+def setup_publisher(config_path: str) -> Application:
+    app = Application()
+    setup_logging(app, sh_logging_level=logging.INFO, fh_logging_level=logging.WARNING)
+    setup_config(app, config_path)
+    app.config.bot.mode = BOT_MODE_AMQP_PUBLISHER
+    app.store = PublisherStore(app)
+    return app
+
+
+async def run(app: Application) -> None:
+    """Запускает приложение без http сервера и работает до остановки процесса"""
+    runner = AppRunner(app)
+    await runner.setup()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(setup_publisher(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CONFIG_PATH))
+    )
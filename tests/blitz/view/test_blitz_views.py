@@ -110,7 +110,8 @@ class TestBlitzThemeGetView:
                         "title": "default test blitz theme",
                         "description": "test blitz theme description",
                     }
-                ]
+                ],
+                "next_cursor": None,
             },
             "status": "ok",
         }
@@ -136,11 +137,30 @@ class TestBlitzThemeGetView:
                         "title": "default test blitz theme 2",
                         "description": None,
                     },
-                ]
+                ],
+                "next_cursor": None,
             },
             "status": "ok",
         }
 
+    @pytest.mark.view
+    async def test_pages_by_cursor(
+        self, auth_cli: TestClient, blitz_theme_1, blitz_theme_2
+    ) -> None:
+        response = await auth_cli.get(self.URL, params={"limit": 1})
+        assert response.status == 200
+
+        data = (await response.json())["data"]
+        assert [theme["id"] for theme in data["themes"]] == [1]
+        assert data["next_cursor"]
+
+        response = await auth_cli.get(
+            self.URL, params={"limit": 1, "cursor": data["next_cursor"]}
+        )
+        data = (await response.json())["data"]
+        assert [theme["id"] for theme in data["themes"]] == [2]
+        assert data["next_cursor"] is None
+
 
 class TestBlitzQuestionAddView:
     URL = "/game/blitz.questions_add"
@@ -262,3 +282,43 @@ class TestBlitzQuestionAddView:
             },
         )
         assert response.status == 400, f"response = {response}"
+
+
+class TestBlitzQuestionImportView:
+    URL = "/game/blitz.questions_import"
+
+    @pytest.mark.view
+    async def test_unauthorized(self, cli: TestClient) -> None:
+        response = await cli.post(self.URL, json=[])
+        assert response.status == 401
+
+    @pytest.mark.view
+    async def test_success_json(self, auth_cli: TestClient, blitz_theme_1) -> None:
+        response = await auth_cli.post(
+            self.URL,
+            json={
+                "questions": [
+                    {"title": f"Вопрос {i}", "theme_id": blitz_theme_1.id, "answer": "да"}
+                    for i in range(1, 101)
+                ]
+            },
+        )
+        assert response.status == 200
+
+        data = await response.json()
+        assert data == {"data": {"imported": 100, "errors": []}, "status": "ok"}
+
+    @pytest.mark.view
+    async def test_missing_theme(self, auth_cli: TestClient, blitz_theme_1) -> None:
+        response = await auth_cli.post(
+            self.URL,
+            params={"format": "csv"},
+            data="title,theme_id,answer\n"
+            f"Вопрос,{blitz_theme_1.id},да\n"
+            "Вопрос 2,999,да\n",
+        )
+        assert response.status == 400
+
+        data = (await response.json())["data"]
+        assert data["imported"] == 0
+        assert [error["row"] for error in data["errors"]] == [3]
@@ -0,0 +1,17 @@
+from app.store.vk_api.dataclasses import MessageObject, MessageUpdate, VkMessage
+
+
+def make_update(peer_id: int, number: int) -> MessageUpdate:
+    return MessageUpdate(
+        event_id=f"{peer_id}_{number}",
+        group_id=1,
+        object=MessageObject(
+            message=VkMessage(
+                conversation_message_id=number,
+                date=0,
+                from_id=13007796,
+                peer_id=peer_id,
+                text=str(number),
+            )
+        ),
+    )
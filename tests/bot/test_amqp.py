@@ -0,0 +1,181 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.store.amqp.broker import (
+    IN_MEMORY_URL,
+    AmqpBroker,
+    BaseBroker,
+    InMemoryBroker,
+)
+from app.store.amqp.updates import UpdateConsumer, UpdatePublisher
+from app.store.vk_api.dataclasses import MessageUpdate
+from app.store.vk_api.dispatcher import UpdateDispatcher
+from app.web.config import AmqpConfig
+from tests.bot.helpers import make_update
+
+
+async def make_worker(
+    broker: InMemoryBroker, config: AmqpConfig, handle_updates
+) -> tuple[UpdateDispatcher, UpdateConsumer]:
+    app = MagicMock()
+    app.store.bots_manager.handle_updates = handle_updates
+    dispatcher = UpdateDispatcher(app, shards=2, shard_queue_size=5)
+    # у каждого воркера свой конфиг и prefetch, очереди общие, как в RabbitMQ
+    worker_broker = InMemoryBroker(config, queues=broker.queues)
+    await worker_broker.connect()
+    return dispatcher, UpdateConsumer(worker_broker, dispatcher)
+
+
+async def wait_for(condition) -> None:
+    for _ in range(1000):
+        if condition():
+            return
+        await asyncio.sleep(0.001)
+
+    raise AssertionError("Не дождались условия")
+
+
+class TestAmqpSplit:
+    @pytest.mark.logic
+    async def test_workers_keep_order_in_conversation(self):
+        handled: dict[int, list[int]] = {}
+        workers_by_peer: dict[int, set[int]] = {}
+
+        def handler(worker_index: int):
+            async def handle_updates(updates: list[MessageUpdate]):
+                message = updates[0].object.message
+                await asyncio.sleep(0.001)
+                handled.setdefault(message.peer_id, []).append(
+                    message.conversation_message_id
+                )
+                workers_by_peer.setdefault(message.peer_id, set()).add(worker_index)
+
+            return handle_updates
+
+        broker = InMemoryBroker(AmqpConfig(url=IN_MEMORY_URL, partitions=4))
+        await broker.connect()
+        publisher = UpdatePublisher(broker)
+
+        workers = [
+            await make_worker(
+                broker,
+                AmqpConfig(
+                    url=IN_MEMORY_URL,
+                    partitions=4,
+                    prefetch=3,
+                    worker_index=index,
+                    workers_count=2,
+                ),
+                handler(index),
+            )
+            for index in range(2)
+        ]
+        for dispatcher, consumer in workers:
+            dispatcher.start()
+            consumer.start()
+
+        peers = (2000000001, 2000000002, 2000000003, 13007796)
+        for number in range(10):
+            for peer_id in peers:
+                await publisher.put(make_update(peer_id, number))
+
+        await wait_for(lambda: sum(len(numbers) for numbers in handled.values()) == 40)
+        await wait_for(lambda: sum(c.stats.acked for _, c in workers) == 40)
+
+        for dispatcher, consumer in workers:
+            await consumer.stop()
+            await dispatcher.stop()
+
+        assert handled == {peer_id: list(range(10)) for peer_id in peers}
+        assert all(len(indexes) == 1 for indexes in workers_by_peer.values())
+        assert publisher.stats.published == 40
+
+    @pytest.mark.logic
+    async def test_prefetch_limits_unacked(self):
+        release = asyncio.Event()
+        started = []
+
+        async def handle_updates(updates: list[MessageUpdate]):
+            started.append(updates[0].object.message.conversation_message_id)
+            await release.wait()
+
+        config = AmqpConfig(url=IN_MEMORY_URL, partitions=1, prefetch=2)
+        broker = InMemoryBroker(config)
+        await broker.connect()
+        dispatcher, consumer = await make_worker(broker, config, handle_updates)
+        dispatcher.start()
+        consumer.start()
+
+        publisher = UpdatePublisher(broker)
+        for number in range(5):
+            await publisher.put(make_update(2000000001, number))
+
+        await wait_for(lambda: consumer.stats.consumed == 2)
+        await asyncio.sleep(0.01)
+        assert consumer.stats.consumed == 2
+
+        release.set()
+        await wait_for(lambda: consumer.stats.acked == 5)
+
+        await consumer.stop()
+        await dispatcher.stop()
+        assert started == list(range(5))
+
+    @pytest.mark.logic
+    async def test_prefetch_shared_by_partitions(self):
+        release = asyncio.Event()
+
+        async def handle_updates(updates: list[MessageUpdate]):
+            await release.wait()
+
+        config = AmqpConfig(url=IN_MEMORY_URL, partitions=2, prefetch=2)
+        broker = InMemoryBroker(config)
+        await broker.connect()
+        dispatcher, consumer = await make_worker(broker, config, handle_updates)
+        dispatcher.start()
+        consumer.start()
+
+        publisher = UpdatePublisher(broker)
+        for number in range(3):
+            for peer_id in (2000000000, 2000000001):
+                await publisher.put(make_update(peer_id, number))
+
+        await wait_for(lambda: consumer.stats.consumed == 2)
+        await asyncio.sleep(0.01)
+        # Лимит на воркер, а не на каждую из двух партиций
+        assert consumer.stats.consumed == 2
+
+        release.set()
+        await wait_for(lambda: consumer.stats.acked == 6)
+        await consumer.stop()
+        await dispatcher.stop()
+
+    @pytest.mark.logic
+    async def test_amqp_prefetch_per_channel(self, monkeypatch):
+        channel = AsyncMock()
+        connection = AsyncMock()
+        connection.channel.return_value = channel
+        monkeypatch.setattr(
+            "app.store.amqp.broker.aio_pika.connect_robust",
+            AsyncMock(return_value=connection),
+        )
+
+        await AmqpBroker(AmqpConfig(partitions=2, prefetch=10)).connect()
+
+        channel.set_qos.assert_awaited_once_with(prefetch_count=10, global_=True)
+
+
+class TestBaseBroker:
+    @pytest.mark.logic
+    def test_missing_method_fails_on_create(self):
+        class PublishOnlyBroker(BaseBroker):
+            async def connect(self) -> None:
+                pass
+
+            async def publish(self, partition: int, body: bytes) -> None:
+                pass
+
+        with pytest.raises(TypeError, match="consume"):
+            PublishOnlyBroker(AmqpConfig())
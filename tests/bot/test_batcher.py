@@ -0,0 +1,134 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from app.store.vk_api.batcher import EXECUTE_MAX_CALLS, VkExecuteBatcher
+from app.store.vk_api.scheduler import RequestPriority
+
+API_CALL = re.compile(r"API\.([\w.]+)\((\{.*?\})\)")
+
+
+class FakeVkApi:
+    """Отвечает на execute как ВК: вызов с параметром fail возвращает false,
+    а его ошибка по порядку попадает в execute_errors
+    """
+
+    def __init__(self):
+        self.requests: list[tuple[str, list[dict]]] = []
+        self.codes: list[str] = []
+
+    async def send(self, method: str, params: dict, priority: RequestPriority) -> dict:
+        await asyncio.sleep(0)
+        if method != "execute":
+            self.requests.append((method, [params]))
+            return {"response": params["n"]}
+
+        self.codes.append(params["code"])
+        calls = [
+            (name, json.loads(raw)) for name, raw in API_CALL.findall(params["code"])
+        ]
+        self.requests.append((method, [call_params for _, call_params in calls]))
+
+        response, errors = [], []
+        for name, call_params in calls:
+            if call_params.get("fail"):
+                response.append(False)
+                errors.append({"method": name, "error_msg": f"fail {call_params['n']}"})
+            else:
+                response.append(call_params["n"])
+        return {"response": response, "execute_errors": errors}
+
+
+@pytest.fixture
+def vk_api() -> FakeVkApi:
+    return FakeVkApi()
+
+
+class TestVkExecuteBatcher:
+    @pytest.mark.logic
+    async def test_flush_on_window(self, vk_api):
+        batcher = VkExecuteBatcher(vk_api.send, window=0.01)
+
+        first = asyncio.create_task(batcher.call("messages.send", {"n": 1}))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(batcher.call("messages.send", {"n": 2}))
+        await asyncio.sleep(0)
+
+        assert vk_api.requests == []
+        assert await asyncio.gather(first, second) == [
+            {"response": 1},
+            {"response": 2},
+        ]
+        assert vk_api.requests == [("execute", [{"n": 1}, {"n": 2}])]
+        assert vk_api.codes == [
+            'return [API.messages.send({"n": 1}),API.messages.send({"n": 2})];'
+        ]
+
+    @pytest.mark.logic
+    async def test_flush_on_max_size(self, vk_api):
+        batcher = VkExecuteBatcher(vk_api.send, window=60, max_size=3)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.call("messages.send", {"n": n}) for n in range(3))),
+            timeout=1,
+        )
+
+        assert [result["response"] for result in results] == [0, 1, 2]
+        assert len(vk_api.requests) == 1
+
+    @pytest.mark.logic
+    async def test_split_into_execute_limit(self, vk_api):
+        batcher = VkExecuteBatcher(vk_api.send, window=0.01, max_size=100)
+
+        results = await asyncio.gather(
+            *(batcher.call("messages.send", {"n": n}) for n in range(60))
+        )
+
+        assert [result["response"] for result in results] == list(range(60))
+        assert [len(params) for _, params in vk_api.requests] == [
+            EXECUTE_MAX_CALLS,
+            EXECUTE_MAX_CALLS,
+            10,
+        ]
+        assert batcher.stats.executes == 3
+
+    @pytest.mark.logic
+    async def test_errors_mapped_to_callers(self, vk_api):
+        batcher = VkExecuteBatcher(vk_api.send, window=0.01)
+
+        results = await asyncio.gather(
+            batcher.call("messages.send", {"n": 0}),
+            batcher.call("messages.edit", {"n": 1, "fail": True}),
+            batcher.call("messages.send", {"n": 2}),
+            batcher.call("messages.delete", {"n": 3, "fail": True}),
+        )
+
+        assert results == [
+            {"response": 0},
+            {"error": {"method": "messages.edit", "error_msg": "fail 1"}},
+            {"response": 2},
+            {"error": {"method": "messages.delete", "error_msg": "fail 3"}},
+        ]
+
+    @pytest.mark.logic
+    async def test_failed_send_fails_only_its_batch(self, vk_api):
+        async def send(method: str, params: dict, priority: RequestPriority) -> dict:
+            if "fail" in params.get("code", ""):
+                raise TimeoutError
+            return await vk_api.send(method, params, priority)
+
+        batcher = VkExecuteBatcher(send, window=60, max_size=2)
+
+        results = await asyncio.gather(
+            batcher.call("messages.send", {"n": 0, "fail": True}),
+            batcher.call("messages.send", {"n": 1}),
+            batcher.call("messages.send", {"n": 2}),
+            batcher.call("messages.send", {"n": 3}),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], TimeoutError)
+        assert isinstance(results[1], TimeoutError)
+        assert results[2:] == [{"response": 2}, {"response": 3}]
@@ -0,0 +1,96 @@
+import pytest
+
+from app.store.question_bank.bulk_import import (
+    ImportFileError,
+    parse_blitz_questions,
+    parse_quiz_questions,
+    validate_blitz_rows,
+    validate_quiz_rows,
+)
+
+QUIZ_CSV = """title,theme_id,answer,score
+Что в коробке?,1,Еда,60
+Что в коробке?,1,Деньги,40
+Кто в доме?,1,Кот,50
+Кто в доме?,1,Пес,40
+"""
+
+
+class TestParseQuizQuestions:
+    @pytest.mark.logic
+    def test_csv_answers_grouped_by_question(self):
+        rows, errors = parse_quiz_questions(QUIZ_CSV, "csv")
+
+        assert errors == []
+        assert [(row.row, row.title) for row in rows] == [
+            (2, "Что в коробке?"),
+            (4, "Кто в доме?"),
+        ]
+        assert rows[0].answers == [("Еда", 60), ("Деньги", 40)]
+
+    @pytest.mark.logic
+    def test_json_bad_rows_reported(self):
+        rows, errors = parse_quiz_questions(
+            """{"questions": [
+                {"title": "Вопрос", "theme_id": 1,
+                 "answers": [{"title": "a", "score": 50}, {"title": "b", "score": 50}]},
+                {"title": "", "theme_id": 1, "answers": []},
+                {"title": "Вопрос 3", "theme_id": "x", "answers": []}
+            ]}""",
+            "json",
+        )
+
+        assert [row.row for row in rows] == [1]
+        assert [error.row for error in errors] == [2, 3]
+
+    @pytest.mark.logic
+    def test_unparseable_file(self):
+        with pytest.raises(ImportFileError):
+            parse_quiz_questions("{not json", "json")
+        with pytest.raises(ImportFileError):
+            parse_quiz_questions("title,answer\nВопрос,Ответ\n", "csv")
+
+
+class TestValidateQuizRows:
+    @pytest.mark.logic
+    def test_score_sum_and_theme(self):
+        rows, _ = parse_quiz_questions(QUIZ_CSV.replace(",1,", ",2,", 2), "csv")
+
+        errors = validate_quiz_rows(rows, theme_ids={1})
+
+        assert [error.row for error in errors] == [2, 4]
+        assert "Темы с id = 2" in errors[0].message
+        assert "текущая сумма: 90" in errors[1].message
+
+    @pytest.mark.logic
+    def test_valid_rows(self):
+        rows, _ = parse_quiz_questions(QUIZ_CSV.replace("Пес,40", "Пес,50"), "csv")
+
+        assert validate_quiz_rows(rows, theme_ids={1}) == []
+
+    @pytest.mark.logic
+    def test_schema_errors_per_row(self):
+        rows, _ = parse_quiz_questions(
+            QUIZ_CSV.replace("Еда,60", "Еда,100").replace("Деньги,40", "Деньги,0"),
+            "csv",
+        )
+
+        errors = validate_quiz_rows(rows, theme_ids={1})
+
+        assert [error.row for error in errors] == [2, 2, 4]
+        assert errors[0].message.startswith("answers.0.score: ")
+        assert errors[1].message.startswith("answers.1.score: ")
+        assert "текущая сумма: 90" in errors[2].message
+
+
+class TestBlitzImport:
+    @pytest.mark.logic
+    def test_csv_rows_validated(self):
+        rows, errors = parse_blitz_questions(
+            "title,theme_id,answer\nСтолица Франции?,1,Париж\n,1,Пусто\n"
+            f"Длинный ответ?,1,{'а' * 101}\n",
+            "csv",
+        )
+
+        assert [error.row for error in errors] == [3]
+        assert [error.row for error in validate_blitz_rows(rows, theme_ids={1})] == [4]
@@ -0,0 +1,176 @@
+from unittest.mock import MagicMock
+
+import pytest
+from aiohttp.test_utils import TestClient
+
+from app.store.vk_api.accessor import VkApiAccessor
+from app.store.vk_api.dedup import RecentEventIds
+from app.web.config import BotConfig, Config
+
+
+@pytest.fixture
+def callback_config(config: Config, monkeypatch) -> Config:
+    monkeypatch.setattr(config.bot, "mode", "callback")
+    monkeypatch.setattr(config.bot, "confirmation_code", "a1b2c3d4")
+    monkeypatch.setattr(config.bot, "secret_key", "secret")
+    return config
+
+
+class TestCallbackView:
+    @pytest.mark.view
+    async def test_confirmation(self, cli: TestClient, callback_config: Config):
+        response = await cli.post(
+            "/api/v1/vk/callback",
+            json={
+                "type": "confirmation",
+                "group_id": callback_config.bot.group_id,
+                "secret": "secret",
+            },
+        )
+
+        assert response.status == 200
+        assert await response.text() == "a1b2c3d4"
+
+    @pytest.mark.view
+    async def test_ok_on_update(self, cli: TestClient, callback_config: Config):
+        response = await cli.post(
+            "/api/v1/vk/callback",
+            json={
+                "type": "message_typing_state",
+                "group_id": callback_config.bot.group_id,
+                "event_id": "typing_event_id",
+                "secret": "secret",
+                "object": {"state": "typing"},
+            },
+        )
+
+        assert response.status == 200
+        assert await response.text() == "ok"
+
+    @pytest.mark.view
+    async def test_bad_secret(self, cli: TestClient, callback_config: Config):
+        response = await cli.post(
+            "/api/v1/vk/callback",
+            json={
+                "type": "confirmation",
+                "group_id": callback_config.bot.group_id,
+                "secret": "wrong",
+            },
+        )
+
+        assert response.status == 403
+
+    @pytest.mark.view
+    async def test_missing_secret(self, cli: TestClient, callback_config: Config):
+        response = await cli.post(
+            "/api/v1/vk/callback",
+            json={
+                "type": "message_new",
+                "group_id": callback_config.bot.group_id,
+                "object": {"message": {"peer_id": 1, "from_id": 1, "text": "/start"}},
+            },
+        )
+
+        assert response.status == 403
+
+    @pytest.mark.view
+    async def test_not_found_in_long_poll_mode(self, cli: TestClient, config: Config):
+        response = await cli.post(
+            "/api/v1/vk/callback",
+            json={
+                "type": "message_new",
+                "group_id": config.bot.group_id,
+                "object": {"message": {"peer_id": 1, "from_id": 1, "text": "/start"}},
+            },
+        )
+
+        assert response.status == 404
+
+    @pytest.mark.view
+    async def test_other_group(self, cli: TestClient, callback_config: Config):
+        response = await cli.post(
+            "/api/v1/vk/callback",
+            json={"type": "confirmation", "group_id": 1, "secret": "secret"},
+        )
+
+        assert response.status == 403
+
+    @pytest.mark.view
+    async def test_not_object_body(self, cli: TestClient, callback_config: Config):
+        response = await cli.post("/api/v1/vk/callback", json=["confirmation"])
+
+        assert response.status == 400
+
+
+class TestCallbackConfig:
+    @pytest.mark.logic
+    @pytest.mark.parametrize(
+        ("confirmation_code", "secret_key"),
+        [(None, "secret"), ("a1b2c3d4", None), ("a1b2c3d4", "")],
+    )
+    def test_callback_requires_secret_and_code(self, confirmation_code, secret_key):
+        with pytest.raises(ValueError, match="secret_key и confirmation_code"):
+            BotConfig(
+                token="token",
+                group_id=1,
+                mode="callback",
+                confirmation_code=confirmation_code,
+                secret_key=secret_key,
+            )
+
+    @pytest.mark.logic
+    def test_long_poll_without_secret(self):
+        assert BotConfig(token="token", group_id=1).secret_key is None
+
+
+class TestCallbackDedup:
+    @pytest.mark.logic
+    def test_retry_skipped(self):
+        accessor = VkApiAccessor(MagicMock())
+        accessor.dispatcher = MagicMock()
+        accessor.callback_events = RecentEventIds(ttl=60, max_size=100)
+        update = {
+            "type": "message_typing_state",
+            "event_id": "typing_event_id",
+            "object": {"state": "typing"},
+        }
+
+        accessor.handle_callback_update(update)
+        accessor.handle_callback_update(update)
+
+        assert accessor.callback_events.duplicates == 1
+        assert accessor.get_stats()["callback"] == {"remembered": 1, "duplicates": 1}
+
+    @pytest.mark.logic
+    def test_not_accepted_without_room(self):
+        accessor = VkApiAccessor(MagicMock())
+        accessor.dispatcher = MagicMock(has_room=False)
+        accessor.callback_events = RecentEventIds(ttl=60, max_size=100)
+        update = {
+            "type": "message_typing_state",
+            "event_id": "typing_event_id",
+            "object": {"state": "typing"},
+        }
+
+        assert not accessor.handle_callback_update(update)
+        # Повтор ВК после отказа не считается дубликатом
+        accessor.dispatcher.has_room = True
+        assert accessor.handle_callback_update(update)
+        assert accessor.callback_events.duplicates == 0
+
+    @pytest.mark.logic
+    def test_expired_and_evicted_ids_forgotten(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr("app.store.vk_api.dedup.time.monotonic", lambda: now)
+        events = RecentEventIds(ttl=10, max_size=2)
+
+        assert events.add("a")
+        assert not events.add("a")
+
+        now += 10
+        assert events.add("a")
+        assert events.add("b")
+        assert events.add("c")
+        # Больше max_size - самый старый id забыт
+        assert len(events) == 2
+        assert events.add("a")
@@ -0,0 +1,56 @@
+import pytest
+import sqlalchemy.exc
+from sqlalchemy.util import greenlet_spawn
+
+from app.store.database.pool import TimedQueuePool
+
+
+class FakeDbapiConnection:
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TestTimedQueuePool:
+    @pytest.mark.logic
+    async def test_stats_checkout_and_overflow(self):
+        pool = TimedQueuePool(FakeDbapiConnection, pool_size=1, max_overflow=1)
+
+        def checkout_two():
+            return pool.connect(), pool.connect()
+
+        first, second = await greenlet_spawn(checkout_two)
+        stats = pool.get_stats()
+
+        assert stats["checked_out"] == 2
+        assert stats["max_overflow"] == 1
+        assert stats["overflow"] == 1
+        assert stats["checkouts"] == 2
+
+        await greenlet_spawn(first.close)
+        await greenlet_spawn(second.close)
+        assert pool.get_stats()["checked_out"] == 0
+
+    @pytest.mark.logic
+    def test_recreate_keeps_max_overflow(self):
+        pool = TimedQueuePool(FakeDbapiConnection, pool_size=1, max_overflow=3)
+
+        assert pool.recreate().get_stats()["max_overflow"] == 3
+
+    @pytest.mark.logic
+    async def test_timeout_counted(self):
+        pool = TimedQueuePool(
+            FakeDbapiConnection, pool_size=1, max_overflow=0, timeout=0.01
+        )
+        connection = await greenlet_spawn(pool.connect)
+
+        with pytest.raises(sqlalchemy.exc.TimeoutError):
+            await greenlet_spawn(pool.connect)
+
+        await greenlet_spawn(connection.close)
+        stats = pool.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["checkouts"] == 1
+        assert stats["max_wait"] >= 0
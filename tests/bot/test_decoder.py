@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from app.store.vk_api.dataclasses import EventUpdate, MessageUpdate
+from app.store.vk_api.decoder import decode_long_poll
+
+MESSAGE_NEW = {
+    "group_id": 1,
+    "type": "message_new",
+    "event_id": "message_event_id",
+    "v": "5.199",
+    "object": {
+        "message": {
+            "date": 1718035200,
+            "from_id": 13007796,
+            "conversation_message_id": 412,
+            "peer_id": 2000000001,
+            "text": "Ответ",
+            "attachments": [],
+        },
+        "client_info": {"button_actions": ["text", "callback"]},
+    },
+}
+
+MESSAGE_EVENT = {
+    "group_id": 1,
+    "type": "message_event",
+    "event_id": "callback_event_id",
+    "v": "5.199",
+    "object": {
+        "user_id": 13007796,
+        "peer_id": 2000000001,
+        "event_id": "4f1b9a7c2e3d",
+        "payload": {"type": "ready_to_answer", "text": "Готов отвечать"},
+    },
+}
+
+TYPING_STATE = {
+    "group_id": 1,
+    "type": "message_typing_state",
+    "event_id": "typing_event_id",
+    "v": "5.199",
+    "object": {"state": "typing", "from_id": 13007796, "to_id": -1},
+}
+
+
+def dumps(data: dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False).encode()
+
+
+class TestLongPollDecoder:
+    @pytest.mark.logic
+    async def test_decode_updates(self):
+        batch = decode_long_poll(
+            dumps({"ts": "15", "updates": [MESSAGE_NEW, TYPING_STATE, MESSAGE_EVENT]})
+        )
+
+        assert batch.ts == "15"
+        assert batch.failed is None
+        assert len(batch.updates) == 2
+
+        message_update, event_update = batch.updates
+        assert isinstance(message_update, MessageUpdate)
+        assert message_update.object.message.peer_id == 2000000001
+        assert message_update.object.message.conversation_message_id == 412
+        assert message_update.object.message.text == "Ответ"
+
+        assert isinstance(event_update, EventUpdate)
+        assert event_update.object.user_id == 13007796
+        assert event_update.object.payload.type == "ready_to_answer"
+
+    @pytest.mark.logic
+    async def test_skip_broken_update(self):
+        broken = {**MESSAGE_NEW, "object": {"message": {"text": "Без peer_id"}}}
+
+        batch = decode_long_poll(dumps({"ts": 16, "updates": [broken, MESSAGE_EVENT]}))
+
+        assert batch.ts == "16"
+        assert len(batch.updates) == 1
+        assert isinstance(batch.updates[0], EventUpdate)
+
+    @pytest.mark.logic
+    async def test_failed_response(self):
+        batch = decode_long_poll(b'{"failed": 2}')
+
+        assert batch.failed == 2
+        assert batch.ts is None
+        assert batch.updates == []
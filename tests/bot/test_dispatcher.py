@@ -0,0 +1,116 @@
+import asyncio
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.store.vk_api.dataclasses import MessageUpdate
+from app.store.vk_api.dispatcher import UpdateDispatcher
+from tests.bot.helpers import make_update
+
+
+@pytest.fixture
+def handled() -> dict[int, list[int]]:
+    return {}
+
+
+@pytest.fixture
+def dispatcher_app(handled):
+    async def handle_updates(updates: list[MessageUpdate]):
+        message = updates[0].object.message
+        # случайная задержка перемешала бы порядок без шардирования
+        await asyncio.sleep(random.uniform(0, 0.01))
+        handled.setdefault(message.peer_id, []).append(message.conversation_message_id)
+
+    app = MagicMock()
+    app.store.bots_manager.handle_updates = handle_updates
+    return app
+
+
+class TestUpdateDispatcher:
+    @pytest.mark.logic
+    async def test_keep_order_in_conversation(self, dispatcher_app, handled):
+        dispatcher = UpdateDispatcher(dispatcher_app, shards=3, shard_queue_size=60)
+        dispatcher.start()
+
+        for number in range(20):
+            for peer_id in (2000000001, 2000000002, 13007796):
+                dispatcher.put(make_update(peer_id, number))
+
+        await dispatcher.stop()
+
+        assert handled == {
+            2000000001: list(range(20)),
+            2000000002: list(range(20)),
+            13007796: list(range(20)),
+        }
+        assert dispatcher.get_stats()["processed"] == 60
+
+    @pytest.mark.logic
+    async def test_same_peer_same_shard(self, dispatcher_app):
+        dispatcher = UpdateDispatcher(dispatcher_app, shards=4, shard_queue_size=5)
+
+        assert dispatcher.get_shard(2000000001) is dispatcher.get_shard(2000000001)
+        assert dispatcher.get_shard(2000000001) is not dispatcher.get_shard(2000000002)
+
+    @pytest.mark.logic
+    async def test_slow_chat_not_block_others(self, dispatcher_app, handled):
+        slow_peer, fast_peer = 2000000000, 2000000001
+        release = asyncio.Event()
+
+        async def handle_updates(updates: list[MessageUpdate]):
+            message = updates[0].object.message
+            if message.peer_id == slow_peer:
+                await release.wait()
+            handled.setdefault(message.peer_id, []).append(
+                message.conversation_message_id
+            )
+
+        dispatcher_app.store.bots_manager.handle_updates = handle_updates
+        dispatcher = UpdateDispatcher(dispatcher_app, shards=2, shard_queue_size=5)
+        dispatcher.start()
+
+        dispatcher.put(make_update(slow_peer, 1))
+        dispatcher.put(make_update(fast_peer, 1))
+        await asyncio.sleep(0.01)
+
+        assert handled == {fast_peer: [1]}
+
+        release.set()
+        await dispatcher.stop()
+
+        assert handled == {fast_peer: [1], slow_peer: [1]}
+
+    @pytest.mark.logic
+    async def test_bad_shards_count(self, dispatcher_app):
+        with pytest.raises(ValueError, match="Кол-во шардов должно быть больше 0"):
+            UpdateDispatcher(dispatcher_app, shards=0, shard_queue_size=5)
+
+    @pytest.mark.logic
+    async def test_full_shard_overflows_without_loss(self, dispatcher_app, handled):
+        full_peer, other_peer = 2000000000, 2000000001
+        dispatcher = UpdateDispatcher(
+            dispatcher_app, shards=2, shard_queue_size=1, shard_overflow_size=2
+        )
+
+        # Воркеры не запущены, очередь шарда беседы full_peer заполнится
+        for number in range(3):
+            dispatcher.put(make_update(full_peer, number))
+        dispatcher.put(make_update(other_peer, 0))
+
+        stats = dispatcher.get_stats()
+        assert stats["queue_depth"] == 2
+        assert stats["overflow_depth"] == 2
+        assert stats["overflowed"] == 2
+        assert not dispatcher.has_room
+
+        room = asyncio.create_task(dispatcher.wait_for_room())
+        await asyncio.sleep(0)
+        assert not room.done()
+
+        dispatcher.start()
+        await asyncio.wait_for(room, timeout=1)
+        await dispatcher.stop()
+
+        assert handled == {full_peer: [0, 1, 2], other_peer: [0]}
+        assert dispatcher.has_room
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.store.vk_api.edits import MessageEditCoalescer
+
+
+@pytest.fixture
+def written() -> list[tuple[int, int, str]]:
+    return []
+
+
+@pytest.fixture
+def coalescer(written) -> MessageEditCoalescer:
+    async def edit(peer_id: int, conversation_message_id: int, text: str):
+        await asyncio.sleep(0)
+        written.append((peer_id, conversation_message_id, text))
+
+    return MessageEditCoalescer(edit=edit, interval=0.05)
+
+
+class TestMessageEditCoalescer:
+    @pytest.mark.logic
+    async def test_burst_coalesced(self, coalescer, written):
+        for count in range(1, 11):
+            coalescer.edit(2000000001, 5, f"Игроки: {count}")
+            await asyncio.sleep(0.001)
+
+        await asyncio.sleep(0.1)
+
+        assert written[0] == (2000000001, 5, "Игроки: 1")
+        assert written[-1] == (2000000001, 5, "Игроки: 10")
+        assert len(written) <= 3
+
+    @pytest.mark.logic
+    async def test_messages_independent(self, coalescer, written):
+        coalescer.edit(2000000001, 5, "первое")
+        coalescer.edit(2000000002, 5, "второе")
+        await asyncio.sleep(0.01)
+
+        assert sorted(written) == [
+            (2000000001, 5, "первое"),
+            (2000000002, 5, "второе"),
+        ]
+
+    @pytest.mark.logic
+    async def test_flush_writes_final_state(self, coalescer, written):
+        coalescer.edit(2000000001, 5, "1")
+        await asyncio.sleep(0.001)
+        coalescer.edit(2000000001, 5, "2")
+        coalescer.edit(2000000001, 5, "3")
+
+        await coalescer.flush(peer_id=2000000001)
+
+        assert written == [(2000000001, 5, "1"), (2000000001, 5, "3")]
+        assert coalescer.get_stats()["messages"] == 0
+
+    @pytest.mark.logic
+    async def test_same_text_not_written_again(self, coalescer, written):
+        coalescer.edit(2000000001, 5, "1")
+        await asyncio.sleep(0.001)
+        coalescer.edit(2000000001, 5, "2")
+        coalescer.edit(2000000001, 5, "1")
+        await asyncio.sleep(0.1)
+
+        assert written == [(2000000001, 5, "1")]
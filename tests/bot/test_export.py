@@ -0,0 +1,123 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from aiohttp import web
+
+from app.games.game_100.constants import GameStage
+from app.web.export import encode_rows, stream_export
+from app.web.mw import add_cors_headers, cors_middleware, error_handling_middleware
+
+COLUMNS = ("id", "state", "date", "text")
+
+
+def make_row(id_: int) -> dict:
+    return {
+        "id": id_,
+        "state": GameStage.FINISHED,
+        "date": datetime(2025, 1, 5, 15, 22),
+        "text": "Привет, мир",
+    }
+
+
+async def rows(count: int, closed: list | None = None):
+    try:
+        for id_ in range(count):
+            await asyncio.sleep(0)
+            yield make_row(id_)
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def failing_rows():
+    await asyncio.sleep(0)
+    raise RuntimeError("База недоступна")
+    yield
+
+
+class TestEncodeRows:
+    @pytest.mark.logic
+    async def test_ndjson(self):
+        data = encode_rows([make_row(1)], COLUMNS, "ndjson", header=True)
+
+        assert json.loads(data) == {
+            "id": 1,
+            "state": "FINISHED",
+            "date": "2025-01-05T15:22:00",
+            "text": "Привет, мир",
+        }
+
+    @pytest.mark.logic
+    async def test_csv_header_once(self):
+        first = encode_rows([make_row(1)], COLUMNS, "csv", header=True)
+        second = encode_rows([make_row(2)], COLUMNS, "csv", header=False)
+
+        assert first.decode().splitlines() == [
+            "id,state,date,text",
+            '1,FINISHED,2025-01-05T15:22:00,"Привет, мир"',
+        ]
+        assert second.decode().splitlines() == [
+            '2,FINISHED,2025-01-05T15:22:00,"Привет, мир"'
+        ]
+
+
+class TestStreamExport:
+    @pytest.fixture
+    def closed(self) -> list:
+        return []
+
+    @pytest.fixture
+    async def client(self, aiohttp_client, closed):
+        async def export(request: web.Request) -> web.StreamResponse:
+            if "fail" in request.query:
+                return await stream_export(
+                    request, failing_rows(), COLUMNS, "ndjson", "export"
+                )
+            count = int(request.query["count"])
+            return await stream_export(
+                request, rows(count, closed), COLUMNS, request.query["format"], "export"
+            )
+
+        app = web.Application(middlewares=[cors_middleware, error_handling_middleware])
+        app.on_response_prepare.append(add_cors_headers)
+        app.router.add_get("/export", export)
+        return await aiohttp_client(app)
+
+    @pytest.mark.logic
+    async def test_ndjson_all_rows(self, client, closed):
+        response = await client.get("/export", params={"count": 1234, "format": "ndjson"})
+
+        assert response.status == 200
+        assert response.headers["Content-Type"] == "application/x-ndjson"
+        lines = (await response.text()).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == list(range(1234))
+        assert closed == [True]
+
+    @pytest.mark.logic
+    async def test_csv_empty_has_header(self, client):
+        response = await client.get("/export", params={"count": 0, "format": "csv"})
+
+        assert response.status == 200
+        assert 'filename="export.csv"' in response.headers["Content-Disposition"]
+        assert (await response.text()).splitlines() == ["id,state,date,text"]
+
+    @pytest.mark.logic
+    async def test_query_error_before_headers(self, client):
+        response = await client.get("/export", params={"fail": 1})
+
+        assert response.status == 500
+        assert (await response.json())["message"] == "База недоступна"
+
+    @pytest.mark.logic
+    async def test_cors_headers_on_stream(self, client):
+        response = await client.get(
+            "/export",
+            params={"count": 1, "format": "csv"},
+            headers={"Origin": "http://admin.example"},
+        )
+
+        assert response.status == 200
+        assert response.headers["Access-Control-Allow-Origin"] == "http://admin.example"
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from app.store.vk_api.batcher import BatchedCall, build_execute_code
+from app.store.vk_api.decoder import MESSAGE_NEW, decode_long_poll
+from benchmarks.fake_vk import LONG_POLL_KEY, FakeVk, parse_execute_code
+
+UPDATE = {
+    "type": MESSAGE_NEW,
+    "event_id": "1",
+    "group_id": 1,
+    "object": {
+        "message": {
+            "conversation_message_id": 1,
+            "date": 0,
+            "from_id": 13007796,
+            "peer_id": 2000000001,
+            "text": "/start_blitz",
+        }
+    },
+}
+
+
+class TestFakeVk:
+    @pytest.mark.logic
+    async def test_parse_execute_code(self):
+        params = [
+            {"peer_ids": 2000000001, "message": 'Вопрос: "(1, 2)"?'},
+            {"user_ids": "1,2"},
+        ]
+        code = build_execute_code(
+            [
+                BatchedCall("messages.send", params[0]),
+                BatchedCall("users.get", params[1]),
+            ]
+        )
+
+        assert parse_execute_code(code) == [
+            ("messages.send", params[0]),
+            ("users.get", params[1]),
+        ]
+
+    @pytest.mark.logic
+    async def test_long_poll_returns_emitted_updates(self, aiohttp_client):
+        fake = FakeVk()
+        client = await aiohttp_client(fake.create_app())
+        fake.emit(UPDATE)
+
+        response = await client.get(
+            "/long_poll", params={"key": LONG_POLL_KEY, "ts": 0, "wait": 1}
+        )
+        batch = decode_long_poll(await response.read())
+
+        assert response.headers["Content-Type"] == "application/json"
+        assert batch.ts == "1"
+        assert batch.updates[0].object.message.text == "/start_blitz"
+
+    @pytest.mark.logic
+    async def test_execute_records_calls(self, aiohttp_client):
+        calls = []
+        fake = FakeVk(on_call=lambda method, params, _: calls.append(method))
+        client = await aiohttp_client(fake.create_app())
+        code = build_execute_code(
+            [
+                BatchedCall("messages.send", {"peer_ids": 2000000001, "message": "1"}),
+                BatchedCall("messages.send", {"peer_ids": 2000000001, "message": "2"}),
+            ]
+        )
+
+        response = await client.post("/method/execute", data={"code": code})
+
+        assert json.loads(await response.text())["response"] == [
+            [{"peer_id": 2000000001, "conversation_message_id": 1}],
+            [{"peer_id": 2000000001, "conversation_message_id": 2}],
+        ]
+        assert calls == ["messages.send", "messages.send"]
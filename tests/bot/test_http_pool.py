@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.store.vk_api.http import HttpPool
+from app.web.config import VkHttpPoolConfig
+
+
+@pytest.fixture
+def release() -> asyncio.Event:
+    return asyncio.Event()
+
+
+@pytest.fixture
+async def server(release):
+    async def handler(request: web.Request) -> web.Response:
+        await release.wait()
+        return web.json_response({"response": 1})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+async def fetch(pool: HttpPool, url: str) -> dict:
+    async with pool.request("GET", url) as response:
+        return await response.json()
+
+
+class TestHttpPool:
+    @pytest.mark.logic
+    async def test_stats_within_limit(self, server, release):
+        pool = HttpPool(VkHttpPoolConfig(limit=1, keepalive_timeout=30))
+        url = str(server.make_url("/"))
+
+        requests = [asyncio.create_task(fetch(pool, url)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+
+        stats = pool.get_stats()
+        assert stats["limit"] == 1
+        assert stats["in_use"] == 1
+        assert stats["waiting"] == 2
+
+        release.set()
+        assert await asyncio.gather(*requests) == [{"response": 1}] * 3
+
+        stats = pool.get_stats()
+        assert stats["in_use"] == 0
+        assert stats["waiting"] == 0
+        # Лимит 1 - все запросы прошли по одному keep-alive соединению
+        assert stats["created"] == 1
+        assert stats["reused"] == 2
+        await pool.close()
+
+    @pytest.mark.logic
+    async def test_connection_released_on_error(self, server, release):
+        release.set()
+        pool = HttpPool(VkHttpPoolConfig(limit=1))
+
+        with pytest.raises(RuntimeError):
+            async with pool.request("GET", str(server.make_url("/"))):
+                raise RuntimeError
+
+        assert pool.get_stats()["in_use"] == 0
+        assert await fetch(pool, str(server.make_url("/"))) == {"response": 1}
+        await pool.close()
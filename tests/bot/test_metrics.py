@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.metrics.registry import Counter, Gauge, Histogram, Metric, MetricsRegistry
+from app.store.game.manager import GameManager
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+class TestMetricsRegistry:
+    @pytest.mark.logic
+    async def test_histogram_buckets_cumulative(self, registry):
+        histogram = registry.register(
+            Histogram("request_seconds", "Время", labels=("method",), buckets=(0.1, 1))
+        )
+        histogram.observe(0.05, "messages.send")
+        histogram.observe(0.1, "messages.send")
+        histogram.observe(3, "messages.send")
+
+        text = registry.render()
+
+        assert "# TYPE request_seconds histogram" in text
+        assert 'request_seconds_bucket{method="messages.send",le="0.1"} 2' in text
+        assert 'request_seconds_bucket{method="messages.send",le="1"} 2' in text
+        assert 'request_seconds_bucket{method="messages.send",le="+Inf"} 3' in text
+        assert 'request_seconds_count{method="messages.send"} 3' in text
+        assert 'request_seconds_sum{method="messages.send"} 3.15' in text
+
+    @pytest.mark.logic
+    async def test_timer_observes_block(self, registry):
+        histogram = registry.register(Histogram("cycle_seconds", "Цикл"))
+
+        with histogram.time():
+            pass
+
+        assert histogram.get_count() == 1
+
+    @pytest.mark.logic
+    async def test_counter_and_gauge(self, registry):
+        counter = registry.register(Counter("errors_total", "Ошибки", labels=("method",)))
+        gauge = registry.register(Gauge("active_games", "Игры", labels=("type",)))
+        counter.inc('users."get"')
+        counter.inc('users."get"')
+        gauge.set_function(lambda: {("blitz",): 2})
+
+        text = registry.render()
+
+        assert 'errors_total{method="users.\\"get\\""} 2' in text
+        assert 'active_games{type="blitz"} 2' in text
+
+    @pytest.mark.logic
+    async def test_duplicate_name(self, registry):
+        registry.register(Counter("errors_total", "Ошибки"))
+
+        with pytest.raises(ValueError, match="errors_total"):
+            registry.register(Counter("errors_total", "Ошибки"))
+
+    @pytest.mark.logic
+    def test_metric_without_collect(self):
+        class Summary(Metric):
+            type_name = "summary"
+
+        with pytest.raises(TypeError, match="collect"):
+            Summary("latency", "Задержка")
+
+
+class TestActiveGames:
+    @pytest.mark.logic
+    def test_counts_blitz_and_game_100(self):
+        app = MagicMock()
+        app.store.bots_manager.games = {
+            2000000001: SimpleNamespace(game_type="game_100"),
+            2000000002: SimpleNamespace(game_type="game_100"),
+        }
+        manager = GameManager(app)
+        manager._active_games = {2000000003: SimpleNamespace(game_type="blitz")}
+
+        assert manager.get_active_games_count() == {("game_100",): 2, ("blitz",): 1}
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from aiohttp.web_exceptions import HTTPBadRequest
+
+from app.store.database.pagination import (
+    Page,
+    decode_cursor,
+    encode_cursor,
+    iter_pages,
+)
+
+
+class TestCursor:
+    @pytest.mark.logic
+    async def test_round_trip(self):
+        cursor = encode_cursor(42, "theme")
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor, int, str) == [42, "theme"]
+
+    @pytest.mark.logic
+    @pytest.mark.parametrize("cursor", ["не курсор", "W10", encode_cursor("42")])
+    async def test_invalid_cursor(self, cursor):
+        with pytest.raises(HTTPBadRequest):
+            decode_cursor(cursor, int)
+
+
+class TestIterPages:
+    @pytest.mark.logic
+    async def test_all_pages(self):
+        rows = list(range(1, 8))
+        cursors = []
+
+        async def fetch(cursor=None, limit=3):
+            await asyncio.sleep(0)
+            cursors.append(cursor)
+            start = decode_cursor(cursor, int)[0] if cursor else 0
+            items = [row for row in rows if row > start][:limit]
+            has_more = items and items[-1] != rows[-1]
+            return Page(
+                items=items, next_cursor=encode_cursor(items[-1]) if has_more else None
+            )
+
+        assert [row async for row in iter_pages(fetch)] == rows
+        assert len(cursors) == 3
+        assert cursors[0] is None
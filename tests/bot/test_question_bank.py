@@ -0,0 +1,139 @@
+import asyncio
+import random
+
+import pytest
+
+from app.store.question_bank.cache import BlitzQuestionEntry, QuestionBankCache
+from app.store.question_bank.sampler import QuestionSampler
+
+
+class FakeQuestions:
+    def __init__(self):
+        self.themes: dict[int, list[BlitzQuestionEntry]] = {}
+        self.loads: list[int | None] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def add(self, question_id: int, theme_id: int) -> None:
+        self.themes.setdefault(theme_id, []).append(
+            BlitzQuestionEntry(
+                id=question_id,
+                title=f"Вопрос {question_id}",
+                answer=f"Ответ {question_id}",
+                theme_id=theme_id,
+            )
+        )
+
+    async def load(self, theme_id: int | None) -> tuple[BlitzQuestionEntry, ...]:
+        self.loads.append(theme_id)
+        await self.release.wait()
+        if theme_id is None:
+            return tuple(q for questions in self.themes.values() for q in questions)
+        return tuple(self.themes.get(theme_id, ()))
+
+
+@pytest.fixture
+def questions() -> FakeQuestions:
+    questions = FakeQuestions()
+    questions.add(1, theme_id=1)
+    questions.add(2, theme_id=2)
+    return questions
+
+
+class TestQuestionBankCache:
+    @pytest.mark.logic
+    async def test_bank_shared_between_games(self, questions):
+        cache = QuestionBankCache(questions.load)
+
+        first = await cache.get(1)
+        second = await cache.get(1)
+
+        assert first is second
+        assert [q.id for q in first.questions] == [1]
+        assert questions.loads == [1]
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.logic
+    async def test_concurrent_gets_load_once(self, questions):
+        cache = QuestionBankCache(questions.load)
+        questions.release.clear()
+
+        tasks = [asyncio.create_task(cache.get(1)) for _ in range(5)]
+        await asyncio.sleep(0)
+        questions.release.set()
+        banks = await asyncio.gather(*tasks)
+
+        assert questions.loads == [1]
+        assert all(bank is banks[0] for bank in banks)
+        assert cache.get_stats()["coalesced"] == 4
+
+    @pytest.mark.logic
+    async def test_invalidate_only_changed_theme(self, questions):
+        cache = QuestionBankCache(questions.load)
+        await cache.get(1)
+        await cache.get(2)
+        await cache.get()
+
+        questions.add(3, theme_id=1)
+        cache.invalidate(1)
+
+        assert [q.id for q in (await cache.get(1)).questions] == [1, 3]
+        assert [q.id for q in (await cache.get()).questions] == [1, 3, 2]
+        await cache.get(2)
+        assert questions.loads == [1, 2, None, 1, None]
+        assert cache.get_stats()["invalidations"] == 2
+
+    @pytest.mark.logic
+    async def test_load_during_invalidate_not_cached(self, questions):
+        cache = QuestionBankCache(questions.load)
+        questions.release.clear()
+
+        task = asyncio.create_task(cache.get(1))
+        await asyncio.sleep(0)
+        questions.add(3, theme_id=1)
+        cache.invalidate(1)
+        questions.release.set()
+        await task
+
+        assert [q.id for q in (await cache.get(1)).questions] == [1, 3]
+        assert questions.loads == [1, 1]
+
+
+class TestQuestionSampler:
+    @pytest.mark.logic
+    async def test_no_repeats_within_recent(self):
+        sampler = QuestionSampler(recent_size=10, rng=random.Random(1))
+        question_ids = tuple(range(50))
+
+        chosen = [sampler.choose(question_ids, conversation_id=1) for _ in range(10)]
+
+        assert len(set(chosen)) == 10
+
+    @pytest.mark.logic
+    async def test_small_bank_cycles_all_questions(self):
+        sampler = QuestionSampler(recent_size=5, attempts=1, rng=random.Random(1))
+        question_ids = tuple(range(5))
+
+        chosen = [sampler.choose(question_ids, conversation_id=1) for _ in range(5)]
+
+        assert sorted(chosen) == [0, 1, 2, 3, 4]
+        # Все вопросы недавние - выбирается любой
+        assert sampler.choose(question_ids, conversation_id=1) in question_ids
+
+    @pytest.mark.logic
+    async def test_conversations_independent_and_bounded(self):
+        sampler = QuestionSampler(
+            recent_size=3, max_conversations=2, rng=random.Random(1)
+        )
+
+        for conversation_id in (1, 2, 3):
+            sampler.choose((1, 2, 3), conversation_id=conversation_id)
+
+        assert sampler.get_stats()["conversations"] == 2
+        assert sampler.get_stats()["choices"] == 3
+
+    @pytest.mark.logic
+    async def test_empty_bank(self):
+        with pytest.raises(IndexError):
+            QuestionSampler().choose((), conversation_id=1)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.store.vk_api.scheduler import RequestPriority, RequestScheduler
+
+
+@pytest.fixture
+def sent() -> list[str]:
+    return []
+
+
+@pytest.fixture
+async def scheduler(sent):
+    async def send(method: str, params: dict) -> dict:
+        sent.append(params["text"])
+        await asyncio.sleep(0)
+        return {"response": params["text"]}
+
+    scheduler = RequestScheduler(send=send, rate=200, burst=1)
+    scheduler.start()
+    yield scheduler
+    await scheduler.close()
+
+
+class TestRequestScheduler:
+    @pytest.mark.logic
+    async def test_event_answer_not_starved(self, scheduler, sent):
+        flood = [
+            asyncio.create_task(
+                scheduler.submit(
+                    "messages.send", {"text": f"message_{i}"}, RequestPriority.MESSAGE
+                )
+            )
+            for i in range(20)
+        ]
+        await asyncio.sleep(0.02)
+
+        answer = await scheduler.submit(
+            "messages.sendMessageEventAnswer",
+            {"text": "answer"},
+            RequestPriority.EVENT_ANSWER,
+        )
+        sent_at = sent.index("answer")
+        await asyncio.gather(*flood)
+
+        assert answer == {"response": "answer"}
+        # до ответа успевают уйти только сообщения, отправленные за 20 мс
+        assert sent_at < 10
+        assert len(sent) == 21
+
+    @pytest.mark.logic
+    async def test_priority_order(self, scheduler, sent):
+        calls = [
+            scheduler.submit(
+                "messages.edit", {"text": "edit"}, RequestPriority.BACKGROUND
+            ),
+            scheduler.submit("messages.send", {"text": "send"}, RequestPriority.MESSAGE),
+            scheduler.submit(
+                "messages.sendMessageEventAnswer",
+                {"text": "answer"},
+                RequestPriority.EVENT_ANSWER,
+            ),
+        ]
+        await asyncio.gather(*calls)
+
+        assert sent == ["answer", "send", "edit"]
+
+    @pytest.mark.logic
+    async def test_rate_limit(self, scheduler, sent):
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(
+            *(
+                scheduler.submit(
+                    "messages.send", {"text": str(i)}, RequestPriority.MESSAGE
+                )
+                for i in range(10)
+            )
+        )
+
+        # 200 запросов в секунду - 10 запросов не быстрее чем за ~45 мс
+        assert asyncio.get_running_loop().time() - started >= 0.04
+        assert scheduler.get_stats()["classes"]["message"]["requests"] == 10
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.metrics.tracing import Tracer, traced
+from app.store.database.database import TimedAsyncSession
+
+
+@pytest.fixture
+def tracer(monkeypatch) -> Tracer:
+    tracer = Tracer()
+    tracer.configure(enabled=True, slow_threshold=0)
+    monkeypatch.setattr("app.metrics.tracing.TRACER", tracer)
+    return tracer
+
+
+class TestTracer:
+    @pytest.mark.logic
+    async def test_slow_trace_exported_with_spans(self, tracer, caplog):
+        @traced("GameBlitz.handle_message")
+        async def handle_message():
+            with tracer.span("vk messages.send"):
+                await asyncio.sleep(0.01)
+
+        with caplog.at_level(logging.WARNING, logger="slow_traces"):
+            with tracer.trace("message_new", peer_id=2000000001):
+                tracer.add_span("UpdateDispatcher.queue", 0.0, 0.0)
+                await handle_message()
+
+        exported = json.loads(caplog.records[-1].message)
+        assert exported["trace"] == "message_new"
+        assert exported["peer_id"] == 2000000001
+        spans = {span["name"]: span for span in exported["spans"]}
+        assert spans["GameBlitz.handle_message"]["depth"] == 0
+        assert spans["vk messages.send"]["depth"] == 1
+        assert spans["vk messages.send"]["duration_ms"] >= 10
+
+    @pytest.mark.logic
+    async def test_fast_trace_not_exported(self, tracer, caplog):
+        tracer.configure(enabled=True, slow_threshold=10)
+
+        with caplog.at_level(logging.WARNING, logger="slow_traces"):
+            with tracer.trace("message_new"):
+                with tracer.span("db QuizAccessor.get_theme_by_id"):
+                    pass
+
+        assert not caplog.records
+
+    @pytest.mark.logic
+    async def test_background_task_not_written_after_finish(self, tracer):
+        async def timer():
+            await asyncio.sleep(0.01)
+            with tracer.span("Game100Logic._answer_timer"):
+                pass
+
+        with tracer.trace("message_event") as trace:
+            task = asyncio.create_task(timer())
+        await task
+
+        assert trace.spans == []
+
+    @pytest.mark.logic
+    async def test_span_outside_trace(self, tracer):
+        with tracer.span("vk messages.send") as span:
+            assert span is None
+
+
+class TestTimedAsyncSession:
+    @pytest.mark.logic
+    async def test_span_named_by_label(self, tracer, monkeypatch):
+        monkeypatch.setattr("app.store.database.database.TRACER", tracer)
+        sessionmaker = async_sessionmaker(class_=TimedAsyncSession)
+
+        with tracer.trace("message_new") as trace:
+            async with sessionmaker(label="QuizAccessor.get_theme_by_id"):
+                pass
+            async with sessionmaker():
+                pass
+
+        assert [span.name for span in trace.spans] == [
+            "db QuizAccessor.get_theme_by_id",
+            "db session",
+        ]
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.store.vk_api.dataclasses import VkUser
+from app.store.vk_api.users import VkUserCache
+
+
+@pytest.fixture
+def fetched() -> list[list[int]]:
+    return []
+
+
+@pytest.fixture
+def user_cache(fetched) -> VkUserCache:
+    async def fetch(user_ids: list[int]) -> list[VkUser]:
+        fetched.append(list(user_ids))
+        await asyncio.sleep(0.01)
+        return [
+            VkUser(id=user_id, first_name="Имя", last_name=str(user_id))
+            for user_id in user_ids
+            if user_id > 0
+        ]
+
+    return VkUserCache(fetch=fetch, max_size=2, ttl=60, window=0.01)
+
+
+class TestVkUserCache:
+    @pytest.mark.logic
+    async def test_merge_lookups_in_window(self, user_cache, fetched):
+        users = await asyncio.gather(
+            user_cache.get(1), user_cache.get(2), user_cache.get(1)
+        )
+
+        assert [user.id for user in users] == [1, 2, 1]
+        assert fetched == [[1, 2]]
+        assert user_cache.stats.coalesced == 1
+
+    @pytest.mark.logic
+    async def test_cache_hit(self, user_cache, fetched):
+        await user_cache.get(1)
+        user = await user_cache.get(1)
+
+        assert user.id == 1
+        assert fetched == [[1]]
+        assert user_cache.stats.hits == 1
+
+    @pytest.mark.logic
+    async def test_lru_eviction(self, user_cache, fetched):
+        for user_id in (1, 2, 1, 3):
+            await user_cache.get(user_id)
+
+        await user_cache.get(1)
+        await user_cache.get(2)
+
+        assert fetched == [[1], [2], [3], [2]]
+
+    @pytest.mark.logic
+    async def test_ttl_expired(self, user_cache, fetched):
+        user_cache.ttl = 0
+        await user_cache.get(1)
+        await user_cache.get(1)
+
+        assert fetched == [[1], [1]]
+
+    @pytest.mark.logic
+    async def test_unknown_user_not_cached(self, user_cache, fetched):
+        assert await user_cache.get(-1) is None
+        assert await user_cache.get(-1) is None
+        assert fetched == [[-1], [-1]]
@@ -1,7 +1,10 @@
 import asyncio
+import json
 
 import pytest
 
+from app.store.game.constants import VkButtons
+from app.store.vk_api.keyboards import REGISTRATION_KEYBOARD, get_keyboard
 from app.store.vk_api.utils import VkButton, VkKeyboard
 
 
@@ -44,3 +47,22 @@ class TestCreateVkKeyboard:
         await asyncio.gather(*tasks)
         with pytest.raises(ValueError, match=r"Слишком много кнопок"):
             await keyboard.add_line([VkButton("OneMoreButton").get()])
+
+
+class TestKeyboardRegistry:
+    async def test_sync_builder_same_as_async(self) -> None:
+        btn_list = [VkButton(f"test_btn{i}").get() for i in range(3)]
+        keyboard = VkKeyboard(one_time=True)
+        await keyboard.add_line(btn_list)
+
+        assert VkKeyboard(one_time=True).add_row(btn_list).dumps() == (
+            await keyboard.get_keyboard()
+        )
+
+    async def test_layout_cached(self) -> None:
+        layout = ((VkButtons.BTN_REG_ON, VkButtons.BTN_REG_OFF),)
+
+        assert get_keyboard(layout) is REGISTRATION_KEYBOARD
+        assert json.loads(REGISTRATION_KEYBOARD)["buttons"] == [
+            [VkButtons.BTN_REG_ON.value, VkButtons.BTN_REG_OFF.value]
+        ]
@@ -0,0 +1,138 @@
+import asyncio
+import os
+
+import pytest
+
+from app.store.database.write_behind import WriteBehindBuffer
+from app.store.quiz.accessor import VkMessageAccessor
+from app.store.store import setup_store
+from app.web.app import Application
+from app.web.config import MessageSaverConfig, setup_config
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../../etc/config_tests.yaml")
+
+
+def make_app() -> Application:
+    app = Application()
+    setup_config(app, CONFIG_PATH)
+    setup_store(app)
+    return app
+
+
+class FakeTable:
+    def __init__(self):
+        self.batches: list[list[int]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def write(self, rows: list[int]) -> None:
+        await self.release.wait()
+        self.batches.append(rows)
+
+
+class TestWriteBehindBuffer:
+    @pytest.mark.logic
+    async def test_full_batch_written_at_once(self):
+        table = FakeTable()
+        buffer = WriteBehindBuffer(
+            table.write, batch_size=3, flush_interval=10, max_size=100
+        )
+
+        for row in range(3):
+            await buffer.put(row)
+        await asyncio.sleep(0.01)
+
+        assert table.batches == [[0, 1, 2]]
+        await buffer.close()
+
+    @pytest.mark.logic
+    async def test_partial_batch_written_after_interval(self):
+        table = FakeTable()
+        buffer = WriteBehindBuffer(
+            table.write, batch_size=100, flush_interval=0.02, max_size=100
+        )
+
+        await buffer.put(1)
+        await buffer.put(2)
+        await asyncio.sleep(0.005)
+        assert table.batches == []
+
+        await asyncio.sleep(0.05)
+        assert table.batches == [[1, 2]]
+        await buffer.close()
+
+    @pytest.mark.logic
+    async def test_close_flushes_buffer(self):
+        table = FakeTable()
+        buffer = WriteBehindBuffer(
+            table.write, batch_size=2, flush_interval=10, max_size=100
+        )
+
+        for row in range(5):
+            await buffer.put(row)
+        await buffer.close()
+
+        assert table.batches == [[0, 1], [2, 3], [4]]
+        assert buffer.get_stats()["written"] == 5
+
+    @pytest.mark.logic
+    async def test_put_waits_when_full(self):
+        table = FakeTable()
+        table.release.clear()
+        buffer = WriteBehindBuffer(
+            table.write, batch_size=1, flush_interval=10, max_size=1
+        )
+
+        # Первая строка уходит в запись и висит, вторая занимает буфер
+        await buffer.put(0)
+        await asyncio.sleep(0)
+        await buffer.put(1)
+        blocked = asyncio.create_task(buffer.put(2))
+        await asyncio.sleep(0.01)
+
+        assert not blocked.done()
+        assert buffer.get_stats()["blocked"] == 1
+
+        table.release.set()
+        await blocked
+        await buffer.close()
+        assert table.batches == [[0], [1], [2]]
+
+
+class TestMessageSaverShutdown:
+    @pytest.mark.logic
+    def test_database_closed_after_accessors(self):
+        app = make_app()
+
+        cleanup = list(app.on_cleanup)
+        # Буфер сообщений дописывается до закрытия пула соединений
+        assert cleanup.index(app.store.vk_messages.disconnect) < cleanup.index(
+            app.database.disconnect
+        )
+        assert cleanup.index(app.store.vk_api.disconnect) < cleanup.index(
+            app.store.vk_messages.disconnect
+        )
+
+    @pytest.mark.logic
+    async def test_message_saved_before_connect(self, monkeypatch):
+        table = FakeTable()
+
+        async def add_messages(self, messages: list[dict]) -> None:
+            await table.write(messages)
+
+        monkeypatch.setattr(VkMessageAccessor, "add_messages", add_messages)
+        app = make_app()
+
+        # Апдейты могут прийти раньше, чем подключится аксессор сообщений
+        await app.store.vk_messages.save_message(1, "привет", 13007796)
+        await app.store.vk_messages.buffer.close()
+
+        assert table.batches == [
+            [{"conversation_id": 1, "text": "привет", "user_id": 13007796}]
+        ]
+
+    @pytest.mark.logic
+    @pytest.mark.parametrize("batch_size", [0, 10001])
+    def test_batch_size_limit(self, batch_size: int):
+        with pytest.raises(ValueError, match="batch_size"):
+            MessageSaverConfig(batch_size=batch_size)
@@ -76,8 +76,9 @@ async def clear_db(application: Application) -> Iterator[None]:
         session = AsyncSession(application.database.engine)
         connection = session.connection()
         for table in application.database._db.metadata.tables:
-            await session.execute(text(f"TRUNCATE {table} CASCADE"))
-            await session.execute(text(f"ALTER SEQUENCE {table}_id_seq RESTART WITH 1"))
+            # RESTART IDENTITY сбрасывает последовательности id, а у таблиц
+            # без своего id (vk_conversations) ничего не ломает
+            await session.execute(text(f"TRUNCATE {table} RESTART IDENTITY CASCADE"))
 
         await session.commit()
         connection.close()
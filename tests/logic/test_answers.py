@@ -0,0 +1,89 @@
+import pytest
+
+from app.games.answers import AnswerIndex, normalize_answer
+
+
+class TestAnswerIndex:
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("Ёжик", "ежик"),
+            ("  Нью-Йорк! ", "ньюйорк"),
+            ("ＡＢＣ 123", "abc123"),
+            ("STRASSE", "strasse"),
+        ],
+    )
+    @pytest.mark.logic
+    async def test_normalize_answer(self, text, expected):
+        assert normalize_answer(text) == expected
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("картошка", "картофель"),
+            ("Картофель.", "картофель"),
+            ("картофелъ", "картофель"),
+            ("морковка", "морковь"),
+            ("лук", None),
+            ("капуста", None),
+            ("", None),
+        ],
+    )
+    @pytest.mark.logic
+    async def test_match_with_aliases_and_typos(self, text, expected):
+        index = AnswerIndex(
+            [
+                ("картофель", "картофель"),
+                ("картошка", "картофель"),
+                ("морковь", "морковь"),
+                ("морковка", "морковь"),
+                ("лук репчатый", "лук"),
+            ]
+        )
+
+        assert index.match(text) == expected
+
+    @pytest.mark.logic
+    async def test_short_answer_exact_only(self):
+        index = AnswerIndex([("кот", "кот")], min_fuzzy_length=4)
+
+        assert index.match("КОТ") == "кот"
+        assert index.match("кит") is None
+
+    @pytest.mark.logic
+    async def test_remove_drops_all_aliases(self):
+        index = AnswerIndex([("картофель", 1), ("картошка", 1), ("морковь", 2)])
+
+        index.remove(1)
+
+        assert len(index) == 1
+        assert "картошка" not in index
+        assert index.match("картофел") is None
+        assert index.match("морковь") == 2
+
+    @pytest.mark.logic
+    async def test_same_normalized_answers_all_reachable(self):
+        index = AnswerIndex([("Нью-Йорк", 1), ("нью йорк", 2), ("Бостон", 3)])
+
+        assert len(index) == 3
+        assert index.match("Нью Йорк") == 1
+        index.remove(1)
+        assert index.match("Нью Йорк") == 2
+        index.remove(2)
+        assert index.match("Нью Йорк") is None
+        assert len(index) == 1
+
+    @pytest.mark.logic
+    async def test_punctuation_only_answer_kept(self):
+        index = AnswerIndex([("?!", 1), ("Вопрос", 2)])
+
+        assert len(index) == 2
+        assert "?!" in index
+        assert index.match(" ?! ") == 1
+        assert index.match("?") is None
+
+    @pytest.mark.logic
+    async def test_len_counts_answers_not_aliases(self):
+        index = AnswerIndex([("картофель", 1), ("картошка", 1), ("морковь", 2)])
+
+        assert len(index) == 2
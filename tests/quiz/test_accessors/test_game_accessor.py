@@ -0,0 +1,70 @@
+import asyncio
+
+from app.games.game_100.constants import GameStage
+from app.store import Store
+
+
+class TestGameTransition:
+    async def test_transition_changes_fields(self, store: Store, game1) -> None:
+        game = await store.game_accessor.transition(
+            game_id=game1.id,
+            expected=GameStage.WAITING_READY_TO_ANSWER,
+            new_state=GameStage.WAITING_ANSWER,
+            responsed_player_id=13007796,
+        )
+
+        assert game is not None
+        assert game.state == GameStage.WAITING_ANSWER
+        assert game.responsed_player_id == 13007796
+
+    async def test_transition_from_other_state(self, store: Store, game1) -> None:
+        game = await store.game_accessor.transition(
+            game_id=game1.id,
+            expected=GameStage.WAITING_ANSWER,
+            new_state=GameStage.WAITING_READY_TO_ANSWER,
+            responsed_player_id=None,
+        )
+
+        assert game is None
+        game = await store.game_accessor.get_game_by_id(game1.id)
+        assert game.state == GameStage.WAITING_READY_TO_ANSWER
+
+    async def test_concurrent_transitions_one_wins(self, store: Store, game1) -> None:
+        results = await asyncio.gather(
+            *(
+                store.game_accessor.transition(
+                    game_id=game1.id,
+                    expected=GameStage.WAITING_READY_TO_ANSWER,
+                    new_state=GameStage.WAITING_ANSWER,
+                    responsed_player_id=user_id,
+                )
+                for user_id in (1, 2, 3)
+            )
+        )
+
+        winners = [game for game in results if game is not None]
+        assert len(winners) == 1
+        game = await store.game_accessor.get_game_by_id(game1.id)
+        assert game.responsed_player_id == winners[0].responsed_player_id
+
+
+class TestGamesSummary:
+    async def test_summary_counts_players_and_score(
+        self, store: Store, game_running, game_finished
+    ) -> None:
+        await store.game_accessor.add_player(game_running.id, 1, "Игрок 1")
+        await store.game_accessor.add_player(game_running.id, 2, "Игрок 2")
+        player = await store.game_accessor.get_player_by_vk_id_game_id(1, game_running.id)
+        for answer_id in (1, 2):
+            await store.game_accessor.player_add_answer_from_game(
+                answer_id, player.id, game_running.id
+            )
+
+        page = await store.game_accessor.get_active_games()
+
+        assert [game.id for game in page.items] == [game_running.id]
+        summary = page.items[0]
+        assert summary.players_count == 2
+        assert summary.answers_count == 2
+        assert summary.total_score == 70
+        assert page.next_cursor is None
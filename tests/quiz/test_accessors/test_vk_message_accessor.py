@@ -0,0 +1,157 @@
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.store import Store
+from app.vk.models import VkConversation, VkMessage
+
+MIGRATION = next(
+    (Path(__file__).parents[3] / "alembic" / "versions").glob("*-5b1e7c9a3d42_*.py")
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("add_vk_conversations", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def message(conversation_id: int, text: str) -> dict:
+    return {"conversation_id": conversation_id, "text": text, "user_id": 13007796}
+
+
+async def get_conversation(
+    db_sessionmaker: async_sessionmaker[AsyncSession], conversation_id: int
+) -> VkConversation:
+    async with db_sessionmaker() as session:
+        return await session.get(VkConversation, conversation_id)
+
+
+class TestConversationSummary:
+    @pytest.mark.db
+    async def test_upsert_counts_and_moves_forward(
+        self, store: Store, db_sessionmaker
+    ) -> None:
+        await store.vk_messages.add_messages(
+            [message(1, "первое"), message(2, "другая беседа"), message(1, "второе")]
+        )
+        await store.vk_messages.add_messages([message(1, "третье")])
+
+        conversation = await get_conversation(db_sessionmaker, 1)
+        assert conversation.messages_count == 3
+        assert conversation.last_message_id == 4
+        assert conversation.last_text == "третье"
+        assert (await get_conversation(db_sessionmaker, 2)).messages_count == 1
+
+    @pytest.mark.db
+    async def test_older_batch_not_move_back(self, store: Store, db_sessionmaker) -> None:
+        await store.vk_messages.add_messages([message(1, "первое"), message(1, "второе")])
+
+        # Пачка с меньшим id, закоммиченная позже более новой
+        async with db_sessionmaker() as session:
+            await store.vk_messages._update_conversations(
+                session,
+                [
+                    VkMessage(
+                        id=1,
+                        conversation_id=1,
+                        text="старое",
+                        user_id=1,
+                        date=datetime(2020, 1, 1),
+                    )
+                ],
+            )
+            await session.commit()
+
+        conversation = await get_conversation(db_sessionmaker, 1)
+        assert conversation.messages_count == 3
+        assert conversation.last_message_id == 2
+        assert conversation.last_text == "второе"
+        assert conversation.last_user_id == 13007796
+
+
+class TestKeysetPages:
+    @pytest.mark.db
+    async def test_messages_stable_across_inserts(self, store: Store) -> None:
+        await store.vk_messages.add_messages([message(1, str(n)) for n in range(5)])
+
+        page = await store.vk_messages.get_messages_list(1, limit=2)
+        seen = [item.id for item in page.items]
+        # Новые сообщения пишутся после курсора и попадают на следующие страницы
+        await store.vk_messages.add_messages([message(1, "5"), message(1, "6")])
+
+        while page.next_cursor:
+            page = await store.vk_messages.get_messages_list(
+                1, cursor=page.next_cursor, limit=2
+            )
+            seen.extend(item.id for item in page.items)
+
+        assert seen == list(range(1, 8))
+
+    @pytest.mark.db
+    async def test_conversations_stable_across_new_messages(self, store: Store) -> None:
+        await store.vk_messages.add_messages(
+            [message(conversation_id, "привет") for conversation_id in range(1, 6)]
+        )
+
+        page = await store.vk_messages.get_conversations_list(limit=2)
+        seen = [item.conversation_id for item in page.items]
+        # Беседы становятся активными между запросами страниц: и уже
+        # пройденная, и еще не показанная - ни одна не пропадает и не повторяется
+        await store.vk_messages.add_messages(
+            [message(1, "снова"), message(4, "снова"), message(6, "новая")]
+        )
+
+        while page.next_cursor:
+            page = await store.vk_messages.get_conversations_list(
+                cursor=page.next_cursor, limit=2
+            )
+            seen.extend(item.conversation_id for item in page.items)
+
+        assert seen == [1, 2, 3, 4, 5, 6]
+
+
+class TestConversationsBackfill:
+    @pytest.mark.db
+    async def test_backfill_matches_group_by(self, store: Store, db_sessionmaker) -> None:
+        await store.vk_messages.add_messages(
+            [message(n % 3 + 1, str(n)) for n in range(10)]
+        )
+
+        async with db_sessionmaker() as session:
+            await session.execute(text("TRUNCATE vk_conversations"))
+            await session.execute(text(load_migration().BACKFILL_VK_CONVERSATIONS))
+            await session.commit()
+
+            summaries = (
+                await session.execute(
+                    select(
+                        VkConversation.conversation_id,
+                        VkConversation.messages_count,
+                        VkConversation.last_message_id,
+                        VkConversation.last_text,
+                    ).order_by(VkConversation.conversation_id)
+                )
+            ).all()
+            grouped = (
+                await session.execute(
+                    select(
+                        VkMessage.conversation_id,
+                        func.count(),
+                        func.max(VkMessage.id),
+                    )
+                    .group_by(VkMessage.conversation_id)
+                    .order_by(VkMessage.conversation_id)
+                )
+            ).all()
+            last_texts = dict(
+                (await session.execute(select(VkMessage.id, VkMessage.text))).all()
+            )
+
+        assert [tuple(row[:3]) for row in summaries] == [tuple(row) for row in grouped]
+        assert all(row.last_text == last_texts[row.last_message_id] for row in summaries)
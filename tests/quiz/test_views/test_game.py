@@ -21,7 +21,7 @@ class TestListActive:
         assert response.status == 200, f"response = {response}"
 
         data = await response.json()
-        assert data == {"data": {"games": []}, "status": "ok"}
+        assert data == {"data": {"games": [], "next_cursor": None}, "status": "ok"}
 
     @pytest.mark.view
     async def test_success(self, auth_cli: TestClient, game_running) -> None:
@@ -35,32 +35,16 @@ class TestListActive:
                 "games": [
                     {
                         "id": 1,
-                        "player_answers_games": [],
-                        "players": [],
-                        "profile": {
-                            "description": None,
-                            "id": 1,
-                            "max_count_gamers": 6,
-                            "min_count_gamers": 2,
-                            "profile_name": "test",
-                            "time_to_answer": 15,
-                            "time_to_registration": 30,
-                        },
-                        "question": {
-                            "answers": [
-                                {"id": 4, "score": 15, "title": "животных"},
-                                {"id": 3, "score": 15, "title": "природу"},
-                                {"id": 2, "score": 27, "title": "свадьбу"},
-                                {"id": 1, "score": 43, "title": "Еду"},
-                            ],
-                            "id": 1,
-                            "theme_id": 1,
-                            "title": "Кого или что чаще всего снимает " "фотограф?",
-                        },
-                        "responsed_player_id": None,
+                        "conversation_id": 2000003,
                         "state": "GameStage.WAITING_ANSWER",
+                        "question_id": 1,
+                        "profile_id": 1,
+                        "players_count": 0,
+                        "answers_count": 0,
+                        "total_score": 0,
                     }
-                ]
+                ],
+                "next_cursor": None,
             },
             "status": "ok",
         }
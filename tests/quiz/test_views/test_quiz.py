@@ -186,7 +186,8 @@ class TestQuestionListView:
                         "theme_id": 1,
                         "title": "Кого или что чаще всего снимает " "фотограф?",
                     }
-                ]
+                ],
+                "next_cursor": None,
             },
             "status": "ok",
         }
@@ -209,7 +210,7 @@ class TestThemeListView:
         data = await response.json()
         assert data == {
             "status": "ok",
-            "data": {"themes": []},
+            "data": {"themes": [], "next_cursor": None},
         }
 
     @pytest.mark.view
@@ -229,7 +230,8 @@ class TestThemeListView:
                         "title": theme_1.title,
                         "description": theme_1.description,
                     }
-                ]
+                ],
+                "next_cursor": None,
             },
         }
 
@@ -303,3 +305,67 @@ class TestThemeAddView:
             },
             "status": "ok",
         }
+
+
+class TestQuestionImportView:
+    URL = "/game/quiz.questions_import"
+
+    @pytest.mark.view
+    async def test_unauthorized(self, cli: TestClient) -> None:
+        response = await cli.post(self.URL, params={"format": "csv"}, data="")
+        assert response.status == 401
+
+    @pytest.mark.view
+    async def test_success_csv(self, auth_cli: TestClient, theme_1) -> None:
+        response = await auth_cli.post(
+            self.URL,
+            params={"format": "csv"},
+            data="title,theme_id,answer,score\n"
+            f"Что в коробке?,{theme_1.id},Еда,60\n"
+            f"Что в коробке?,{theme_1.id},Деньги,40\n",
+        )
+        assert response.status == 200
+
+        data = await response.json()
+        assert data == {"data": {"imported": 1, "errors": []}, "status": "ok"}
+
+        response = await auth_cli.get(
+            "/game/quiz.questions_count", params={"theme_id": theme_1.id}
+        )
+        assert (await response.json())["data"]["questions_count"] == 1
+
+    @pytest.mark.view
+    async def test_row_errors_nothing_imported(
+        self, auth_cli: TestClient, theme_1
+    ) -> None:
+        response = await auth_cli.post(
+            self.URL,
+            json=[
+                {
+                    "title": "Верный вопрос",
+                    "theme_id": theme_1.id,
+                    "answers": [
+                        {"title": "Да", "score": 50},
+                        {"title": "Нет", "score": 50},
+                    ],
+                },
+                {
+                    "title": "Неверная сумма",
+                    "theme_id": theme_1.id,
+                    "answers": [
+                        {"title": "Да", "score": 50},
+                        {"title": "Нет", "score": 40},
+                    ],
+                },
+            ],
+        )
+        assert response.status == 400
+
+        data = (await response.json())["data"]
+        assert data["imported"] == 0
+        assert [error["row"] for error in data["errors"]] == [2]
+
+        response = await auth_cli.get(
+            "/game/quiz.questions_count", params={"theme_id": theme_1.id}
+        )
+        assert (await response.json())["data"]["questions_count"] == 0